@@ -0,0 +1,65 @@
+# bench_startup.py - Measures cold-start time of the headless core and the GUI
+#
+#     python bench_startup.py [--runs 20]
+#
+# Each case runs in a fresh interpreter, so the numbers include Python's own
+# startup; "python" alone is listed as the floor to compare against.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = (
+    ("python", "pass"),
+    ("import game_model", "import game_model"),
+    ("import game_session", "import game_session"),
+    ("import main", "import main"),
+    ("cli stats", "import cli; cli.format_stats(cli.GameSession().stats)"),
+    ("import game_window (Qt)", "import game_window"),
+    ("QApplication start", "from PyQt5.QtWidgets import QApplication; QApplication([])"),
+)
+
+
+def time_case(code, runs):
+    """
+    Time a snippet in fresh interpreters.
+
+    Args:
+        code (str): Python source passed to ``python -c``
+        runs (int): Number of interpreter launches
+
+    Returns:
+        list: Wall-clock seconds per run, or None if the snippet fails
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=here, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None
+    return times
+
+
+def main():
+    """Run every case and print median and best times."""
+    parser = argparse.ArgumentParser(description="Measure Tic Tac Boom cold-start times.")
+    parser.add_argument("--runs", type=int, default=10, help="interpreter launches per case")
+    args = parser.parse_args()
+
+    print(f"{'case':<26}{'median ms':>12}{'best ms':>10}")
+    for name, code in CASES:
+        times = time_case(code, args.runs)
+        if times is None:
+            print(f"{name:<26}{'unavailable':>12}")
+        else:
+            print(f"{name:<26}{statistics.median(times) * 1000:>12.1f}{min(times) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
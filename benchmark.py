@@ -0,0 +1,303 @@
+# benchmark.py - Engine, AI and stats benchmarks with stored baselines
+#
+#     python benchmark.py                          # print results
+#     python benchmark.py --save baseline.json     # store a baseline
+#     python benchmark.py --compare baseline.json  # fail on regressions
+#
+# Every metric is a time per operation (lower is better), taken as the best
+# of several repeats to filter out scheduling noise.
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from game_ai import GameAI
+from game_model import GameModel
+from game_stats import GameStats
+from simulate import play_game
+
+try:
+    from game_batch import BatchGameEngine
+except ImportError:  # NumPy is optional
+    BatchGameEngine = None
+
+# Default allowed slowdown before --compare fails, as a fraction.
+DEFAULT_THRESHOLD = 0.25
+
+# Moves kept in the history for the large-history GameStats benchmarks.
+LARGE_HISTORY = 1000000
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """
+    Register a benchmark.
+
+    The decorated function does the setup and returns ``(run, operations)``,
+    where calling ``run()`` performs ``operations`` operations once.
+
+    Args:
+        name (str): Metric name used in the baseline file
+    """
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def _random_games(count, size=3, win_length=None, seed=0):
+    """Move sequences (cell indices) of random games, for replaying."""
+    rng = random.Random(seed)
+    model = GameModel(size, win_length)
+    games = []
+    for _ in range(count):
+        model.reset_game()
+        cells = list(range(size * size))
+        rng.shuffle(cells)
+        moves = []
+        for cell in cells:
+            if model.game_over:
+                break
+            model.make(cell)
+            moves.append(divmod(cell, size))
+        games.append(moves)
+    return games
+
+
+def _sample_positions(count, seed=0):
+    """Non-final 3x3 positions from random games, as (board, player) pairs."""
+    rng = random.Random(seed)
+    positions = []
+    for moves in _random_games(count, seed=seed):
+        model = GameModel()
+        for row, col in moves[:rng.randrange(len(moves))]:
+            model.make_move(row, col)
+        positions.append((model.board, model.current_player))
+    return positions
+
+
+@benchmark("model.make_move")
+def bench_make_move():
+    games = _random_games(2000)
+    model = GameModel()
+
+    def run():
+        for moves in games:
+            model.reset_game()
+            for row, col in moves:
+                model.make_move(row, col)
+    return run, sum(len(moves) for moves in games)
+
+
+@benchmark("model.check_winner")
+def bench_check_winner():
+    model = GameModel()
+    for row, col in [(0, 0), (1, 1), (0, 1), (2, 2), (1, 0)]:
+        model.make_move(row, col)
+    cells = [divmod(cell, 3) for cell in range(9)] * 1000
+
+    def run():
+        for row, col in cells:
+            model.check_winner(row, col)
+    return run, len(cells)
+
+
+@benchmark("model.make_unmake_15x15")
+def bench_make_unmake_large():
+    model = GameModel(15, 5)
+    rng = random.Random(0)
+    cells = []
+    for cell in rng.sample(range(225), 100):
+        model.make(cell)
+        cells.append(cell)
+        if model.game_over:
+            break
+    while model.move_stack:
+        model.unmake()
+
+    def run():
+        for _ in range(100):
+            for cell in cells:
+                model.make(cell)
+            while model.move_stack:
+                model.unmake()
+    return run, 100 * len(cells)
+
+
+def _bench_ai(difficulty):
+    positions = _sample_positions(500)
+    ai = GameAI(difficulty=difficulty, rng=random.Random(0))
+    for board, player in positions:
+        ai.get_move(board, player)  # Warm up caches and tables
+
+    def run():
+        for board, player in positions:
+            ai.get_move(board, player)
+    return run, len(positions)
+
+
+# MCTS is left out: it spends its whole think_time budget by design.
+for _difficulty in ("easy", "medium", "hard", "expert"):
+    benchmark(f"ai.get_move.{_difficulty}")(lambda difficulty=_difficulty: _bench_ai(difficulty))
+
+
+@benchmark("game.full_game.medium")
+def bench_full_game():
+    rng = random.Random(0)
+    model = GameModel()
+    ai = GameAI(difficulty="medium", rng=rng)
+    stats = GameStats(max_history=0)
+
+    def run():
+        for _ in range(500):
+            model.reset_game()
+            play_game(model, ai, ai, stats, rng)
+    return run, 500
+
+
+if BatchGameEngine is not None:
+    # Per game, like game.full_game.medium, so the two give the batch speedup
+    @benchmark("batch.full_game.medium")
+    def bench_batch_full_game():
+        engine = BatchGameEngine(100000, seed=0)
+        engine.play()  # Build the lookup tables
+
+        def run():
+            engine.reset()
+            engine.play()
+        return run, 100000
+
+
+def _large_stats():
+    stats = GameStats()
+    rng = random.Random(0)
+    for number in range(LARGE_HISTORY):
+        stats.record_move("X" if number % 2 == 0 else "O", rng.randrange(3), rng.randrange(3), number % 9 + 1)
+        if number % 9 == 8:
+            stats.record_game_result(winner="X")
+    return stats
+
+
+@benchmark("stats.record_move.large_history")
+def bench_record_move():
+    stats = _large_stats()
+
+    def run():
+        for number in range(10000):
+            stats.record_move("X", 1, 1, number)
+    return run, 10000
+
+
+@benchmark("stats.aggregates.large_history")
+def bench_stats_aggregates():
+    stats = _large_stats()
+
+    def run():
+        for _ in range(1000):
+            stats.get_move_frequency_by_position()
+            stats.get_average_moves_per_game()
+            stats.get_win_percentage("X")
+            stats.get_boom_percentage()
+    return run, 1000
+
+
+def run_benchmarks(repeats=5, selected=None):
+    """
+    Run the registered benchmarks.
+
+    Args:
+        repeats (int, optional): Timed runs per benchmark; the best is kept
+        selected (list, optional): Substrings; only matching metrics run
+
+    Returns:
+        dict: Maps metric name to microseconds per operation
+    """
+    results = {}
+    for name, setup in BENCHMARKS:
+        if selected and not any(part in name for part in selected):
+            continue
+        run, operations = setup()
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = best / operations * 1e6
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (dict): Metric name to microseconds per operation
+        baseline (dict): The same, from a stored run
+        threshold (float): Allowed slowdown as a fraction, e.g. 0.25
+
+    Returns:
+        list: Names of the metrics that regressed past the threshold
+    """
+    regressions = []
+    for name, value in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<36}{value:>12.3f}{'(new)':>12}")
+            continue
+        change = value / reference - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36}{value:>12.3f}{reference:>12.3f}{change * 100:>+9.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+
+    Returns:
+        int: 1 if --compare found a regression, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Tic Tac Boom engine.")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before --compare fails (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--only", nargs="*", help="run only metrics containing these substrings")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeats, args.only)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)["metrics"]
+        print(f"{'metric (us/op)':<36}{'current':>12}{'baseline':>12}{'change':>10}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold * 100:.0f}%")
+            status = 1
+    else:
+        print(f"{'metric (us/op)':<36}{'current':>12}")
+        for name, value in results.items():
+            print(f"{name:<36}{value:>12.3f}")
+
+    if args.save:
+        with open(args.save, "w") as handle:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "metrics": results,
+            }, handle, indent=2, sort_keys=True)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,131 @@
+# board_widget.py - Single painted widget showing the game grid
+from PyQt5.QtCore import QRect, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+# Preferred board width and height in pixels, and the smallest cell allowed.
+PREFERRED_SIZE = 380
+MIN_CELL_SIZE = 24
+
+
+class BoardWidget(QWidget):
+    """
+    Draws the whole board with QPainter instead of one button per cell.
+
+    Clicks are hit-tested to a cell and reported through ``cell_clicked``.
+    Setting a mark only repaints that cell's rectangle, so updates cost the
+    same on a 19x19 board as on a 3x3 one.
+    """
+
+    # Row, col
+    cell_clicked = pyqtSignal(int, int)
+
+    def __init__(self, size=3, parent=None):
+        """
+        Initialize an empty board.
+
+        Args:
+            size (int, optional): Board width and height in cells
+            parent (QWidget, optional): Qt parent
+        """
+        super().__init__(parent)
+        self.size = size
+        self._marks = [""] * (size * size)
+        self._grid_pen = QPen(QColor("#888888"), 2)
+        self._mark_font = QFont("Arial", 36, QFont.Bold)
+        self._origin_x = 0
+        self._origin_y = 0
+        self._cell = MIN_CELL_SIZE
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(size * MIN_CELL_SIZE, size * MIN_CELL_SIZE)
+
+    def sizeHint(self):
+        side = max(PREFERRED_SIZE, self.size * MIN_CELL_SIZE)
+        return QSize(side, side)
+
+    def set_mark(self, row, col, mark):
+        """
+        Show a mark in a cell and schedule a repaint of that cell only.
+
+        Args:
+            row (int): Row index
+            col (int): Column index
+            mark (str): "X", "O" or "" to clear the cell
+        """
+        cell = row * self.size + col
+        if self._marks[cell] != mark:
+            self._marks[cell] = mark
+            self.update(self._cell_rect(row, col))
+
+    def clear(self):
+        """Remove every mark."""
+        if any(self._marks):
+            self._marks = [""] * (self.size * self.size)
+            self.update()
+
+    def cell_at(self, x, y):
+        """
+        Find the cell under a point in widget coordinates.
+
+        Args:
+            x (int): Horizontal position
+            y (int): Vertical position
+
+        Returns:
+            tuple: (row, col), or None if the point is outside the grid
+        """
+        col = (x - self._origin_x) // self._cell
+        row = (y - self._origin_y) // self._cell
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return int(row), int(col)
+        return None
+
+    def resizeEvent(self, event):
+        """Fit a square grid into the widget and scale the mark font to it."""
+        self._cell = max(1, min(self.width(), self.height()) // self.size)
+        self._origin_x = (self.width() - self._cell * self.size) // 2
+        self._origin_y = (self.height() - self._cell * self.size) // 2
+        self._mark_font.setPixelSize(max(8, self._cell * 6 // 10))
+        super().resizeEvent(event)
+
+    def mousePressEvent(self, event):
+        """Report left clicks on a cell."""
+        if event.button() == Qt.LeftButton:
+            cell = self.cell_at(event.x(), event.y())
+            if cell is not None:
+                self.cell_clicked.emit(*cell)
+        super().mousePressEvent(event)
+
+    def paintEvent(self, event):
+        """Paint the cells that intersect the dirty region."""
+        dirty = event.rect()
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(dirty, self.palette().window())
+
+        # Only visit the rows and columns the dirty rectangle overlaps
+        first_row, first_col = self._clamped_cell(dirty.left(), dirty.top())
+        last_row, last_col = self._clamped_cell(dirty.right(), dirty.bottom())
+
+        mark_pen = QPen(self.palette().windowText().color())
+        painter.setFont(self._mark_font)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                rect = self._cell_rect(row, col)
+                painter.setPen(self._grid_pen)
+                painter.drawRect(rect.adjusted(1, 1, -1, -1))
+                mark = self._marks[row * self.size + col]
+                if mark:
+                    painter.setPen(mark_pen)
+                    painter.drawText(rect, Qt.AlignCenter, mark)
+        painter.end()
+
+    def _cell_rect(self, row, col):
+        return QRect(self._origin_x + col * self._cell, self._origin_y + row * self._cell,
+                     self._cell, self._cell)
+
+    def _clamped_cell(self, x, y):
+        last = self.size - 1
+        col = min(last, max(0, (x - self._origin_x) // self._cell))
+        row = min(last, max(0, (y - self._origin_y) // self._cell))
+        return int(row), int(col)
\ No newline at end of file
@@ -0,0 +1,115 @@
+# boom_widget.py - "BOOM!" overlay animated with a single property animation
+from PyQt5.QtCore import QEasingCurve, QEvent, QPointF, Qt, QVariantAnimation
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter, QPixmap
+from PyQt5.QtWidgets import QWidget
+
+BOOM_TEXT = "💥 BOOM! 💥"
+
+# The glyph is rendered once at this point size; smaller sizes are drawn by
+# scaling the pixmap down.
+MAX_POINT_SIZE = 96
+
+# Total time the overlay is shown, in milliseconds.
+DURATION_MS = 2000
+
+# (time in ms, point size) keyframes: grow to full size, settle back, hold.
+KEYFRAMES = ((0, 72), (100, 48), (200, 60), (300, 72), (400, 84), (500, 96),
+             (600, 84), (700, 72), (800, 60), (DURATION_MS, 60))
+
+
+class BoomOverlay(QWidget):
+    """
+    Transparent overlay that plays the boom animation over its parent.
+
+    The text is pre-rendered to a pixmap and scaled with a painter transform
+    on each frame, so the animation never rebuilds fonts or triggers a
+    relayout. One QVariantAnimation drives every frame; playing again while
+    running restarts it, and cancel() stops and hides it immediately.
+    """
+
+    def __init__(self, parent):
+        """
+        Create the overlay, hidden, covering the parent widget.
+
+        Args:
+            parent (QWidget): Widget the overlay is drawn over
+        """
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WA_NoSystemBackground)
+        self._glyph = self._render_glyph()
+        self._scale = 0.0
+
+        self._animation = QVariantAnimation(self)
+        self._animation.setDuration(DURATION_MS)
+        self._animation.setEasingCurve(QEasingCurve.Linear)
+        for time_ms, point_size in KEYFRAMES:
+            self._animation.setKeyValueAt(time_ms / DURATION_MS, point_size / MAX_POINT_SIZE)
+        self._animation.valueChanged.connect(self._set_scale)
+        self._animation.finished.connect(self.hide)
+
+        parent.installEventFilter(self)
+        self.setGeometry(parent.rect())
+        self.hide()
+
+    def play(self):
+        """Start the animation, restarting it if a boom is already showing."""
+        self._animation.stop()
+        self.setGeometry(self.parentWidget().rect())
+        self.show()
+        self.raise_()
+        self._animation.start()
+
+    def cancel(self):
+        """Stop the animation and hide the overlay."""
+        self._animation.stop()
+        self.hide()
+
+    def is_playing(self):
+        """
+        Report whether the animation is running.
+
+        Returns:
+            bool: True while the boom is being shown
+        """
+        return self._animation.state() == QVariantAnimation.Running
+
+    def eventFilter(self, watched, event):
+        """Keep covering the parent when it is resized."""
+        if watched is self.parentWidget() and event.type() == QEvent.Resize:
+            self.setGeometry(watched.rect())
+        return False
+
+    def paintEvent(self, event):
+        """Draw the pre-rendered glyph scaled about the overlay's center."""
+        if self._scale <= 0:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.translate(self.width() / 2, self.height() / 2)
+        painter.scale(self._scale, self._scale)
+        size = self._glyph.size() / self._glyph.devicePixelRatio()
+        painter.drawPixmap(QPointF(-size.width() / 2, -size.height() / 2), self._glyph)
+        painter.end()
+
+    def _set_scale(self, scale):
+        self._scale = scale
+        self.update()
+
+    def _render_glyph(self):
+        font = QFont("Arial", MAX_POINT_SIZE, QFont.Bold)
+        metrics = QFontMetrics(font)
+        ratio = self.devicePixelRatioF()
+        width = metrics.horizontalAdvance(BOOM_TEXT)
+        height = metrics.height()
+
+        pixmap = QPixmap(int(width * ratio), int(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setFont(font)
+        painter.setPen(QColor("red"))
+        painter.drawText(0, 0, width, height, Qt.AlignCenter, BOOM_TEXT)
+        painter.end()
+        return pixmap
\ No newline at end of file
@@ -0,0 +1,252 @@
+# cli.py - Terminal front end for Tic Tac Boom, no Qt required
+#
+#     python cli.py play --o hard          # you are X, the AI plays O
+#     python cli.py play --x expert --o medium --games 3
+#     python cli.py stats --db stats.db
+#     python cli.py play --archive games.ttbr
+#     python cli.py replay games.ttbr 12         # step through game 12
+#     python cli.py replay games.ttbr 100:120    # one line per game
+#     python cli.py openings games.ttbr 11 00    # what followed X center, O corner
+#
+import argparse
+import sys
+import time
+
+from game_openings import format_opening, load_openings, save_openings
+from game_replay import ReplayArchive, ReplayWriter
+from game_session import GameSession
+from game_stats import GameStats
+from game_store import GameStore
+
+
+def format_board(board):
+    """
+    Render a board as text with row and column numbers.
+
+    Args:
+        board (list): 2D list representing the game board
+
+    Returns:
+        str: The board, one line per row plus separators
+    """
+    width = len(str(len(board) - 1))
+    header = " " * (width + 1) + " ".join(f" {c:>{width}} " for c in range(len(board)))
+    separator = " " * (width + 1) + "+".join("-" * (width + 2) for _ in board)
+    lines = [header]
+    for r, row in enumerate(board):
+        if r:
+            lines.append(separator)
+        lines.append(f"{r:>{width}} " + "|".join(f" {mark or ' ':>{width}} " for mark in row))
+    return "\n".join(lines)
+
+
+def format_stats(stats):
+    """
+    Summarize statistics the way the game window's statistics box does.
+
+    Args:
+        stats (GameStats): The statistics to report
+
+    Returns:
+        str: One line per figure
+    """
+    return "\n".join([
+        f"Games Played: {stats.games_played}",
+        f"Player X Wins: {stats.x_wins} ({stats.get_win_percentage('X'):.1f}%)",
+        f"Player O Wins: {stats.o_wins} ({stats.get_win_percentage('O'):.1f}%)",
+        f"Draws: {stats.draws}",
+        f"Boom Occurrences: {stats.boom_occurrences} ({stats.get_boom_percentage():.1f}%)",
+        f"Average Moves Per Game: {stats.get_average_moves_per_game():.1f}",
+    ])
+
+
+def read_move(session, prompt=input):
+    """
+    Ask the human to move until they enter a valid "row col".
+
+    Args:
+        session (GameSession): The session being played
+        prompt (callable, optional): Reads a line of input
+
+    Returns:
+        tuple: (row, col) of a legal move
+    """
+    size = session.model.size
+    while True:
+        text = prompt(f"Player {session.model.current_player}, enter row and column: ")
+        try:
+            row, col = (int(part) for part in text.replace(",", " ").split())
+        except ValueError:
+            print("Please enter two numbers, e.g. 1 2")
+            continue
+        if 0 <= row < size and 0 <= col < size and session.model.board[row][col] == "":
+            return row, col
+        print("That square is not available.")
+
+
+def play(args):
+    """Play games in the terminal and print the statistics at the end."""
+    store = GameStore(args.db) if args.db else None
+    stats = store.load_stats(size=args.size) if store else GameStats(size=args.size)
+    if args.archive:
+        stats.openings = load_openings(args.archive, args.size, args.win_length)
+        stats.archive = ReplayWriter(args.archive, args.size, args.win_length)
+    session = GameSession(args.size, args.win_length, args.x, args.o, stats=stats)
+
+    try:
+        for game in range(args.games):
+            if game:
+                session.restart()
+            print(format_board(session.model.board))
+            while not session.model.game_over:
+                move = session.play_ai_move()
+                if move is None:
+                    session.play(*read_move(session))
+                else:
+                    print(f"AI {session.model.board[move[0]][move[1]]} plays {move[0]} {move[1]}")
+                print()
+                print(format_board(session.model.board))
+
+            if session.model.winner:
+                print(f"Player {session.model.winner} wins!")
+                if session.had_boom:
+                    print("💥 BOOM! 💥")
+            else:
+                print("It's a draw!")
+        session.restart()
+    except (EOFError, KeyboardInterrupt):
+        print()
+    finally:
+        if store:
+            store.close()
+        if stats.archive is not None:
+            stats.archive.close()
+            save_openings(stats.openings, args.archive)
+
+    print(format_stats(session.stats))
+    return 0
+
+
+def format_result(replay):
+    """
+    Describe how an archived game ended.
+
+    Args:
+        replay (Replay): The game
+
+    Returns:
+        str: E.g. "X wins (boom)" or "draw"
+    """
+    if replay.winner is None:
+        return "draw"
+    return f"{replay.winner} wins" + (" (boom)" if replay.had_boom else "")
+
+
+def show_replays(args):
+    """Step through one archived game, or list a range of them."""
+    with ReplayArchive(args.archive) as archive:
+        first, _, last = args.games.partition(":")
+        if not _:
+            replay = archive.get(int(first))
+            board = [[""] * archive.size for _ in range(archive.size)]
+            for number, (row, col) in enumerate(replay.moves):
+                board[row][col] = "XO"[number % 2]
+                print(f"Move {number + 1}: {board[row][col]} plays {row} {col}")
+                print(format_board(board))
+                print()
+            print(format_result(replay))
+            return 0
+
+        start = int(first) if first else 0
+        stop = int(last) if last else len(archive)
+        for number, replay in enumerate(archive.iter_range(start, stop), start):
+            moves = " ".join(f"{row}{col}" for row, col in replay.moves)
+            print(f"{number:>8}  {format_result(replay):<13} {moves}")
+    return 0
+
+
+def parse_cell(text):
+    """
+    Parse a move written as in replay listings, e.g. "12", or as "10,12".
+
+    Args:
+        text (str): The move
+
+    Returns:
+        tuple: (row, col)
+    """
+    row, _, col = text.partition(",") if "," in text else (text[0], "", text[1:])
+    return int(row), int(col)
+
+
+def show_openings(args):
+    """Print how archived games went after an opening and what was played next."""
+    started = time.perf_counter()
+    tree = load_openings(args.archive)
+    seconds = time.perf_counter() - started
+    moves = [parse_cell(move) for move in args.moves]
+    print(f"Opening tree of {tree.games} games loaded in {seconds:.2f}s")
+    if tree.max_depth is not None and len(moves) >= tree.max_depth:
+        print(f"The tree only covers the first {tree.max_depth} moves of each game")
+    print(f"After {' '.join(args.moves) or 'no moves'}: {format_opening(tree.lookup(moves))}")
+    for (row, col), stats in tree.continuations(moves):
+        print(f"  {row},{col}  {format_opening(stats)}")
+    return 0
+
+
+def show_stats(args):
+    """Print the statistics stored in a database."""
+    with GameStore(args.db) as store:
+        print(format_stats(store.load_stats(size=args.size)))
+    return 0
+
+
+def main(argv=None):
+    """
+    Command-line entry point.
+
+    Args:
+        argv (list, optional): Arguments without the program name
+
+    Returns:
+        int: Process exit status
+    """
+    parser = argparse.ArgumentParser(description="Play Tic Tac Boom in the terminal.")
+    commands = parser.add_subparsers(dest="command")
+
+    play_parser = commands.add_parser("play", help="play games (the default)")
+    play_parser.add_argument("--x", default=None, help="AI difficulty for X (default: human)")
+    play_parser.add_argument("--o", default=None, help="AI difficulty for O (default: human)")
+    play_parser.add_argument("--games", type=int, default=1, help="number of games to play")
+    play_parser.add_argument("--db", default=None, help="SQLite database to save results to")
+    play_parser.set_defaults(handler=play)
+
+    stats_parser = commands.add_parser("stats", help="print statistics from a database")
+    stats_parser.add_argument("--db", required=True, help="SQLite database to read")
+    stats_parser.set_defaults(handler=show_stats)
+
+    replay_parser = commands.add_parser("replay", help="show games from a replay archive")
+    replay_parser.add_argument("archive", help="replay archive to read")
+    replay_parser.add_argument("games", nargs="?", default=":",
+                               help="a game number, or START:STOP to list a range (default: all)")
+    replay_parser.set_defaults(handler=show_replays)
+
+    openings_parser = commands.add_parser("openings", help="explore openings in a replay archive")
+    openings_parser.add_argument("archive", help="replay archive to read")
+    openings_parser.add_argument("moves", nargs="*", help='opening moves in play order, e.g. "11 00"')
+    openings_parser.set_defaults(handler=show_openings)
+
+    for command in (play_parser, stats_parser):
+        command.add_argument("--size", type=int, default=3, help="board width and height")
+    play_parser.add_argument("--win-length", type=int, default=None, help="marks in a row needed to win")
+    play_parser.add_argument("--archive", default=None, help="replay archive to append games to")
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("play", "stats", "replay", "openings", "-h", "--help"):
+        argv.insert(0, "play")
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,5 +1,31 @@
 # game_ai.py - Simple AI opponent implementation (symbolic programming example)
 import random
+import time
+from collections import namedtuple
+
+import game_mcts
+import game_trace
+from game_model import GameModel, board_symmetries, default_win_length
+from game_search import NegamaxSearch, TranspositionTable, canonical_position, inverse_symmetries
+from perfect_play import DRAW, PerfectPlayTable
+
+# Plies the expert searches on boards too large to solve outright.
+LARGE_BOARD_SEARCH_DEPTH = 2
+
+# Largest board (in cells) the expert solves to the end of the game.
+FULL_SEARCH_MAX_CELLS = 16
+
+# Positions kept in the shared analysis cache.
+ANALYSIS_CACHE_SIZE = 100000
+
+Analysis = namedtuple("Analysis", ["move", "value", "threats"])
+Analysis.__doc__ = """Result of GameAI.analyze for one position.
+
+move is the best (row, col), or None if the game is over. value is 1, 0 or
+-1 for a win, draw or loss for the player to move, or None if a
+depth-limited search could not resolve it. threats maps "X" and "O" to the
+cells where that player would win at once.
+"""
 
 class GameAI:
     """
@@ -7,136 +33,324 @@ class GameAI:
     Demonstrates symbolic programming concepts.
     """
     
-    def __init__(self, difficulty="medium"):
+    # Transposition tables shared by every instance, keyed by (size, win_length),
+    # so positions searched in one game are table hits in the next.
+    _tables = {}
+    
+    # Memory-mapped perfect-play table, opened on first use (False if missing)
+    _perfect_play = None
+    
+    # LRU cache of analyze() results shared by every instance, created on first use
+    _analysis_cache = None
+    
+    def __init__(self, difficulty="medium", win_length=None, search_depth=None, rng=None,
+                 think_time=None, workers=None):
         """
         Initialize the AI with a specified difficulty level.
         
         Args:
-            difficulty (str): The difficulty level - "easy", "medium", or "hard"
+            difficulty (str): The difficulty level - "easy", "medium", "hard",
+                "expert" or "mcts"
+            win_length (int, optional): Marks in a row needed to win, defaults
+                to the GameModel default for the board size
+            search_depth (int, optional): Plies the expert searches; by default
+                small boards are solved outright and larger ones searched
+                LARGE_BOARD_SEARCH_DEPTH plies deep
+            rng (random.Random, optional): Source of randomness, defaults to
+                the shared random module; pass a seeded instance for
+                reproducible games
+            think_time (float, optional): Seconds a searching difficulty may
+                spend per move before it answers with its best move so far;
+                "mcts" always uses its whole budget, game_mcts.DEFAULT_THINK_TIME
+                if not given
+            workers (int, optional): Processes "mcts" searches with, defaults
+                to the CPU count
         """
         self.difficulty = difficulty
+        self.win_length = win_length
+        self.search_depth = search_depth
+        self.rng = rng or random
+        self.think_time = think_time
+        self.workers = workers
     
-    def get_move(self, board, player):
+    @classmethod
+    def transposition_table(cls, size, win_length):
+        """
+        Get the process-wide transposition table for a board layout.
+        
+        Args:
+            size (int): Board width and height
+            win_length (int): Marks in a row needed to win
+            
+        Returns:
+            TranspositionTable: The shared table, created on first use
+        """
+        key = (size, win_length)
+        table = cls._tables.get(key)
+        if table is None:
+            table = cls._tables[key] = TranspositionTable()
+        return table
+    
+    @classmethod
+    def analysis_cache(cls):
+        """
+        Get the process-wide cache behind analyze().
+        
+        Its ``hits`` and ``misses`` counters and ``len()`` report how well
+        repeated analyses are being served; ``clear()`` empties it.
+        
+        Returns:
+            TranspositionTable: The bounded LRU cache, keyed by canonical position
+        """
+        if cls._analysis_cache is None:
+            cls._analysis_cache = TranspositionTable(ANALYSIS_CACHE_SIZE)
+        return cls._analysis_cache
+    
+    def get_move(self, board, player, stop=None, model=None):
         """
         Determine the best move for the AI based on the current board state.
         
         Args:
-            board (list): 2D list representing the game board
+            board (list): 2D list representing the game board; may be None
+                when model is given
             player (str): The AI's player symbol ("X" or "O")
+            stop (threading.Event, optional): Lets another thread cut a
+                search short; the move returned is then the best found so far
+            model (GameModel, optional): The live model of the game, e.g. a
+                GameSession's. "easy", "medium" and "hard" answer from its
+                ThreatIndex, attached on first use and then kept up to date
+                by every move; without a model they build one from the board
             
         Returns:
             tuple: (row, col) coordinates for the AI's move
         """
-        # Easy difficulty: random move
-        if self.difficulty == "easy":
-            return self._get_random_move(board)
-        
-        # Medium difficulty: win if possible, block opponent, otherwise random
-        elif self.difficulty == "medium":
-            # Try to win
-            winning_move = self._find_winning_move(board, player)
-            if winning_move:
-                return winning_move
-                
-            # Try to block opponent
-            opponent = "O" if player == "X" else "X"
-            blocking_move = self._find_winning_move(board, opponent)
-            if blocking_move:
-                return blocking_move
-                
-            # Otherwise random
-            return self._get_random_move(board)
-        
-        # Hard difficulty: win if possible, block opponent, center, corners, then sides
-        elif self.difficulty == "hard":
-            # Try to win
-            winning_move = self._find_winning_move(board, player)
-            if winning_move:
-                return winning_move
-                
-            # Try to block opponent
-            opponent = "O" if player == "X" else "X"
-            blocking_move = self._find_winning_move(board, opponent)
-            if blocking_move:
-                return blocking_move
+        # Expert difficulty: alpha-beta search
+        if self.difficulty == "expert":
+            return self._get_expert_move(model.board if board is None else board, player, stop)
+        
+        # MCTS difficulty: time-budgeted tree search for large boards
+        if self.difficulty == "mcts":
+            think_time = game_mcts.DEFAULT_THINK_TIME if self.think_time is None else self.think_time
+            return game_mcts.best_move(model.board if board is None else board, player, self.win_length,
+                                       think_time, self.workers, self.rng, stop)
+        
+        # The rule-based difficulties answer from the threat index
+        if model is None:
+            model = GameModel.from_board(board, player, self.win_length)
+        return self._get_indexed_move(model, player)
+    
+    def analyze(self, boards, players=None):
+        """
+        Evaluate many positions at once.
+        
+        Every position gets the expert's answer whatever this AI's difficulty.
+        Results are cached by a symmetry-independent encoding of the
+        position, so repeated, rotated and mirrored positions are cache hits.
+        
+        Args:
+            boards (list): 2D board lists
+            players (list, optional): The player to move in each position,
+                by default X when both have as many marks, otherwise O
+            
+        Returns:
+            list: One Analysis per board
+        """
+        cache = self.analysis_cache()
+        results = []
+        for index, board in enumerate(boards):
+            player = players[index] if players is not None else _player_to_move(board)
+            model = GameModel.from_board(board, player, self.win_length)
+            encoding, symmetry = canonical_position(model)
+            # Shallower searches can leave a position unresolved, so their
+            # entries must not answer a deeper analyzer
+            key = (model.size, model.win_length, self._analysis_depth(model)) + encoding
             
-            # Take center if available
-            if board[1][1] == "":
-                return (1, 1)
-                
-            # Take corners if available
-            corners = [(0, 0), (0, 2), (2, 0), (2, 2)]
-            random.shuffle(corners)
-            for corner in corners:
-                r, c = corner
-                if board[r][c] == "":
-                    return corner
+            # Entries are kept in the canonical orientation
+            entry = cache.get(key)
+            if entry is None:
+                to_canonical = board_symmetries(model.size)[symmetry]
+                cell, value = self._solve(model)
+                entry = (None if cell is None else to_canonical[cell], value,
+                         tuple(tuple(to_canonical[c] for c in cells) for cells in _threat_cells(model)))
+                cache.store(key, entry)
             
-            # Take sides if available
-            sides = [(0, 1), (1, 0), (1, 2), (2, 1)]
-            random.shuffle(sides)
-            for side in sides:
-                r, c = side
-                if board[r][c] == "":
-                    return side
-        
-        # Fallback
-        return self._get_random_move(board)
+            to_board = inverse_symmetries(model.size)[symmetry]
+            cell, value, threats = entry
+            results.append(Analysis(
+                None if cell is None else divmod(to_board[cell], model.size),
+                value,
+                {mark: sorted(divmod(to_board[c], model.size) for c in cells)
+                 for mark, cells in zip(("X", "O"), threats)}
+            ))
+        return results
     
-    def _get_random_move(self, board):
+    def _solve(self, model):
         """
-        Choose a random empty cell on the board.
+        Find the best move and game-theoretic value of a position.
         
         Args:
-            board (list): 2D list representing the game board
+            model (GameModel): The position, left unchanged
+            
+        Returns:
+            tuple: (cell, value) as described for Analysis, cell None if the game is over
+        """
+        if model.game_over:
+            return None, -1 if model.winner else 0
+        
+        table = self.perfect_play_table()
+        if table is not None and (model.size, model.win_length) == (table.size, table.win_length):
+            entry = table.lookup(model.board, model.current_player)
+            if entry is not None:
+                row, col, value = entry
+                return row * model.size + col, value - DRAW
+        
+        depth = self._analysis_depth(model)
+        table = self.transposition_table(model.size, model.win_length)
+        cell, value = NegamaxSearch(model, table, depth).best_move()
+        if value:
+            return cell, 1 if value > 0 else -1
+        solved = depth is None or depth >= model.size * model.size - len(model.move_stack)
+        return cell, 0 if solved else None
+    
+    def _analysis_depth(self, model):
+        """
+        Get the depth _solve searches a position to.
+        
+        Args:
+            model (GameModel): The position
             
         Returns:
-            tuple: (row, col) coordinates for a random valid move
+            int: Plies to search, or None to search to the end of the game
+        """
+        if self.search_depth is None and model.size * model.size > FULL_SEARCH_MAX_CELLS:
+            return LARGE_BOARD_SEARCH_DEPTH
+        return self.search_depth
+    
+    @classmethod
+    def perfect_play_table(cls):
         """
-        empty_cells = []
-        for r in range(3):
-            for c in range(3):
-                if board[r][c] == "":
-                    empty_cells.append((r, c))
+        Get the process-wide perfect-play table.
         
-        if empty_cells:
-            return random.choice(empty_cells)
-        return None
+        Returns:
+            PerfectPlayTable: The memory-mapped table, or None if the file
+            is missing or unreadable
+        """
+        if cls._perfect_play is None:
+            try:
+                cls._perfect_play = PerfectPlayTable()
+            except (OSError, ValueError):
+                cls._perfect_play = False
+        return cls._perfect_play or None
     
-    def _find_winning_move(self, board, player):
+    def _get_expert_move(self, board, player, stop=None):
         """
-        Find a move that would result in a win for the specified player.
+        Choose the best move from the perfect-play table, or by negamax
+        search with alpha-beta pruning for positions it does not cover.
         
         Args:
             board (list): 2D list representing the game board
-            player (str): The player symbol to check winning moves for
+            player (str): The AI's player symbol ("X" or "O")
+            stop (threading.Event, optional): Ends the search early when set
             
         Returns:
-            tuple: (row, col) coordinates for a winning move, or None if no winning move exists
-        """
-        # Check rows
-        for r in range(3):
-            if board[r].count(player) == 2 and "" in board[r]:
-                c = board[r].index("")
-                return (r, c)
-        
-        # Check columns
-        for c in range(3):
-            column = [board[r][c] for r in range(3)]
-            if column.count(player) == 2 and "" in column:
-                r = column.index("")
-                return (r, c)
-        
-        # Check main diagonal
-        diagonal = [board[i][i] for i in range(3)]
-        if diagonal.count(player) == 2 and "" in diagonal:
-            i = diagonal.index("")
-            return (i, i)
-        
-        # Check other diagonal
-        diagonal = [board[i][2-i] for i in range(3)]
-        if diagonal.count(player) == 2 and "" in diagonal:
-            i = diagonal.index("")
-            return (i, 2-i)
-        
-        return None
\ No newline at end of file
+            tuple: (row, col) coordinates for the best move
+        """
+        table = self.perfect_play_table()
+        if (table is not None and len(board) == table.size
+                and (self.win_length or default_win_length(table.size)) == table.win_length):
+            entry = table.lookup(board, player)
+            if entry is not None:
+                return entry[0], entry[1]
+        
+        model = GameModel.from_board(board, player, self.win_length)
+        depth = self.search_depth
+        if depth is None and model.size * model.size > FULL_SEARCH_MAX_CELLS:
+            depth = LARGE_BOARD_SEARCH_DEPTH
+        
+        deadline = None if self.think_time is None else time.monotonic() + self.think_time
+        table = self.transposition_table(model.size, model.win_length)
+        search = NegamaxSearch(model, table, depth, deadline, stop)
+        cell, _ = search.best_move()
+        game_trace.count("ai.positions", search.nodes)
+        if cell is None:
+            cell = model.track_threats().random_cell(self.rng)
+        return None if cell is None else divmod(cell, model.size)
+    
+    def _get_indexed_move(self, model, player):
+        """
+        Play the easy, medium or hard strategy from a model's ThreatIndex.
+        
+        Easy plays a random empty cell. Medium wins if it can, otherwise
+        blocks the opponent's win, otherwise plays at random. Hard also makes
+        a fork, or takes the opponent's fork cell, before the center, the
+        corners and finally a random cell near the marks already played.
+        
+        Args:
+            model (GameModel): The position, with the AI to move
+            player (str): The AI's player symbol ("X" or "O")
+            
+        Returns:
+            tuple: (row, col) coordinates for the AI's move, or None if the board is full
+        """
+        threats = model.track_threats()
+        side = 0 if player == "X" else 1
+        cell = None
+        
+        # Win if possible, otherwise block opponent
+        if self.difficulty in ("medium", "hard"):
+            cell = threats.winning_cell(side)
+            if cell is None:
+                cell = threats.winning_cell(1 - side)
+        
+        if self.difficulty == "hard":
+            # Threaten two wins at once, otherwise stop the opponent doing so
+            if cell is None:
+                forks = threats.fork_cells(side) or threats.fork_cells(1 - side)
+                if forks:
+                    cell = forks[0]
+            
+            # Then center, then corners
+            if cell is None:
+                occupied = model.masks[0] | model.masks[1]
+                size = model.size
+                center = (size // 2) * size + size // 2
+                if not occupied >> center & 1:
+                    cell = center
+                else:
+                    last = size - 1
+                    corners = [0, last, last * size, last * size + last]
+                    self.rng.shuffle(corners)
+                    cell = next((corner for corner in corners if not occupied >> corner & 1), None)
+            
+            # Then near the marks already played (only the sides on 3x3)
+            if cell is None:
+                cell = threats.candidate_cell(self.rng)
+        
+        # Otherwise random
+        if cell is None:
+            cell = threats.random_cell(self.rng)
+        return None if cell is None else divmod(cell, model.size)
+
+
+def _player_to_move(board):
+    """X moves first, so X is to move whenever both players have as many marks."""
+    marks = [mark for row in board for mark in row]
+    return "X" if marks.count("X") == marks.count("O") else "O"
+
+
+def _threat_cells(model):
+    """
+    List the empty cells that would complete a line for each player.
+    
+    Reads them from the model's ThreatIndex, attaching one if needed; do it
+    after searching the model, which would otherwise update the index on
+    every make and unmake.
+    
+    Args:
+        model (GameModel): The position
+        
+    Returns:
+        tuple: (X cells, O cells), each a tuple of cell indices
+    """
+    threats = model.track_threats()
+    return tuple(tuple(threats.winning_cells(side)) for side in range(2))
@@ -0,0 +1,359 @@
+# game_analytics.py - Vectorized reports over recorded games
+#
+# Requires NumPy, which the rest of the game does not need.
+#
+#     python game_analytics.py games.ttbr --plies 2
+#     python game_analytics.py --db stats.db --size 3
+#
+# Games are loaded once into arrays, one row per game; every report is then
+# a handful of whole-array operations (bincount, unique, boolean masks), so
+# tens of millions of games take well under a second per report.
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from game_batch import EMPTY, O, X
+from game_replay import HEADER, ReplayArchive, move_bits
+from game_store import GameStore
+
+# Games decoded from a replay archive per step, bounding the temporary arrays.
+DECODE_CHUNK = 1 << 20
+
+# Opening keys below this are counted directly with bincount instead of
+# sorting them with unique.
+DENSE_KEYS = 1 << 22
+
+
+class GameArrays:
+    """
+    Recorded games as NumPy arrays.
+
+    ``moves`` is an (n, plies) int16 array of cell indices in play order,
+    -1 after the end of each game, the same layout as BatchGameEngine.moves.
+    ``lengths`` (int16), ``winners`` (int8: EMPTY, X or O) and ``booms``
+    (bool) have one entry per game. ``x_difficulty`` and ``o_difficulty``
+    are int16 codes into the ``difficulties`` tuple of names, where
+    game_store.HUMAN ("") is a person and None means not recorded.
+    """
+
+    def __init__(self, size, moves, winners, booms, x_difficulty=None, o_difficulty=None,
+                 difficulties=(None,)):
+        """
+        Wrap arrays of games.
+
+        Args:
+            size (int): Board width and height
+            moves (numpy.ndarray): (n, plies) cell indices, -1 past each game's end
+            winners (numpy.ndarray): (n,) EMPTY, X or O
+            booms (numpy.ndarray): (n,) whether each game had a boom
+            x_difficulty (numpy.ndarray, optional): (n,) codes into difficulties,
+                all 0 by default
+            o_difficulty (numpy.ndarray, optional): Same for O
+            difficulties (tuple, optional): Difficulty name of each code
+        """
+        self.size = size
+        self.cells = size * size
+        self.moves = moves
+        self.lengths = np.count_nonzero(moves >= 0, axis=1).astype(np.int16)
+        self.winners = winners
+        self.booms = booms
+        zeros = np.zeros(len(winners), dtype=np.int16)
+        self.x_difficulty = zeros if x_difficulty is None else x_difficulty
+        self.o_difficulty = zeros if o_difficulty is None else o_difficulty
+        self.difficulties = tuple(difficulties)
+
+    def __len__(self):
+        return len(self.winners)
+
+    @classmethod
+    def from_store(cls, store, size=3):
+        """
+        Load every game in a database.
+
+        Args:
+            store (GameStore): The database
+            size (int, optional): Board width and height of its games
+
+        Returns:
+            GameArrays: The games, in id order
+        """
+        games = np.fromiter(store.export_games(), count=store.count("games"), dtype=[
+            ("id", np.int64), ("winner", np.int8), ("boom", np.bool_), ("length", np.int16),
+            ("x", "U32"), ("o", "U32"), ("played_at", np.float64)])
+        rows = np.fromiter(store.export_moves(size), count=store.count("moves"), dtype=[
+            ("game", np.int64), ("ply", np.int16), ("cell", np.int16)])
+
+        plies = int(games["length"].max()) if len(games) else 0
+        moves = np.full((len(games), plies), -1, dtype=np.int16)
+        moves[np.searchsorted(games["id"], rows["game"]), rows["ply"] - 1] = rows["cell"]
+
+        names, codes = np.unique(np.concatenate([games["x"], games["o"]]), return_inverse=True)
+        codes = codes.astype(np.int16)
+        return cls(size, moves, games["winner"], games["boom"], codes[:len(games)], codes[len(games):],
+                   [str(name) for name in names])
+
+    @classmethod
+    def from_archive(cls, archive, start=0, stop=None):
+        """
+        Decode games from a replay archive without a Python loop per game.
+
+        Args:
+            archive (ReplayArchive): The archive
+            start (int, optional): First game number
+            stop (int, optional): Game number to stop before, defaults to the end
+
+        Returns:
+            GameArrays: The games; the archive does not record difficulties
+        """
+        data, offsets = archive.raw()
+        ends = np.frombuffer(offsets, dtype=np.uint64).astype(np.int64)
+        stop = len(ends) if stop is None else min(stop, len(ends))
+        # Zero padding lets every move read three bytes without bounds checks
+        data = np.concatenate([np.frombuffer(data, dtype=np.uint8), np.zeros(3, dtype=np.uint8)])
+
+        chunks = []
+        for first in range(start, stop, DECODE_CHUNK):
+            last = min(first + DECODE_CHUNK, stop)
+            begins = ends[first - 1:last - 1] if first else np.concatenate([[HEADER.size], ends[:last - 1]])
+            chunks.append(_decode(data, begins, archive.size))
+
+        plies = max((chunk[0].shape[1] for chunk in chunks), default=0)
+        moves = np.full((stop - start if chunks else 0, plies), -1, dtype=np.int16)
+        row = 0
+        for chunk_moves, _, _ in chunks:
+            moves[row:row + len(chunk_moves), :chunk_moves.shape[1]] = chunk_moves
+            row += len(chunk_moves)
+        winners = np.concatenate([chunk[1] for chunk in chunks]) if chunks else np.zeros(0, np.int8)
+        booms = np.concatenate([chunk[2] for chunk in chunks]) if chunks else np.zeros(0, bool)
+        return cls(archive.size, moves, winners, booms)
+
+    def heatmaps(self, plies=None):
+        """
+        Count how often each cell was played at each ply.
+
+        Args:
+            plies (int, optional): Plies to report, by default all of them
+
+        Returns:
+            numpy.ndarray: (plies, size, size) move counts; index 0 is the opening move
+        """
+        moves = self.moves if plies is None else self.moves[:, :plies]
+        plies = moves.shape[1]
+        # Shift by one so the -1 padding lands in a column of its own, dropped below
+        keys = moves + (np.arange(plies, dtype=np.int64) * (self.cells + 1) + 1)
+        counts = np.bincount(keys.ravel(), minlength=plies * (self.cells + 1))
+        return counts.reshape(plies, self.cells + 1)[:, 1:].reshape(plies, self.size, self.size)
+
+    def win_rate_after(self, opening):
+        """
+        Report the results of the games that started with an opening.
+
+        Args:
+            opening (list): (row, col) moves in play order, X first
+
+        Returns:
+            dict: 'games' and the 'x_win', 'o_win' and 'draw' percentages
+        """
+        cells = np.array([row * self.size + col for row, col in opening], dtype=np.int16)
+        if len(cells) > self.moves.shape[1]:
+            return _rates(np.zeros(0, dtype=np.int8))
+        matches = np.all(self.moves[:, :len(cells)] == cells, axis=1)
+        return _rates(self.winners[matches])
+
+    def opening_win_rates(self, plies):
+        """
+        Report the results of every opening of a given length.
+
+        Args:
+            plies (int): Moves in each opening
+
+        Returns:
+            dict: Maps each opening, a tuple of (row, col) moves, to 'games'
+                and the 'x_win', 'o_win' and 'draw' percentages
+        """
+        if self.cells ** plies >= 2 ** 63:
+            raise ValueError(f"openings of {plies} moves do not fit in a 64-bit key")
+        long_enough = self.lengths >= plies
+        openings = self.moves[long_enough, :plies].astype(np.int64)
+        keys = openings @ (self.cells ** np.arange(plies - 1, -1, -1, dtype=np.int64))
+        if self.cells ** plies > DENSE_KEYS:
+            # Too many possible openings to count them all: number the ones played
+            unique, keys = np.unique(keys, return_inverse=True)
+        else:
+            unique = None
+        winners = self.winners[long_enough]
+        games = np.bincount(keys)
+        x_wins = np.bincount(keys, weights=winners == X, minlength=len(games))
+        o_wins = np.bincount(keys, weights=winners == O, minlength=len(games))
+
+        report = {}
+        for index in np.flatnonzero(games).tolist():
+            key = index if unique is None else int(unique[index])
+            cells = []
+            for _ in range(plies):
+                key, cell = divmod(key, self.cells)
+                cells.append(divmod(cell, self.size))
+            report[tuple(reversed(cells))] = _percentages(int(games[index]), x_wins[index], o_wins[index])
+        return report
+
+    def average_length_by_difficulty(self):
+        """
+        Average the number of moves per game for each pairing of difficulties.
+
+        Returns:
+            dict: Maps (x_difficulty, o_difficulty) to the average move count
+        """
+        games, total = self._by_pairing(self.lengths)
+        return {pairing: float(total[code] / games[code]) for pairing, code in self._pairings(games)}
+
+    def boom_rates(self):
+        """
+        Break the boom percentage down by winner, pairing of difficulties and game length.
+
+        Returns:
+            dict: 'winner', 'difficulty' and 'length' reports, each mapping a
+                label ("X"/"O"/None, a difficulty pairing, a move count) to
+                'games' and the 'boom' percentage
+        """
+        report = {}
+        games = np.bincount(self.winners, minlength=3)
+        booms = np.bincount(self.winners, weights=self.booms, minlength=3)
+        report["winner"] = {label: _boom(games[code], booms[code])
+                            for label, code in (("X", X), ("O", O), (None, EMPTY)) if games[code]}
+
+        games, booms = self._by_pairing(self.booms)
+        report["difficulty"] = {pairing: _boom(games[code], booms[code])
+                                for pairing, code in self._pairings(games)}
+
+        games = np.bincount(self.lengths)
+        booms = np.bincount(self.lengths, weights=self.booms)
+        report["length"] = {length: _boom(games[length], booms[length]) for length in np.flatnonzero(games).tolist()}
+        return report
+
+    def _by_pairing(self, values):
+        """Count the games and sum values per (x, o) difficulty pairing code."""
+        codes = self.x_difficulty.astype(np.int64) * len(self.difficulties) + self.o_difficulty
+        pairings = len(self.difficulties) ** 2
+        return (np.bincount(codes, minlength=pairings),
+                np.bincount(codes, weights=values, minlength=pairings))
+
+    def _pairings(self, games):
+        """Yield ((x_name, o_name), code) for each pairing that has games."""
+        for code in np.flatnonzero(games).tolist():
+            x_code, o_code = divmod(code, len(self.difficulties))
+            yield (self.difficulties[x_code], self.difficulties[o_code]), code
+
+
+def _decode(data, begins, size):
+    """
+    Decode consecutive archive records starting at the given offsets.
+
+    Args:
+        data (numpy.ndarray): The data file as uint8, zero padded by 3 bytes
+        begins (numpy.ndarray): Offset of each record
+        size (int): Board width and height
+
+    Returns:
+        tuple: (moves, winners, booms) arrays for these games
+    """
+    # Varint header: a byte at a time for every record at once
+    head = np.zeros(len(begins), dtype=np.int64)
+    position = begins.copy()
+    more = np.ones(len(begins), dtype=bool)
+    shift = 0
+    while more.any():
+        byte = data[position].astype(np.int64)
+        head |= np.where(more, (byte & 0x7F) << shift, 0)
+        position += more
+        more &= byte >= 0x80
+        shift += 7
+
+    counts = head >> 3
+    bits = move_bits(size)
+    plies = int(counts.max()) if len(counts) else 0
+    bit_position = position[:, None] * 8 + np.arange(plies, dtype=np.int64) * bits
+    byte = np.minimum(bit_position >> 3, len(data) - 3)
+    window = (data[byte].astype(np.int64) | data[byte + 1].astype(np.int64) << 8
+              | data[byte + 2].astype(np.int64) << 16)
+    moves = (window >> (bit_position & 7) & ((1 << bits) - 1)).astype(np.int16)
+    moves[np.arange(plies) >= counts[:, None]] = -1
+    return moves, (head & 0x03).astype(np.int8), (head & 0x04).astype(bool)
+
+
+def _rates(winners):
+    """Turn an array of winners into the percentage report."""
+    return _percentages(len(winners), np.count_nonzero(winners == X), np.count_nonzero(winners == O))
+
+
+def _percentages(games, x_wins, o_wins):
+    """Build a report in the same shape as GameStore.win_rate_by_difficulty."""
+    if not games:
+        return {'games': 0, 'x_win': 0.0, 'o_win': 0.0, 'draw': 0.0}
+    return {
+        'games': games,
+        'x_win': float(x_wins / games * 100),
+        'o_win': float(o_wins / games * 100),
+        'draw': float((games - x_wins - o_wins) / games * 100),
+    }
+
+
+def _boom(games, booms):
+    """Build a boom report entry."""
+    return {'games': int(games), 'boom': float(booms / games * 100)}
+
+
+def _label(difficulty):
+    """Name a difficulty for display."""
+    if difficulty is None:
+        return "unrecorded"
+    return difficulty or "human"
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Report on recorded Tic Tac Boom games.")
+    parser.add_argument("archive", nargs="?", help="replay archive to read")
+    parser.add_argument("--db", default=None, help="SQLite database to read instead")
+    parser.add_argument("--size", type=int, default=3, help="board size of the database's games")
+    parser.add_argument("--plies", type=int, default=1, help="opening length for the win rates")
+    args = parser.parse_args(argv)
+    if (args.archive is None) == (args.db is None):
+        parser.error("give either a replay archive or --db")
+
+    start = time.perf_counter()
+    if args.db:
+        with GameStore(args.db) as store:
+            games = GameArrays.from_store(store, args.size)
+    else:
+        with ReplayArchive(args.archive) as archive:
+            games = GameArrays.from_archive(archive)
+    print(f"Loaded {len(games)} games in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    heatmaps = games.heatmaps()
+    openings = games.opening_win_rates(args.plies)
+    lengths = games.average_length_by_difficulty()
+    booms = games.boom_rates()
+    elapsed = time.perf_counter() - start
+
+    for ply, heatmap in enumerate(heatmaps[:3], 1):
+        print(f"Ply {ply} heatmap:")
+        for row in heatmap:
+            print("  " + " ".join(f"{count:>9}" for count in row))
+    print(f"Openings of {args.plies} moves, most played first:")
+    for opening, report in sorted(openings.items(), key=lambda item: -item[1]['games'])[:10]:
+        moves = " ".join(f"{row}{col}" for row, col in opening)
+        print(f"  {moves:<12} {report['games']:>9} games  X {report['x_win']:5.1f}%  "
+              f"draw {report['draw']:5.1f}%  O {report['o_win']:5.1f}%")
+    for (x_difficulty, o_difficulty), average in lengths.items():
+        print(f"Average length, X {_label(x_difficulty)} vs O {_label(o_difficulty)}: {average:.2f}")
+    for winner, report in booms["winner"].items():
+        print(f"Boom rate when {winner or 'nobody'} wins: {report['boom']:.1f}% of {report['games']} games")
+    print(f"Reports computed in {elapsed:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+# game_batch.py - NumPy engine advancing many games at once
+#
+# Requires NumPy, which the rest of the game does not need.
+import numpy as np
+
+from game_model import BOOM_CHANCE, board_geometry, cell_neighbours
+from game_stats import GameStats
+
+# Cell values in the board array; X and O are 1 + their index in PLAYERS.
+EMPTY, X, O = 0, 1, 2
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Boards with at most this many cells (3x3) get per-position lookup tables,
+# one row for each of the 3 ** cells positions.
+TABLE_MAX_CELLS = 9
+
+# Lookup tables by (size, win_length), built on first use.
+_TABLES = {}
+
+
+class BatchGameEngine:
+    """
+    Plays many games in lockstep, one ply for every game per step.
+
+    Boards are held as an (N, cells) int8 array, so rules and AI policies
+    are applied to the whole batch with array operations instead of a
+    Python loop over GameModel objects. Since every game starts with X and
+    finished games are simply masked out, all running games share the same
+    player to move at each ply.
+
+    The policies mirror GameAI's "easy", "medium" and "hard" difficulties.
+    On boards of up to TABLE_MAX_CELLS cells every position's winning
+    cells, empty cells, corners and result are precomputed once, so a ply
+    costs each game a few table lookups instead of scanning its lines.
+    """
+
+    def __init__(self, games, size=3, win_length=None, seed=None):
+        """
+        Set up a batch of empty boards.
+
+        Args:
+            games (int): Number of games played in parallel
+            size (int, optional): Board width and height
+            win_length (int, optional): Marks in a row needed to win
+            seed (int, optional): Seed for the policies and the boom roll
+        """
+        geometry = board_geometry(size, win_length)
+        self.size = size
+        self.win_length = geometry.win_length
+        self.cells = size * size
+        self.rng = np.random.default_rng(seed)
+
+        # (lines, k) cell indices and the (cells, lines) 0/1 incidence matrix
+        self.line_cells = np.array(geometry.line_cells, dtype=np.intp)
+        self.line_matrix = np.zeros((self.cells, len(geometry.line_cells)), dtype=np.int8)
+        for line, cells in enumerate(geometry.line_cells):
+            self.line_matrix[list(cells), line] = 1
+
+        # (cells, cells) 0/1 matrix of the cells near each cell, for hard's last resort
+        self.near_matrix = np.zeros((self.cells, self.cells), dtype=np.int8)
+        for cell, neighbours in enumerate(cell_neighbours(size)):
+            self.near_matrix[cell, list(neighbours)] = 1
+
+        last = size - 1
+        self.center = (size // 2) * size + size // 2
+        self.corners = np.array(sorted({0, last, last * size, last * size + last}), dtype=np.intp)
+
+        self.tables = self._tables() if self.cells <= TABLE_MAX_CELLS else None
+
+        self.boards = np.zeros((games, self.cells), dtype=np.int8)
+        self.moves = np.full((games, self.cells), -1, dtype=np.int16)
+        self.winners = np.zeros(games, dtype=np.int8)
+        self.active = np.ones(games, dtype=bool)
+        self.ply = 0
+
+    def reset(self):
+        """Clear every board for a new batch of games."""
+        self.boards.fill(EMPTY)
+        self.moves.fill(-1)
+        self.winners.fill(EMPTY)
+        self.active.fill(True)
+        self.ply = 0
+
+    @property
+    def current_player(self):
+        """int: X or O, the player to move in every running game."""
+        return X if self.ply % 2 == 0 else O
+
+    def step(self, difficulty):
+        """
+        Advance every running game by one ply.
+
+        Args:
+            difficulty (str): Policy for the player to move - "easy",
+                "medium" or "hard"
+
+        Returns:
+            int: Number of games still running
+        """
+        rows = np.flatnonzero(self.active)
+        if rows.size == 0:
+            return 0
+
+        if self.tables is not None:
+            self._table_step(rows, self.boards[rows] @ self.tables["powers"], difficulty)
+            return int(np.count_nonzero(self.active))
+
+        player = self.current_player
+        boards = self.boards[rows]
+        cells = self._choose_moves(boards, player, difficulty)
+        boards[np.arange(rows.size), cells] = player
+        self.boards[rows] = boards
+        self.moves[rows, self.ply] = cells
+        self.ply += 1
+
+        # One matrix product counts the mover's marks in every winning line
+        counts = (boards == player).astype(np.int8) @ self.line_matrix
+        won = (counts == self.win_length).any(axis=1)
+        self.winners[rows[won]] = player
+        self.active[rows[won]] = False
+        if self.ply == self.cells:
+            self.active[rows] = False
+
+        return int(np.count_nonzero(self.active))
+
+    def play(self, x_difficulty="medium", o_difficulty="medium"):
+        """
+        Play every game in the batch to the end.
+
+        Args:
+            x_difficulty (str, optional): Policy for X
+            o_difficulty (str, optional): Policy for O
+
+        Returns:
+            numpy.ndarray: Winner of each game (X, O, or EMPTY for a draw)
+        """
+        if self.tables is None:
+            while self.step(x_difficulty if self.current_player == X else o_difficulty):
+                pass
+            return self.winners
+
+        # Carry the running games' positions from ply to ply instead of
+        # reading them back from the boards
+        rows = np.flatnonzero(self.active)
+        positions = self.boards[rows] @ self.tables["powers"]
+        while rows.size:
+            rows, positions = self._table_step(
+                rows, positions, x_difficulty if self.current_player == X else o_difficulty)
+        return self.winners
+
+    def to_stats(self, stats=None):
+        """
+        Record the finished games' results, rolling the boom chance for wins.
+
+        Only the counters are filled in; the moves themselves stay in the
+        ``moves`` array.
+
+        Args:
+            stats (GameStats, optional): Statistics to add to
+
+        Returns:
+            GameStats: The statistics the results were added to
+        """
+        if stats is None:
+            stats = GameStats(size=self.size)
+
+        finished = ~self.active
+        winners = self.winners[finished]
+        wins = winners != EMPTY
+        booms = wins & (self.rng.random(winners.size) < BOOM_CHANCE)
+
+        x_wins = int(np.count_nonzero(winners == X))
+        o_wins = int(np.count_nonzero(winners == O))
+        moves = self.moves[finished]
+        cell_counts = np.bincount(moves[moves >= 0], minlength=self.cells)
+        stats.add_totals(
+            x_wins=x_wins,
+            o_wins=o_wins,
+            draws=int(winners.size) - x_wins - o_wins,
+            boom_occurrences=int(np.count_nonzero(booms)),
+            player_moves={
+                "X": int(np.count_nonzero(moves[:, 0::2] >= 0)),
+                "O": int(np.count_nonzero(moves[:, 1::2] >= 0)),
+            },
+            position_counts={divmod(cell, self.size): int(count) for cell, count in enumerate(cell_counts)},
+        )
+        return stats
+
+    def _choose_moves(self, boards, player, difficulty):
+        """
+        Pick one move per board with the given policy.
+
+        Args:
+            boards (numpy.ndarray): (n, cells) boards of the running games
+            player (int): X or O
+            difficulty (str): "easy", "medium" or "hard"
+
+        Returns:
+            numpy.ndarray: (n,) chosen cell per board
+        """
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"unknown difficulty for batch play: {difficulty!r}")
+
+        empty = boards == EMPTY
+        moves = self._random_moves(empty)
+        if difficulty == "easy":
+            return moves
+
+        opponent = O if player == X else X
+        if difficulty == "hard":
+            # Lowest priority first, so later rules overwrite earlier ones
+            near = ((~empty).astype(np.int8) @ self.near_matrix > 0) & empty
+            moves = np.where(near.any(axis=1), self._random_moves(near), moves)
+            corner_free = empty[:, self.corners]
+            corner_scores = np.where(corner_free, self.rng.random(corner_free.shape), -1.0)
+            has_corner = corner_free.any(axis=1)
+            moves = np.where(has_corner, self.corners[corner_scores.argmax(axis=1)], moves)
+            moves = np.where(empty[:, self.center], self.center, moves)
+            for side in (opponent, player):
+                has_fork, fork = self._fork_moves(boards, side)
+                moves = np.where(has_fork, fork, moves)
+
+        has_block, block = self._winning_moves(boards, opponent)
+        moves = np.where(has_block, block, moves)
+        has_win, win = self._winning_moves(boards, player)
+        return np.where(has_win, win, moves)
+
+    def _table_step(self, rows, positions, difficulty):
+        """
+        Advance running games by one ply using the lookup tables.
+
+        Args:
+            rows (numpy.ndarray): Indices of the running games
+            positions (numpy.ndarray): Their base-3 position numbers
+            difficulty (str): Policy for the player to move
+
+        Returns:
+            tuple: (rows, positions) of the games still running
+        """
+        player = self.current_player
+        cells = self._choose_table_moves(positions, player, difficulty)
+        self.boards[rows, cells] = player
+        self.moves[rows, self.ply] = cells
+        self.ply += 1
+
+        positions = positions + player * self.tables["powers"][cells]
+        won = self.tables["won"][player][positions]
+        self.winners[rows[won]] = player
+        if self.ply == self.cells:
+            self.active[rows] = False
+            return rows[:0], positions[:0]
+        self.active[rows[won]] = False
+        running = ~won
+        return rows[running], positions[running]
+
+    def _choose_table_moves(self, positions, player, difficulty):
+        """
+        Pick one move per position with the given policy, from the lookup tables.
+
+        Args:
+            positions (numpy.ndarray): (n,) base-3 position numbers of the running games
+            player (int): X or O
+            difficulty (str): "easy", "medium" or "hard"
+
+        Returns:
+            numpy.ndarray: (n,) chosen cell per game
+        """
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"unknown difficulty for batch play: {difficulty!r}")
+
+        tables = self.tables
+        count = tables["empty_count"][positions]
+        pick = (self.rng.random(positions.size) * count).astype(np.intp)
+        moves = tables["empty_cells"].ravel()[positions * self.cells + pick]
+        if difficulty == "easy":
+            return moves
+
+        opponent = O if player == X else X
+        if difficulty == "hard":
+            # Once the center and corners are taken every empty cell is near a
+            # mark, so the random move above already stands for the last resort
+            count = tables["corner_count"][positions]
+            pick = (self.rng.random(positions.size) * count).astype(np.intp)
+            corners = tables["corner_cells"][positions, np.minimum(pick, len(self.corners) - 1)]
+            moves = np.where(count > 0, corners, moves)
+            moves = np.where(tables["center_free"][positions], self.center, moves)
+            for side in (opponent, player):
+                fork = tables["fork_cell"][side][positions]
+                moves = np.where(fork >= 0, fork, moves)
+
+        block = tables["win_cell"][opponent][positions]
+        moves = np.where(block >= 0, block, moves)
+        win = tables["win_cell"][player][positions]
+        return np.where(win >= 0, win, moves)
+
+    def _tables(self):
+        """
+        Get (building once per board) the per-position lookup tables.
+
+        Positions are numbered in base 3 with cell c as digit c, as in
+        perfect_play.position_rank. Winning cells come from _winning_moves
+        run over every position, so they follow the same GameAI line order.
+
+        Returns:
+            dict: powers (cells,), win_cell and fork_cell ((3, P) cell or
+                -1 per player), won ((3, P) whether the player has a line), empty_cells
+                (P, cells) with empty_count (P,), corner_cells and
+                corner_count likewise, and center_free (P,)
+        """
+        key = (self.size, self.win_length)
+        if key not in _TABLES:
+            powers = 3 ** np.arange(self.cells, dtype=np.int32)
+            positions = np.arange(3 ** self.cells, dtype=np.int32)
+            boards = (positions[:, None] // powers % 3).astype(np.int8)
+            empty = boards == EMPTY
+
+            win_cell = np.full((3, positions.size), -1, dtype=np.intp)
+            fork_cell = np.full((3, positions.size), -1, dtype=np.intp)
+            won = np.zeros((3, positions.size), dtype=bool)
+            for player in (X, O):
+                found, cells = self._winning_moves(boards, player)
+                win_cell[player] = np.where(found, cells, -1)
+                found, cells = self._fork_moves(boards, player)
+                fork_cell[player] = np.where(found, cells, -1)
+                counts = (boards == player).astype(np.int8) @ self.line_matrix
+                won[player] = (counts == self.win_length).any(axis=1)
+
+            # Stable sorts put each position's empty cells first, in cell order
+            corner_free = empty[:, self.corners]
+            _TABLES[key] = {
+                "powers": powers,
+                "win_cell": win_cell,
+                "fork_cell": fork_cell,
+                "won": won,
+                "empty_cells": np.argsort(~empty, axis=1, kind="stable").astype(np.intp),
+                "empty_count": empty.sum(axis=1),
+                "corner_cells": self.corners[np.argsort(~corner_free, axis=1, kind="stable")],
+                "corner_count": corner_free.sum(axis=1),
+                "center_free": empty[:, self.center],
+            }
+        return _TABLES[key]
+
+    def _random_moves(self, empty):
+        """Pick a uniformly random empty cell on each board."""
+        scores = np.where(empty, self.rng.random(empty.shape), -1.0)
+        return scores.argmax(axis=1)
+
+    def _winning_moves(self, boards, player):
+        """
+        Find, per board, a cell that completes a line for the player.
+
+        Lines are checked in GameAI order (rows, columns, diagonals), so the
+        first completable line is the one GameAI would pick.
+
+        Returns:
+            tuple: (found, cells) arrays of shape (n,)
+        """
+        values = boards[:, self.line_cells]  # (n, lines, k)
+        gaps = values == EMPTY
+        ready = ((values == player).sum(axis=2) == self.win_length - 1) & (gaps.sum(axis=2) == 1)
+        found = ready.any(axis=1)
+
+        line = ready.argmax(axis=1)
+        rows = np.arange(boards.shape[0])
+        offset = gaps[rows, line].argmax(axis=1)
+        return found, self.line_cells[line, offset]
+
+    def _fork_moves(self, boards, player):
+        """
+        Find, per board, the lowest cell where the player would threaten to win twice.
+
+        As in ThreatIndex.fork_cells, a cell is a fork when the open lines two
+        marks short of a win through it leave at least two different cells
+        that would then complete a line.
+
+        Returns:
+            tuple: (found, cells) arrays of shape (n,)
+        """
+        n = boards.shape[0]
+        if self.win_length < 3:
+            return np.zeros(n, dtype=bool), np.zeros(n, dtype=np.intp)
+        opponent = O if player == X else X
+        values = boards[:, self.line_cells]  # (n, lines, k)
+        ready = ((values == player).sum(axis=2) == self.win_length - 2) & ~(values == opponent).any(axis=2)
+        games, lines = np.nonzero(ready)
+
+        # Each such line has two empty cells; playing either one leaves the
+        # other as the cell that completes it
+        gaps = values[games, lines] == EMPTY
+        first = self.line_cells[lines, gaps.argmax(axis=1)]
+        second = self.line_cells[lines, self.win_length - 1 - gaps[:, ::-1].argmax(axis=1)]
+        cells = self.cells
+        pairs = np.unique(np.concatenate([(games * cells + first) * cells + second,
+                                          (games * cells + second) * cells + first]))
+        completions = np.bincount(pairs // cells, minlength=n * cells).reshape(n, cells)
+        forks = completions > 1
+        return forks.any(axis=1), forks.argmax(axis=1)
@@ -0,0 +1,210 @@
+# game_client.py - Load-test client for game_server.py
+#
+#     python game_client.py --spawn --sessions 2000 --duration 10
+#
+# Keeps many sessions busy playing random human moves against the server's
+# AI and reports move throughput, move latency percentiles and how many
+# sessions one fully used server core sustains at this rate. --think paces
+# each session like a human player, for a realistic sessions-per-core figure.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from game_server import DEFAULT_HOST, DEFAULT_PORT
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_server.py")
+
+
+class _Connection:
+    """One TCP connection with replies matched to requests by seq."""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._replies = {}
+        self._seq = 0
+        self._task = asyncio.get_running_loop().create_task(self._read())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, message):
+        """Send a request and wait for its reply."""
+        self._seq += 1
+        message["seq"] = self._seq
+        reply = self._replies[self._seq] = asyncio.get_running_loop().create_future()
+        self._writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        await self._writer.drain()
+        return await reply
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._task.cancel()
+
+    async def _read(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            reply = self._replies.pop(message.get("seq"), None)
+            if reply is not None and not reply.done():
+                reply.set_result(message)
+        for reply in self._replies.values():
+            if not reply.done():
+                reply.set_exception(ConnectionError("server closed the connection"))
+
+
+async def _play(connection, difficulty, deadline, think, rng, latencies, totals):
+    """Play games in one session until the deadline, raising RuntimeError on an error reply."""
+    async def request(message):
+        reply = await connection.request(message)
+        if reply["op"] == "error":
+            raise RuntimeError(reply["error"])
+        return reply
+
+    state = await request({"op": "new", "ai": difficulty, "human": rng.choice("XO")})
+    session_id = state["session"]
+    while time.monotonic() < deadline:
+        if state["over"]:
+            state = await request({"op": "restart", "session": session_id})
+            totals["games"] += 1
+            continue
+        if think:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+        cell = rng.choice([index for index, mark in enumerate(state["board"]) if mark == "."])
+        size = int(len(state["board"]) ** 0.5)
+        start = time.perf_counter()
+        state = await request({"op": "move", "session": session_id,
+                               "row": cell // size, "col": cell % size})
+        latencies.append(time.perf_counter() - start)
+    await request({"op": "close", "session": session_id})
+
+
+def percentile(values, fraction):
+    """
+    Pick a percentile by nearest rank.
+
+    Args:
+        values (list): Sorted numbers
+        fraction (float): Between 0 and 1, e.g. 0.99
+
+    Returns:
+        float: The value at that rank, or 0.0 for an empty list
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_load(host, port, sessions, connections, duration, difficulty, think=0.0, seed=0):
+    """
+    Drive concurrent sessions against a server.
+
+    Args:
+        host (str): Server host
+        port (int): Server port
+        sessions (int): Sessions kept playing at once
+        connections (int): TCP connections the sessions are spread over
+        duration (float): Seconds to play for
+        difficulty (str): AI difficulty the sessions play against
+        think (float, optional): Average seconds a session waits before each
+            move, like a human player; 0 plays flat out
+        seed (int, optional): Seed for the random human moves
+
+    Returns:
+        dict: Sessions, moves, games, moves per second, latency percentiles
+            in milliseconds, the server's CPU utilization and sessions per core
+    """
+    pool = [await _Connection.open(host, port) for _ in range(max(1, min(connections, sessions)))]
+    before = await pool[0].request({"op": "stats"})
+    started = time.monotonic()
+    latencies = []
+    totals = {"games": 0}
+    rng = random.Random(seed)
+    await asyncio.gather(*(
+        _play(pool[index % len(pool)], difficulty, started + duration, think,
+              random.Random(rng.getrandbits(64)), latencies, totals)
+        for index in range(sessions)))
+    elapsed = time.monotonic() - started
+    after = await pool[0].request({"op": "stats"})
+    for connection in pool:
+        await connection.close()
+
+    latencies.sort()
+    utilization = (after["cpu_time"] - before["cpu_time"]) / elapsed
+    return {
+        "sessions": sessions,
+        "moves": len(latencies),
+        "games": totals["games"],
+        "moves_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "ai_moves_per_batch": (after["ai_moves"] - before["ai_moves"])
+                              / max(1, after["ai_batches"] - before["ai_batches"]),
+        "server_cpu": utilization,
+        "sessions_per_core": sessions / utilization if utilization else float("inf"),
+    }
+
+
+def _spawn_server(size):
+    """Start game_server.py on a free port; return the process and the port."""
+    process = subprocess.Popen([sys.executable, SERVER_SCRIPT, "--port", "0", "--size", str(size)],
+                               stdout=subprocess.PIPE, text=True)
+    banner = process.stdout.readline()
+    if not banner.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError("game server did not start")
+    return process, int(banner.rsplit(":", 1)[1])
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Load-test a Tic Tac Boom game server.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="server host")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--spawn", action="store_true", help="start a local server to test against")
+    parser.add_argument("--size", type=int, default=3, help="board size of a spawned server")
+    parser.add_argument("--sessions", type=int, default=1000, help="concurrent sessions")
+    parser.add_argument("--connections", type=int, default=50, help="TCP connections to use")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--ai", default="medium", help="AI difficulty to play against")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="average seconds between a session's moves (default: flat out)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the human moves")
+    args = parser.parse_args(argv)
+
+    process = None
+    port = args.port
+    if args.spawn:
+        process, port = _spawn_server(args.size)
+    try:
+        report = asyncio.run(run_load(args.host, port, args.sessions, args.connections,
+                                      args.duration, args.ai, args.think, args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"Sessions:           {report['sessions']}")
+    print(f"Moves:              {report['moves']} ({report['moves_per_second']:.0f}/s)")
+    print(f"Games finished:     {report['games']}")
+    print(f"Move latency:       p50 {report['p50_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, "
+          f"max {report['max_ms']:.2f} ms")
+    print(f"AI moves per batch: {report['ai_moves_per_batch']:.1f}")
+    print(f"Server CPU:         {report['server_cpu'] * 100:.0f}% of one core")
+    print(f"Sessions per core:  {report['sessions_per_core']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
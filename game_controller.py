@@ -1,11 +1,15 @@
 # game_controller.py - Controls the game flow and connects model with view
 import random
-from PyQt5.QtWidgets import (QMainWindow, QGridLayout, QVBoxLayout, 
+from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, 
                             QPushButton, QLabel, QWidget)
-from PyQt5.QtCore import Qt, QPropertyAnimation, QSize, QTimer
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
-from game_model import GameModel
+import game_trace
+from board_widget import BoardWidget
+from boom_widget import BoomOverlay
+from game_events import BOOM, DRAW, MOVE, RESET, WIN, EventStream
+from game_model import BOOM_CHANCE, GameModel
 
 class TicTacBoomGame(QMainWindow):
     """
@@ -13,12 +17,20 @@ class TicTacBoomGame(QMainWindow):
     Implements the Tic Tac Boom game with a random chance for a boom effect on wins.
     """
     
-    def __init__(self):
-        """Initialize the game window, UI components, and game model."""
+    def __init__(self, size=3, win_length=None):
+        """
+        Initialize the game window, UI components, and game model.
+        
+        Args:
+            size (int): Board width and height
+            win_length (int, optional): Marks in a row needed to win
+        """
         super().__init__()
         
-        # Setup the game model
-        self.game_model = GameModel()
+        # Setup the game model; the UI follows it through its event stream,
+        # delivered on the next turn of the Qt event loop
+        self.events = EventStream(scheduler=lambda flush: QTimer.singleShot(0, flush))
+        self.game_model = GameModel(size, win_length, self.events)
         
         # Setup window properties
         self.setWindowTitle("Tic Tac Boom")
@@ -26,6 +38,7 @@ class TicTacBoomGame(QMainWindow):
         
         # Create UI components
         self._setup_ui()
+        self.events.subscribe(self._on_events)
         
     def _setup_ui(self):
         """Set up the user interface components."""
@@ -42,22 +55,10 @@ class TicTacBoomGame(QMainWindow):
         self.status_text.setFont(QFont("Arial", 20))
         main_layout.addWidget(self.status_text)
         
-        # Game grid
-        game_widget = QWidget()
-        self.game_grid = QGridLayout(game_widget)
-        self.game_grid.setSpacing(10)
-        main_layout.addWidget(game_widget)
-        
-        # Initialize buttons
-        self.buttons = []
-        for row in range(3):
-            for col in range(3):
-                button = QPushButton()
-                button.setFixedSize(120, 120)
-                button.setFont(QFont("Arial", 36, QFont.Bold))
-                button.clicked.connect(lambda checked, r=row, c=col: self.make_move(r, c))
-                self.game_grid.addWidget(button, row, col)
-                self.buttons.append(button)
+        # Game grid, painted as a single widget
+        self.board_widget = BoardWidget(self.game_model.size)
+        self.board_widget.cell_clicked.connect(self.make_move)
+        main_layout.addWidget(self.board_widget, 1)
         
         # Restart button
         self.restart_button = QPushButton("Restart")
@@ -65,75 +66,59 @@ class TicTacBoomGame(QMainWindow):
         self.restart_button.clicked.connect(self.restart_game)
         main_layout.addWidget(self.restart_button, 0, Qt.AlignCenter)
         
-        # Boom text
-        self.boom_text = QLabel("💥 BOOM! 💥")
-        self.boom_text.setFont(QFont("Arial", 72, QFont.Bold))
-        self.boom_text.setStyleSheet("color: red;")
-        self.boom_text.setAlignment(Qt.AlignCenter)
-        self.boom_text.hide()
-        
-        # Position boom text over the grid
-        main_layout.addWidget(self.boom_text)
+        # Boom animation, drawn over the whole window
+        self.boom_overlay = BoomOverlay(main_widget)
     
     def make_move(self, row, col):
         """
         Handle a player's move.
         
+        The board, status text and boom effect catch up when the move's
+        events are delivered to _on_events.
+        
         Args:
-            row (int): Row index (0-2)
-            col (int): Column index (0-2)
+            row (int): Row index (0 to size - 1)
+            col (int): Column index (0 to size - 1)
         """
-        # Attempt to make a move in the model
-        if self.game_model.make_move(row, col):
-            # Update UI to reflect the move
-            button_index = row * 3 + col
-            self.buttons[button_index].setText(self.game_model.board[row][col])
-            
-            # Check if game has ended
-            if self.game_model.game_over:
-                if self.game_model.winner:
-                    self.status_text.setText(f"Player {self.game_model.winner} wins!")
-                    
-                    # Random chance for boom effect (30%)
-                    if random.random() < 0.3:
-                        self.show_boom_effect()
-                else:
-                    self.status_text.setText("It's a draw!")
-            else:
-                # Continue to next player's turn
-                self.status_text.setText(f"Player {self.game_model.current_player}'s turn")
+        with game_trace.span("controller.make_move"):
+            with game_trace.span("model.make_move"):
+                moved = self.game_model.make_move(row, col)
+            if moved:
+                game_trace.count("moves")
     
-    def show_boom_effect(self):
-        """Display the boom animation effect."""
-        print("Showing boom effect in base game!")  # Debug statement
-        self.boom_text.show()
-        self.boom_text.raise_()  # Ensure the boom text is on top
-        
-        # Use a timer-based animation approach
-        def animate_size(size):
-            self.boom_text.setFont(QFont("Arial", size, QFont.Bold))
-        
-        # Animation sequence
-        QTimer.singleShot(100, lambda: animate_size(48))
-        QTimer.singleShot(200, lambda: animate_size(60))
-        QTimer.singleShot(300, lambda: animate_size(72))
-        QTimer.singleShot(400, lambda: animate_size(84))
-        QTimer.singleShot(500, lambda: animate_size(96))
-        QTimer.singleShot(600, lambda: animate_size(84))
-        QTimer.singleShot(700, lambda: animate_size(72))
-        QTimer.singleShot(800, lambda: animate_size(60))
+    def _on_events(self, events):
+        """
+        Update the UI from a batch of game events.
         
-        # Hide boom text after animation
-        QTimer.singleShot(2000, lambda: self.boom_text.hide())
+        Args:
+            events (list): Events from the game model's stream
+        """
+        for event in events:
+            if event.kind == MOVE:
+                self.board_widget.set_mark(event.row, event.col, event.player)
+            elif event.kind == WIN:
+                self.status_text.setText(f"Player {event.player} wins!")
+                
+                # Random chance for boom effect, unless the game was restarted already
+                if self.game_model.game_over and random.random() < BOOM_CHANCE:
+                    self.events.emit(BOOM, event.player, move_number=event.move_number)
+            elif event.kind == BOOM:
+                if self.game_model.game_over:
+                    self.show_boom_effect()
+            elif event.kind == DRAW:
+                self.status_text.setText("It's a draw!")
+            elif event.kind == RESET:
+                self.board_widget.clear()
+                self.boom_overlay.cancel()
+        
+        if not self.game_model.game_over:
+            # Continue to next player's turn
+            self.status_text.setText(f"Player {self.game_model.current_player}'s turn")
+    
+    def show_boom_effect(self):
+        """Display the boom animation effect, restarting it if one is showing."""
+        self.boom_overlay.play()
     
     def restart_game(self):
-        """Reset the game to its initial state."""
-        # Reset the model
+        """Reset the game to its initial state; the UI is reset by the RESET event."""
         self.game_model.reset_game()
-        
-        # Reset UI
-        for button in self.buttons:
-            button.setText("")
-        
-        self.status_text.setText(f"Player {self.game_model.current_player}'s turn")
-        self.boom_text.hide()
\ No newline at end of file
@@ -0,0 +1,145 @@
+# game_events.py - Game event stream with batched delivery to subscribers
+from collections import namedtuple
+
+import game_trace
+
+# Event kinds.
+MOVE = "move"
+WIN = "win"
+DRAW = "draw"
+BOOM = "boom"
+RESET = "reset"
+
+# Events buffered before the stream flushes on its own.
+DEFAULT_BATCH_SIZE = 256
+
+Event = namedtuple("Event", ["kind", "player", "row", "col", "move_number"])
+Event.__doc__ = """One thing that happened in a game.
+
+MOVE has the mover, cell and move number; WIN and BOOM the winner and the
+move number of the winning move; DRAW the move number of the last move.
+Fields that do not apply are None, and RESET carries none at all.
+"""
+
+
+class EventStream:
+    """
+    Buffers game events and hands them to subscribers in batches.
+
+    A batch is delivered once batch_size events are waiting, or on the next
+    tick of an event loop when a scheduler is given: emit() asks it once per
+    batch to call flush() soon, e.g. with QTimer.singleShot(0, ...) or
+    loop.call_soon. Subscribers are called with a list of events, so the
+    game itself only pays for appending to a list. Events emitted while a
+    batch is being delivered go into the next batch.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, scheduler=None):
+        """
+        Initialize a stream with no subscribers.
+
+        Args:
+            batch_size (int, optional): Events that trigger a flush; 1
+                delivers every event as it happens
+            scheduler (callable, optional): Called with flush when the first
+                event of a batch arrives, to deliver it on the next tick
+        """
+        self.batch_size = batch_size
+        self.scheduler = scheduler
+        self.subscribers = []
+        self._pending = []
+        self._scheduled = False
+
+    def subscribe(self, subscriber):
+        """
+        Start delivering batches to a subscriber.
+
+        Args:
+            subscriber (callable): Called with each batch, a list of Events
+
+        Returns:
+            callable: The subscriber, for unsubscribe
+        """
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Stop delivering batches to a subscriber.
+
+        Args:
+            subscriber (callable): A subscriber passed to subscribe
+        """
+        self.subscribers.remove(subscriber)
+
+    def emit(self, kind, player=None, row=None, col=None, move_number=None):
+        """
+        Queue an event for the next batch.
+
+        Args:
+            kind (str): MOVE, WIN, DRAW, BOOM or RESET
+            player (str, optional): The mover or winner
+            row (int, optional): Row of the move
+            col (int, optional): Column of the move
+            move_number (int, optional): The move's number in the game, from 1
+        """
+        self._pending.append(Event(kind, player, row, col, move_number))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self.scheduler is not None and not self._scheduled:
+            self._scheduled = True
+            self.scheduler(self.flush)
+
+    def flush(self):
+        """Deliver the waiting events to every subscriber now."""
+        self._scheduled = False
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        with game_trace.span("events.flush"):
+            for subscriber in list(self.subscribers):
+                subscriber(batch)
+
+
+class StatsRecorder:
+    """
+    Subscriber that records a stream's games into GameStats.
+
+    Moves are recorded as they arrive. A finished game's result is recorded
+    on the RESET that starts the next one, after any BOOM, the same point
+    the front ends have always recorded it.
+    """
+
+    def __init__(self, stats, x_difficulty=None, o_difficulty=None):
+        """
+        Initialize the recorder.
+
+        Args:
+            stats (GameStats): Statistics to record into
+            x_difficulty (str, optional): AI difficulty playing X, None for a human
+            o_difficulty (str, optional): AI difficulty playing O, None for a human
+        """
+        self.stats = stats
+        self.x_difficulty = x_difficulty
+        self.o_difficulty = o_difficulty
+        self._result = None
+        self._had_boom = False
+
+    def __call__(self, events):
+        stats = self.stats
+        for event in events:
+            kind = event.kind
+            if kind == MOVE:
+                stats.record_move(event.player, event.row, event.col, event.move_number)
+            elif kind == WIN or kind == DRAW:
+                self._result = (event.player,)
+            elif kind == BOOM:
+                self._had_boom = True
+            elif kind == RESET:
+                if self._result is not None:
+                    stats.record_game_result(winner=self._result[0], had_boom=self._had_boom,
+                                             x_difficulty=self.x_difficulty,
+                                             o_difficulty=self.o_difficulty)
+                self._result = None
+                self._had_boom = False
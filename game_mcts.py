@@ -0,0 +1,338 @@
+# game_mcts.py - Time-budgeted Monte Carlo Tree Search for large boards
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import game_trace
+from game_model import PLAYERS, GameModel
+
+# Default seconds per move when the AI has no think_time.
+DEFAULT_THINK_TIME = 1.0
+
+# UCT exploration constant.
+EXPLORATION = 1.4
+
+# New nodes on boards larger than this only consider cells within
+# CANDIDATE_RADIUS of a mark; on small boards every empty cell is a candidate.
+FULL_BOARD_MAX_SIZE = 5
+CANDIDATE_RADIUS = 2
+
+# Fraction of the budget workers leave for sending their results back.
+RESULT_MARGIN = 0.1
+
+# Iterations between clock checks.
+_CHECK_INTERVAL = 16
+
+# Seconds between checks of the stop event while waiting for the workers.
+STOP_POLL = 0.02
+
+# Worker pool shared by every MCTS player in this process. Workers are
+# spawned rather than forked: the first search may run on a GUI worker
+# thread, and forking a multithreaded Qt process can deadlock the child.
+_pool = None
+_pool_workers = 0
+
+# Shared counter: every pool search whose generation is at most its value
+# has been stopped. Set in the parent and, by _init_worker, in the workers.
+_cancelled = None
+_generation = 0
+
+# The last tree searched in this process, reused when the next search starts
+# from a position a few moves further down it: (root, masks, side, size, win_length).
+_last_tree = None
+
+
+class _Node:
+    """One position in the search tree, reached by playing ``move``."""
+
+    __slots__ = ("move", "player", "parent", "children", "untried", "visits", "score")
+
+    def __init__(self, move, player, parent, untried):
+        self.move = move
+        self.player = player  # The player who played move
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        self.score = 0.0
+
+
+@lru_cache(maxsize=None)
+def _neighborhoods(size):
+    """Bit mask of the cells within CANDIDATE_RADIUS of each cell."""
+    masks = []
+    for cell in range(size * size):
+        row, col = divmod(cell, size)
+        mask = 0
+        for r in range(max(0, row - CANDIDATE_RADIUS), min(size, row + CANDIDATE_RADIUS + 1)):
+            for c in range(max(0, col - CANDIDATE_RADIUS), min(size, col + CANDIDATE_RADIUS + 1)):
+                mask |= 1 << (r * size + c)
+        masks.append(mask)
+    return tuple(masks)
+
+
+def candidate_moves(model):
+    """
+    List the moves worth expanding in a position.
+
+    Args:
+        model (GameModel): The position
+
+    Returns:
+        list: Cell indices; on large boards only the empty cells near marks
+    """
+    size = model.size
+    occupied = model.masks[0] | model.masks[1]
+    if size <= FULL_BOARD_MAX_SIZE:
+        candidates = ~occupied
+    elif occupied:
+        near = 0
+        neighborhoods = _neighborhoods(size)
+        mask = occupied
+        while mask:
+            low = mask & -mask
+            near |= neighborhoods[low.bit_length() - 1]
+            mask ^= low
+        candidates = near & ~occupied
+    else:
+        center = size // 2
+        return [center * size + center]
+    return [cell for cell in range(size * size) if candidates >> cell & 1]
+
+
+def _playout(model, rng):
+    """Play random moves to the end of the game; return the winner or None."""
+    if model.game_over:
+        return model.winner
+    occupied = model.masks[0] | model.masks[1]
+    empty = [cell for cell in range(model.size * model.size) if not occupied >> cell & 1]
+    while not model.game_over:
+        index = rng.randrange(len(empty))
+        empty[index], empty[-1] = empty[-1], empty[index]
+        model.make(empty.pop())
+    return model.winner
+
+
+def _select_child(node):
+    """Pick the child with the highest UCT score."""
+    log_visits = math.log(node.visits)
+    best = None
+    best_score = -1.0
+    for child in node.children.values():
+        score = child.score / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+        if score > best_score:
+            best = child
+            best_score = score
+    return best
+
+
+def _reuse_tree(model):
+    """Return the subtree of the last search rooted at the model's position, if any."""
+    if _last_tree is None:
+        return None
+    root, masks, side, size, win_length = _last_tree
+    if (size, win_length) != (model.size, model.win_length):
+        return None
+
+    added = [new & ~old for new, old in zip(model.masks, masks)]
+    if any(old & ~new for new, old in zip(model.masks, masks)):
+        return None
+
+    # Walk down one move at a time; each player added at most one mark per ply
+    node = root
+    while added[0] or added[1]:
+        bits = added[side]
+        if bits & (bits - 1) or not bits:
+            return None
+        node = node.children.get(bits.bit_length() - 1)
+        if node is None:
+            return None
+        added[side] = 0
+        side = 1 - side
+
+    if PLAYERS[side] != model.current_player:
+        return None
+    node.parent = None
+    return node
+
+
+def search(model, deadline, rng, stop=None):
+    """
+    Grow a search tree from the model's position until the deadline.
+
+    Reuses this process's previous tree when the position follows from it.
+
+    Args:
+        model (GameModel): The position to search; it is restored on return
+        deadline (float): time.monotonic() value at which to stop
+        rng (random.Random): Source for the playouts
+        stop (threading.Event, optional): Ends the search early when set
+
+    Returns:
+        dict: Maps each root move (cell index) to its visit count
+    """
+    global _last_tree
+
+    root = _reuse_tree(model)
+    if root is None:
+        root = _Node(None, None, None, candidate_moves(model))
+    root_length = len(model.move_stack)
+    root_masks = tuple(model.masks)
+    root_side = PLAYERS.index(model.current_player)
+
+    iterations = 0
+    while True:
+        if iterations % _CHECK_INTERVAL == 0 and iterations:
+            if time.monotonic() >= deadline or (stop is not None and stop.is_set()):
+                break
+        iterations += 1
+
+        # Selection
+        node = root
+        while not node.untried and node.children:
+            node = _select_child(node)
+            model.make(node.move)
+
+        # Expansion
+        if node.untried and not model.game_over:
+            index = rng.randrange(len(node.untried))
+            node.untried[index], node.untried[-1] = node.untried[-1], node.untried[index]
+            move = node.untried.pop()
+            player = model.current_player
+            model.make(move)
+            child = _Node(move, player, node, [] if model.game_over else candidate_moves(model))
+            node.children[move] = child
+            node = child
+
+        # Simulation
+        winner = _playout(model, rng)
+        while len(model.move_stack) > root_length:
+            model.unmake()
+
+        # Backpropagation, scoring each node for the player who moved into it
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.score += 0.5
+            elif winner == node.player:
+                node.score += 1.0
+            node = node.parent
+
+    game_trace.count("ai.playouts", iterations)
+    _last_tree = (root, root_masks, root_side, model.size, model.win_length)
+    return {move: child.visits for move, child in root.children.items()}
+
+
+class _PoolStop:
+    """Stop flag of one pool search, read from the shared cancellation counter."""
+
+    __slots__ = ("generation",)
+
+    def __init__(self, generation):
+        self.generation = generation
+
+    def is_set(self):
+        return _cancelled.value >= self.generation
+
+
+def _init_worker(cancelled):
+    """Pool initializer: keep the shared cancellation counter."""
+    global _cancelled
+    _cancelled = cancelled
+
+
+def _search_board(board, player, win_length, deadline, seed, generation):
+    """Worker entry point: search a position and return root visit counts."""
+    model = GameModel.from_board(board, player, win_length)
+    return search(model, deadline, random.Random(seed), _PoolStop(generation))
+
+
+def _get_pool(workers):
+    """Get the process pool, (re)creating it for a different worker count."""
+    global _pool, _pool_workers, _cancelled
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        context = multiprocessing.get_context("spawn")
+        _cancelled = context.Value("q", 0, lock=False)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                    initializer=_init_worker, initargs=(_cancelled,))
+        _pool_workers = workers
+    return _pool
+
+
+def best_move(board, player, win_length=None, think_time=DEFAULT_THINK_TIME, workers=None,
+              rng=None, stop=None):
+    """
+    Choose a move by root-parallel MCTS under a hard time cap.
+
+    The calling process searches alongside workers - 1 pool processes, each
+    growing its own tree from the same position. Visit counts are summed
+    across trees and the most visited move is played. Results that miss the
+    deadline are left out.
+
+    Args:
+        board (list): 2D list representing the game board
+        player (str): The player to move ("X" or "O")
+        win_length (int, optional): Marks in a row needed to win
+        think_time (float, optional): Seconds allowed for the move
+        workers (int, optional): Searching processes, defaults to the CPU count
+        rng (random.Random, optional): Source for the playouts and worker seeds
+        stop (threading.Event, optional): Ends the search early when set,
+            in the pool workers too
+
+    Returns:
+        tuple: (row, col) of the chosen move, or None if the game is over
+    """
+    model = GameModel.from_board(board, player, win_length)
+    if model.game_over:
+        return None
+
+    rng = rng or random
+    start = time.monotonic()
+    deadline = start + think_time
+    worker_deadline = deadline - think_time * RESULT_MARGIN
+    workers = workers or os.cpu_count() or 1
+
+    global _generation, _pool
+    futures = []
+    if workers > 1:
+        pool = _get_pool(workers - 1)
+        _generation += 1
+        generation = _generation
+        try:
+            futures = [pool.submit(_search_board, board, player, win_length, worker_deadline,
+                                   rng.getrandbits(64), generation)
+                       for _ in range(workers - 1)]
+        except BrokenProcessPool:
+            # A worker died; search alone this time and start a new pool next time
+            _pool = None
+            futures = []
+
+    visits = search(model, worker_deadline, random.Random(rng.getrandbits(64)), stop)
+
+    if futures:
+        done, not_done = set(), set(futures)
+        while not_done and time.monotonic() < deadline:
+            if stop is not None and stop.is_set():
+                # Workers check the counter as often as their clocks
+                _cancelled.value = max(_cancelled.value, generation)
+            finished, not_done = wait(not_done, timeout=max(0.0, min(deadline - time.monotonic(), STOP_POLL)))
+            done |= finished
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            if future.exception() is None:
+                for move, count in future.result().items():
+                    visits[move] = visits.get(move, 0) + count
+
+    if not visits:
+        cell = candidate_moves(model)[0]
+    else:
+        cell = max(visits, key=visits.get)
+    return divmod(cell, model.size)
\ No newline at end of file
@@ -1,79 +1,596 @@
 # game_model.py - Contains the game logic and state
+from collections import namedtuple
+from functools import lru_cache
+
+from game_events import DRAW, MOVE, RESET, WIN
+
+PLAYERS = ("X", "O")
+
+# Chance that a win is celebrated with a boom.
+BOOM_CHANCE = 0.3
+
+# Empty cells this close to a mark (in king moves) are candidate moves.
+CANDIDATE_RADIUS = 2
+
+# Precomputed line layout for one board size and win length.
+#   lines: bit mask of every k-in-a-row window on the board
+#   line_cells: the cell indices of each window, in board order
+#   cell_lines: for each cell, the indices of the windows passing through it
+BoardGeometry = namedtuple("BoardGeometry", ["size", "win_length", "lines", "line_cells", "cell_lines"])
+
+
+def default_win_length(size):
+    """
+    Return the default number in a row needed to win on a board.
+
+    Args:
+        size (int): Board width and height
+
+    Returns:
+        int: The full row on small boards, five in a row from 5x5 upwards
+    """
+    return min(size, 5)
+
+
+@lru_cache(maxsize=None)
+def board_geometry(size=3, win_length=None):
+    """
+    Build (once) the winning-line layout for a board.
+
+    Cell (row, col) is bit row * size + col of the player masks. Windows are
+    listed as rows, columns, diagonals and anti-diagonals, which for the 3x3
+    board matches the row/column/diagonal order GameAI has always used.
+
+    Args:
+        size (int): Board width and height
+        win_length (int, optional): Marks in a row needed to win
+
+    Returns:
+        BoardGeometry: The precomputed layout
+    """
+    if win_length is None:
+        win_length = default_win_length(size)
+    if not 1 <= win_length <= size:
+        raise ValueError(f"win_length must be between 1 and {size}, got {win_length}")
+
+    line_cells = []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for r in range(size):
+            for c in range(size):
+                end_r = r + dr * (win_length - 1)
+                end_c = c + dc * (win_length - 1)
+                if 0 <= end_r < size and 0 <= end_c < size:
+                    line_cells.append(tuple((r + dr * i) * size + c + dc * i for i in range(win_length)))
+
+    lines = tuple(sum(1 << cell for cell in cells) for cells in line_cells)
+    cell_lines = [[] for _ in range(size * size)]
+    for index, cells in enumerate(line_cells):
+        for cell in cells:
+            cell_lines[cell].append(index)
+
+    return BoardGeometry(size, win_length, lines, tuple(line_cells), tuple(tuple(l) for l in cell_lines))
+
+
+@lru_cache(maxsize=None)
+def board_symmetries(size):
+    """
+    Build (once) the eight rotations and reflections of a square board.
+
+    Args:
+        size (int): Board width and height
+
+    Returns:
+        tuple: Eight tuples, each mapping a cell index to its image; the first
+            one is the identity
+    """
+    last = size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - c, last - r),
+    )
+    perms = []
+    for transform in transforms:
+        perm = []
+        for cell in range(size * size):
+            r, c = transform(*divmod(cell, size))
+            perm.append(r * size + c)
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+@lru_cache(maxsize=None)
+def cell_neighbours(size, radius=CANDIDATE_RADIUS):
+    """
+    Build (once) the cells around each cell of a board.
+
+    Args:
+        size (int): Board width and height
+        radius (int, optional): How many king moves away a neighbour may be
+
+    Returns:
+        tuple: For each cell index, a tuple of its neighbours' indices
+    """
+    neighbours = []
+    for cell in range(size * size):
+        r, c = divmod(cell, size)
+        neighbours.append(tuple(
+            nr * size + nc
+            for nr in range(max(0, r - radius), min(size, r + radius + 1))
+            for nc in range(max(0, c - radius), min(size, c + radius + 1))
+            if (nr, nc) != (r, c)
+        ))
+    return tuple(neighbours)
+
+
+class ThreatIndex:
+    """
+    Open lines and candidate moves of a position, kept up to date move by move.
+
+    A window is open for a player while the opponent has no mark in it. The
+    index files each open window under its owner's mark count, so the windows
+    one mark short of a win, or two short for a fork, are read off directly.
+    It also keeps every empty cell, and the empty cells within
+    CANDIDATE_RADIUS of a mark, in lists with O(1) insertion, removal and
+    random choice. Updating costs one step per window and neighbour of the
+    cell played, and no query scans the board.
+
+    Attach one with GameModel.track_threats; the model then calls played and
+    unplayed from make and unmake.
+    """
+
+    __slots__ = ("model", "open_lines", "near", "candidates", "empty", "_positions", "_empty_at",
+                 "_neighbours")
+
+    def __init__(self, model):
+        """
+        Index a model's current position.
+
+        Args:
+            model (GameModel): The model to follow
+        """
+        self.model = model
+        self._neighbours = cell_neighbours(model.size)
+        # open_lines[side][count]: windows where side has count marks and the opponent none
+        self.open_lines = tuple([set() for _ in range(model.win_length + 1)] for _ in PLAYERS)
+        self.near = [0] * (model.size * model.size)
+        self.candidates = []
+        self._positions = {}
+        self.empty = []
+        # Index of each cell in empty, -1 while the cell is occupied
+        self._empty_at = [-1] * (model.size * model.size)
+        self.rebuild()
+
+    def rebuild(self):
+        """Index the model's position from scratch, e.g. after a reset."""
+        model = self.model
+        for by_count in self.open_lines:
+            for lines in by_count:
+                lines.clear()
+        self.near[:] = [0] * len(self.near)
+        self.candidates.clear()
+        self._positions.clear()
+
+        for side in range(2):
+            own, other = model.line_counts[side], model.line_counts[1 - side]
+            by_count = self.open_lines[side]
+            for line, count in enumerate(own):
+                if count and not other[line]:
+                    by_count[count].add(line)
+
+        occupied = model.masks[0] | model.masks[1]
+        self.empty[:] = [cell for cell in range(len(self.near)) if not occupied >> cell & 1]
+        self._empty_at[:] = [-1] * len(self.near)
+        for position, cell in enumerate(self.empty):
+            self._empty_at[cell] = position
+        for cell in model.move_stack:
+            for neighbour in self._neighbours[cell]:
+                self.near[neighbour] += 1
+        for cell, near in enumerate(self.near):
+            if near and not occupied >> cell & 1:
+                self._add(cell)
+
+    def played(self, cell, side):
+        """
+        Update the index after a mark was placed and the line counts updated.
+
+        Args:
+            cell (int): Cell index of the mark
+            side (int): 0 for X, 1 for O
+        """
+        model = self.model
+        own, other = model.line_counts[side], model.line_counts[1 - side]
+        mine, theirs = self.open_lines[side], self.open_lines[1 - side]
+        for line in model.geometry.cell_lines[cell]:
+            if not other[line]:
+                count = own[line]
+                if count > 1:
+                    mine[count - 1].discard(line)
+                mine[count].add(line)
+            elif own[line] == 1:
+                theirs[other[line]].discard(line)
+
+        self._remove(cell)
+        self._occupy(cell)
+        occupied = model.masks[0] | model.masks[1]
+        near = self.near
+        for neighbour in self._neighbours[cell]:
+            near[neighbour] += 1
+            if near[neighbour] == 1 and not occupied >> neighbour & 1:
+                self._add(neighbour)
+
+    def unplayed(self, cell, side):
+        """
+        Update the index after a mark was taken back and the line counts updated.
+
+        Args:
+            cell (int): Cell index of the mark
+            side (int): 0 for X, 1 for O
+        """
+        model = self.model
+        own, other = model.line_counts[side], model.line_counts[1 - side]
+        mine, theirs = self.open_lines[side], self.open_lines[1 - side]
+        for line in model.geometry.cell_lines[cell]:
+            if not other[line]:
+                count = own[line]
+                mine[count + 1].discard(line)
+                if count:
+                    mine[count].add(line)
+            elif not own[line]:
+                theirs[other[line]].add(line)
+
+        near = self.near
+        for neighbour in self._neighbours[cell]:
+            near[neighbour] -= 1
+            if not near[neighbour]:
+                self._remove(neighbour)
+        if near[cell]:
+            self._add(cell)
+        self._vacate(cell)
+
+    def winning_cell(self, side):
+        """
+        Find a cell that completes a line for a player.
+
+        Args:
+            side (int): 0 for X, 1 for O
+
+        Returns:
+            int: The empty cell of the first such window in board_geometry
+                order, or None if there is none
+        """
+        lines = self.open_lines[side][self.model.win_length - 1]
+        if not lines:
+            return None
+        return self._empty_cells(min(lines))[0]
+
+    def winning_cells(self, side):
+        """
+        List every cell that completes a line for a player.
+
+        Args:
+            side (int): 0 for X, 1 for O
+
+        Returns:
+            list: Sorted cell indices
+        """
+        return sorted({self._empty_cells(line)[0]
+                       for line in self.open_lines[side][self.model.win_length - 1]})
+
+    def fork_cells(self, side):
+        """
+        List the cells where a player would threaten to win in two places at once.
+
+        Args:
+            side (int): 0 for X, 1 for O
+
+        Returns:
+            list: Sorted cell indices, empty for win lengths below 3
+        """
+        win_length = self.model.win_length
+        if win_length < 3:
+            return []
+        # For each empty cell, the cells that would then complete a line
+        completions = {}
+        for line in self.open_lines[side][win_length - 2]:
+            first, second = self._empty_cells(line)
+            completions.setdefault(first, set()).add(second)
+            completions.setdefault(second, set()).add(first)
+        return sorted(cell for cell, wins in completions.items() if len(wins) > 1)
+
+    def random_cell(self, rng):
+        """
+        Pick an empty cell uniformly at random.
+
+        Args:
+            rng (random.Random): Source of randomness
+
+        Returns:
+            int: A random empty cell, or None if the board is full
+        """
+        return rng.choice(self.empty) if self.empty else None
+
+    def candidate_cell(self, rng):
+        """
+        Pick a random candidate move.
+
+        Args:
+            rng (random.Random): Source of randomness
+
+        Returns:
+            int: A random empty cell near a mark, any empty cell on an empty
+                board or once every mark is boxed in, or None if the board is full
+        """
+        if self.candidates:
+            return rng.choice(self.candidates)
+        return self.random_cell(rng)
+
+    def _empty_cells(self, line):
+        model = self.model
+        free = model.geometry.lines[line] & ~(model.masks[0] | model.masks[1])
+        cells = []
+        while free:
+            low = free & -free
+            cells.append(low.bit_length() - 1)
+            free ^= low
+        return cells
+
+    def _add(self, cell):
+        if cell not in self._positions:
+            self._positions[cell] = len(self.candidates)
+            self.candidates.append(cell)
+
+    def _remove(self, cell):
+        position = self._positions.pop(cell, None)
+        if position is not None:
+            last = self.candidates.pop()
+            if last != cell:
+                self.candidates[position] = last
+                self._positions[last] = position
+
+    def _occupy(self, cell):
+        position = self._empty_at[cell]
+        self._empty_at[cell] = -1
+        last = self.empty.pop()
+        if last != cell:
+            self.empty[position] = last
+            self._empty_at[last] = position
+
+    def _vacate(self, cell):
+        self._empty_at[cell] = len(self.empty)
+        self.empty.append(cell)
+
+
 class GameModel:
-    """Represents the logical state and rules of the Tic Tac Boom game."""
-    
-    def __init__(self):
-        """Initialize a new game model with an empty board."""
-        self.board = [["" for _ in range(3)] for _ in range(3)]
+    """
+    Represents the logical state and rules of the Tic Tac Boom game.
+
+    The board is stored as two bitboards, one per player, plus a per-player
+    count of marks in every winning window. A move only touches the windows
+    through its cell, so win and draw detection cost the same on a 3x3 board
+    as on a 15x15 one. The ``board`` attribute is a read-only 2D list view,
+    so callers that index ``board[row][col]`` keep working.
+    """
+
+    __slots__ = ("geometry", "size", "win_length", "masks", "line_counts", "move_stack",
+                 "current_player", "game_over", "winner", "threats", "events")
+
+    def __init__(self, size=3, win_length=None, events=None):
+        """
+        Initialize a new game model with an empty board.
+
+        Args:
+            size (int, optional): Board width and height
+            win_length (int, optional): Marks in a row needed to win,
+                defaults to default_win_length(size)
+            events (EventStream, optional): Stream that make_move and
+                reset_game report move, win, draw and reset events to
+        """
+        self.geometry = board_geometry(size, win_length)
+        self.size = size
+        self.win_length = self.geometry.win_length
+        line_count = len(self.geometry.lines)
+        self.masks = [0, 0]
+        self.line_counts = ([0] * line_count, [0] * line_count)
+        self.move_stack = []
         self.current_player = "X"
         self.game_over = False
         self.winner = None
-    
+        # ThreatIndex kept in step with the position once track_threats is called
+        self.threats = None
+        self.events = events
+
+    @classmethod
+    def from_board(cls, board, current_player="X", win_length=None):
+        """
+        Build a model holding the position shown on a 2D board list.
+
+        The move stack holds the occupied cells in board order rather than the
+        order they were played, so only moves made afterwards can be unmade.
+
+        Args:
+            board (list): 2D list of "X", "O" or "" strings
+            current_player (str, optional): The player to move
+            win_length (int, optional): Marks in a row needed to win
+
+        Returns:
+            GameModel: A model of the same size with that position set up
+        """
+        model = cls(len(board), win_length)
+        size = model.size
+        for r, row in enumerate(board):
+            for c, mark in enumerate(row):
+                if mark:
+                    cell = r * size + c
+                    side = PLAYERS.index(mark)
+                    model.masks[side] |= 1 << cell
+                    model.move_stack.append(cell)
+                    counts = model.line_counts[side]
+                    for line in model.geometry.cell_lines[cell]:
+                        counts[line] += 1
+                        if counts[line] == model.win_length:
+                            model.game_over = True
+                            model.winner = mark
+
+        if len(model.move_stack) == size * size:
+            model.game_over = True
+        model.current_player = current_player
+        return model
+
+    @property
+    def board(self):
+        """
+        Build a 2D list view of the board.
+
+        Returns:
+            list: size x size list of "X", "O" or "" strings
+        """
+        x_mask, o_mask = self.masks
+        size = self.size
+        return [
+            ["X" if x_mask >> (r * size + c) & 1 else "O" if o_mask >> (r * size + c) & 1 else ""
+             for c in range(size)]
+            for r in range(size)
+        ]
+
     def make_move(self, row, col):
         """
         Attempt to make a move at the specified position.
-        
+
         Args:
-            row (int): Row index (0-2)
-            col (int): Column index (0-2)
-            
+            row (int): Row index (0 to size - 1)
+            col (int): Column index (0 to size - 1)
+
         Returns:
             bool: True if the move was valid and made, False otherwise
         """
-        if self.game_over or self.board[row][col] != "":
+        size = self.size
+        if self.game_over or not (0 <= row < size and 0 <= col < size):
             return False
-        
-        # Update the board
-        self.board[row][col] = self.current_player
-        
-        # Check for win or draw
-        if self.check_winner(row, col):
+        cell = row * size + col
+        if (self.masks[0] | self.masks[1]) >> cell & 1:
+            return False
+
+        player = self.current_player
+        self.make(cell)
+        if self.events is not None:
+            move_number = len(self.move_stack)
+            self.events.emit(MOVE, player, row, col, move_number)
+            if self.winner:
+                self.events.emit(WIN, player, move_number=move_number)
+            elif self.game_over:
+                self.events.emit(DRAW, move_number=move_number)
+        return True
+
+    def make(self, cell):
+        """
+        Place the current player's mark on a cell and push it on the move stack.
+
+        Unlike make_move, this does not validate the move. It is meant for
+        search code that explores positions and takes them back with unmake.
+
+        Args:
+            cell (int): Cell index (row * size + col) of an empty cell
+        """
+        side = 0 if self.current_player == "X" else 1
+        self.masks[side] |= 1 << cell
+        self.move_stack.append(cell)
+
+        # Update the windows through this cell and check for a win
+        counts = self.line_counts[side]
+        win_length = self.win_length
+        won = False
+        for line in self.geometry.cell_lines[cell]:
+            counts[line] += 1
+            if counts[line] == win_length:
+                won = True
+        if self.threats is not None:
+            self.threats.played(cell, side)
+
+        if won:
             self.game_over = True
             self.winner = self.current_player
-            return True
-        
+            return
+
         # Check for draw
-        if all(self.board[r][c] != "" for r in range(3) for c in range(3)):
+        if len(self.move_stack) == self.size * self.size:
             self.game_over = True
-            return True
-        
+            return
+
         # Switch player
-        self.current_player = "O" if self.current_player == "X" else "X"
-        return True
-    
+        self.current_player = PLAYERS[1 - side]
+
+    def unmake(self):
+        """
+        Take back the last move made with make or make_move.
+
+        Returns:
+            int: Cell index of the move that was taken back
+        """
+        cell = self.move_stack.pop()
+        bit = 1 << cell
+        side = 0 if self.masks[0] & bit else 1
+        self.masks[side] &= ~bit
+
+        counts = self.line_counts[side]
+        for line in self.geometry.cell_lines[cell]:
+            counts[line] -= 1
+        if self.threats is not None:
+            self.threats.unplayed(cell, side)
+
+        self.current_player = PLAYERS[side]
+        self.game_over = False
+        self.winner = None
+        return cell
+
+    def track_threats(self):
+        """
+        Start keeping a ThreatIndex of this model's position.
+
+        Returns:
+            ThreatIndex: The index, updated by every later make and unmake
+        """
+        if self.threats is None:
+            self.threats = ThreatIndex(self)
+        return self.threats
+
     def check_winner(self, row, col):
         """
         Check if the current move resulted in a win.
-        
+
         Args:
             row (int): Row of the last move
             col (int): Column of the last move
-            
+
         Returns:
             bool: True if the current player has won, False otherwise
         """
-        player = self.board[row][col]
-        
-        # Check row
-        if all(self.board[row][c] == player for c in range(3)):
-            return True
-        
-        # Check column
-        if all(self.board[r][col] == player for r in range(3)):
-            return True
-        
-        # Check diagonals
-        if row == col and all(self.board[i][i] == player for i in range(3)):
-            return True
-        
-        if row + col == 2 and all(self.board[i][2-i] == player for i in range(3)):
-            return True
-        
-        return False
-    
+        cell = row * self.size + col
+        bit = 1 << cell
+        if self.masks[0] & bit:
+            counts = self.line_counts[0]
+        elif self.masks[1] & bit:
+            counts = self.line_counts[1]
+        else:
+            return False
+
+        return any(counts[line] == self.win_length for line in self.geometry.cell_lines[cell])
+
     def reset_game(self):
-        """Reset the game to its initial state."""
-        self.board = [["" for _ in range(3)] for _ in range(3)]
+        """Reset the game to its initial state, reusing the existing containers."""
+        self.masks[0] = self.masks[1] = 0
+        for counts in self.line_counts:
+            counts[:] = [0] * len(counts)
+        self.move_stack.clear()
         self.current_player = "X"
         self.game_over = False
-        self.winner = None
\ No newline at end of file
+        self.winner = None
+        if self.threats is not None:
+            self.threats.rebuild()
+        if self.events is not None:
+            self.events.emit(RESET)
@@ -0,0 +1,320 @@
+# game_openings.py - Opening tree over symmetry-canonical positions
+#
+# The tree for a replay archive is kept next to it (same path plus
+# ".openings"). Front ends that append to the archive keep the tree up to
+# date as games finish and save it on exit; load_openings() adds any games
+# archived since the tree was saved, so a query never rescans the archive.
+import os
+import struct
+import time
+from collections import namedtuple
+
+from game_model import board_geometry, board_symmetries
+from game_replay import ReplayArchive
+from game_search import inverse_symmetries
+
+# Plies of each game added to the tree by default.
+DEFAULT_MAX_DEPTH = 12
+
+OPENINGS_SUFFIX = ".openings"
+MAGIC = b"TTBO"
+VERSION = 1
+# magic, version, size, win_length, max_depth (0 for no limit), games, nodes
+_HEADER = struct.Struct("<4sBBBxIQQ")
+# Per node, after its two masks: x_wins, o_wins, draws, child count; then
+# per child its node number and the canonical cell leading to it
+_NODE = struct.Struct("<QQQI")
+_CHILD = struct.Struct("<IH")
+
+OpeningStats = namedtuple("OpeningStats", ["games", "x_wins", "o_wins", "draws"])
+OpeningStats.__doc__ = "Results of the recorded games that passed through a position."
+
+_NO_GAMES = OpeningStats(0, 0, 0, 0)
+
+
+class OpeningTree:
+    """
+    Win/draw/loss counts for every position reached in the opening.
+
+    Positions are merged over the 8 board symmetries: a node is keyed by the
+    smallest (x_mask, o_mask) image of its position, so X in any corner is
+    one node. Each node also remembers its continuations. Walking a line of
+    play keeps all 8 images up to date with one bit operation per move, so
+    recording a game and answering a prefix query both take O(depth).
+    """
+
+    def __init__(self, size=3, win_length=None, max_depth=DEFAULT_MAX_DEPTH):
+        """
+        Initialize an empty tree.
+
+        Args:
+            size (int, optional): Board width and height
+            win_length (int, optional): Marks in a row needed to win
+            max_depth (int, optional): Plies of each game to add, None for all
+        """
+        self.size = size
+        self.win_length = board_geometry(size, win_length).win_length
+        self.max_depth = max_depth
+        self.games = 0
+        # Canonical (x_mask, o_mask) -> [x_wins, o_wins, draws, {child key: canonical cell}]
+        self._nodes = {}
+        self._symmetries = board_symmetries(size)
+        self._inverses = inverse_symmetries(size)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def add_game(self, moves, winner=None):
+        """
+        Count a finished game in every opening position it passed through.
+
+        Args:
+            moves (list): (row, col) pairs in play order
+            winner (str, optional): "X", "O", or None for a draw
+        """
+        result = 0 if winner == "X" else 1 if winner == "O" else 2
+        images = [(0, 0)] * 8
+        key, symmetry = (0, 0), 0
+        parent = self._count(key, result)
+        self.games += 1
+
+        depth = len(moves) if self.max_depth is None else min(self.max_depth, len(moves))
+        for ply in range(depth):
+            row, col = moves[ply]
+            cell = row * self.size + col
+            canonical_cell = self._symmetries[symmetry][cell]
+            images = self._play(images, cell, ply % 2)
+            key, symmetry = self._canonical(images)
+            if key not in parent[3]:
+                parent[3][key] = canonical_cell
+            parent = self._count(key, result)
+
+    def add_games(self, replays):
+        """
+        Count many games, e.g. straight from a replay archive.
+
+        Args:
+            replays (iterable): Objects with ``moves`` and ``winner``, like
+                game_replay.Replay
+
+        Returns:
+            int: Number of games added
+        """
+        added = 0
+        for replay in replays:
+            self.add_game(replay.moves, replay.winner)
+            added += 1
+        return added
+
+    def lookup(self, moves):
+        """
+        Report what happened in the games that reached a position.
+
+        Args:
+            moves (list): (row, col) pairs leading to the position, X first
+
+        Returns:
+            OpeningStats: Results of those games, all zero if none reached it
+        """
+        key, _ = self._walk(moves)
+        node = self._nodes.get(key)
+        return _NO_GAMES if node is None else OpeningStats(node[0] + node[1] + node[2], *node[:3])
+
+    def continuations(self, moves):
+        """
+        List the moves played from a position and how those games ended.
+
+        Symmetric moves are merged and reported once, in the orientation of
+        the position given.
+
+        Args:
+            moves (list): (row, col) pairs leading to the position, X first
+
+        Returns:
+            list: ((row, col), OpeningStats) pairs, most played first
+        """
+        key, symmetry = self._walk(moves)
+        node = self._nodes.get(key)
+        if node is None:
+            return []
+        to_board = self._inverses[symmetry]
+        result = []
+        for child_key, cell in node[3].items():
+            child = self._nodes[child_key]
+            result.append((divmod(to_board[cell], self.size),
+                           OpeningStats(child[0] + child[1] + child[2], *child[:3])))
+        result.sort(key=lambda item: -item[1].games)
+        return result
+
+    def save(self, path):
+        """
+        Write the tree to a file, replacing it atomically.
+
+        Args:
+            path (str): File to write
+        """
+        mask_bytes = (self.size * self.size + 7) // 8
+        numbers = {key: number for number, key in enumerate(self._nodes)}
+        parts = [_HEADER.pack(MAGIC, VERSION, self.size, self.win_length, self.max_depth or 0,
+                              self.games, len(self._nodes))]
+        for (x_mask, o_mask), (x_wins, o_wins, draws, children) in self._nodes.items():
+            parts.append(x_mask.to_bytes(mask_bytes, "little"))
+            parts.append(o_mask.to_bytes(mask_bytes, "little"))
+            parts.append(_NODE.pack(x_wins, o_wins, draws, len(children)))
+            parts.extend(_CHILD.pack(numbers[child], cell) for child, cell in children.items())
+
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(b"".join(parts))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a tree written by save().
+
+        Args:
+            path (str): File to read
+
+        Returns:
+            OpeningTree: The tree
+
+        Raises:
+            ValueError: If the file is not an opening tree of this version
+        """
+        with open(path, "rb") as handle:
+            data = handle.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not an opening tree")
+        magic, version, size, win_length, max_depth, games, count = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an opening tree")
+        if version != VERSION:
+            raise ValueError(f"{path} is opening tree version {version}, expected {VERSION}")
+
+        tree = cls(size, win_length, max_depth or None)
+        tree.games = games
+        mask_bytes = (size * size + 7) // 8
+        keys, nodes, offset = [], [], _HEADER.size
+        try:
+            for _ in range(count):
+                x_mask = int.from_bytes(data[offset:offset + mask_bytes], "little")
+                o_mask = int.from_bytes(data[offset + mask_bytes:offset + 2 * mask_bytes], "little")
+                offset += 2 * mask_bytes
+                x_wins, o_wins, draws, child_count = _NODE.unpack_from(data, offset)
+                offset += _NODE.size
+                children = [_CHILD.unpack_from(data, offset + i * _CHILD.size) for i in range(child_count)]
+                offset += child_count * _CHILD.size
+                keys.append((x_mask, o_mask))
+                nodes.append([x_wins, o_wins, draws, children])
+            for key, node in zip(keys, nodes):
+                node[3] = {keys[number]: cell for number, cell in node[3]}
+                tree._nodes[key] = node
+        except (struct.error, IndexError):
+            raise ValueError(f"{path} is a truncated opening tree") from None
+        return tree
+
+    def _count(self, key, result):
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = [0, 0, 0, {}]
+        node[result] += 1
+        return node
+
+    def _walk(self, moves):
+        images = [(0, 0)] * 8
+        for ply, (row, col) in enumerate(moves):
+            images = self._play(images, row * self.size + col, ply % 2)
+        return self._canonical(images)
+
+    def _play(self, images, cell, side):
+        if side:
+            return [(x, o | 1 << perm[cell]) for (x, o), perm in zip(images, self._symmetries)]
+        return [(x | 1 << perm[cell], o) for (x, o), perm in zip(images, self._symmetries)]
+
+    @staticmethod
+    def _canonical(images):
+        key = min(images)
+        return key, images.index(key)
+
+
+def format_opening(stats):
+    """
+    Summarize an OpeningStats as percentages.
+
+    Args:
+        stats (OpeningStats): The counts
+
+    Returns:
+        str: E.g. "120 games: X 45.0%, draw 40.0%, O 15.0%"
+    """
+    if not stats.games:
+        return "0 games"
+    return (f"{stats.games} games: X {stats.x_wins * 100 / stats.games:.1f}%, "
+            f"draw {stats.draws * 100 / stats.games:.1f}%, O {stats.o_wins * 100 / stats.games:.1f}%")
+
+
+def load_openings(path, size=3, win_length=None, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Load the opening tree kept next to a replay archive, bringing it up to date.
+
+    Only games archived since the tree was last saved are added, and the
+    tree is saved again if there were any. It is rebuilt from the whole
+    archive if it is missing, unreadable or does not match the archive.
+
+    Args:
+        path (str): Replay archive path; it need not exist yet
+        size (int, optional): Board size for a new tree when there is no archive
+        win_length (int, optional): Marks in a row needed to win, likewise
+        max_depth (int, optional): Plies of each game to add to a new tree
+
+    Returns:
+        OpeningTree: The tree; its ``games`` equals the archive's game count
+    """
+    tree = None
+    try:
+        tree = OpeningTree.load(path + OPENINGS_SUFFIX)
+    except (OSError, ValueError):
+        pass
+    if not os.path.exists(path):
+        if tree is None or tree.games or (tree.size, tree.win_length) != (
+                size, board_geometry(size, win_length).win_length):
+            tree = OpeningTree(size, win_length, max_depth)
+        return tree
+
+    with ReplayArchive(path) as archive:
+        if tree is None or tree.games > len(archive) or (tree.size, tree.win_length) != (
+                archive.size, archive.win_length):
+            tree = OpeningTree(archive.size, archive.win_length, max_depth)
+        added = tree.add_games(archive.iter_range(tree.games, len(archive)))
+    if added:
+        save_openings(tree, path)
+    return tree
+
+
+def save_openings(tree, path):
+    """
+    Save a replay archive's opening tree next to it.
+
+    Args:
+        tree (OpeningTree): The tree, e.g. from load_openings
+        path (str): Replay archive path
+    """
+    tree.save(path + OPENINGS_SUFFIX)
+
+
+def build_from_archive(archive, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Build a tree from every game in a replay archive.
+
+    Args:
+        archive (ReplayArchive): The archive to read
+        max_depth (int, optional): Plies of each game to add
+
+    Returns:
+        tuple: (OpeningTree, seconds taken)
+    """
+    started = time.perf_counter()
+    tree = OpeningTree(archive.size, archive.win_length, max_depth)
+    tree.add_games(archive)
+    return tree, time.perf_counter() - started
@@ -0,0 +1,390 @@
+# game_pool.py - Packed game sessions, recycled by a pool and checkpointed to bytes
+import random
+import struct
+from functools import lru_cache
+
+from game_ai import GameAI
+from game_model import BOOM_CHANCE, PLAYERS, GameModel, board_geometry
+from game_replay import move_bits
+from game_stats import GameStats
+
+# AI difficulties a session can be played by, coded from 1; 0 is a human.
+DIFFICULTIES = ("easy", "medium", "hard", "expert", "mcts")
+
+# Layout of CompactSession.flags.
+_O_TO_MOVE = 0x01
+_GAME_OVER = 0x02
+_WINNER_SHIFT = 2  # Two bits: 0 for none, 1 for X, 2 for O
+_HAD_BOOM = 0x10
+_X_AI_SHIFT = 8
+_O_AI_SHIFT = 12
+_AI_BITS = 0xF
+_CONFIG = (_AI_BITS << _X_AI_SHIFT) | (_AI_BITS << _O_AI_SHIFT)
+
+# Snapshot header: magic, format version, board size, win length, session count.
+SNAPSHOT_MAGIC = b"TTBS"
+# Version 2 added the packed moves to each session record.
+SNAPSHOT_VERSION = 2
+_HEADER = struct.Struct("<4sBBBxI")
+# Per session: id and flags, followed by the X and O masks and the packed moves.
+_RECORD = struct.Struct("<IH")
+
+
+@lru_cache(maxsize=None)
+def cell_win_masks(size, win_length=None):
+    """
+    List, for every cell, the masks of the winning windows through it.
+
+    Args:
+        size (int): Board width and height
+        win_length (int, optional): Marks in a row needed to win
+
+    Returns:
+        tuple: Indexed by cell, tuples of window bit masks
+    """
+    geometry = board_geometry(size, win_length)
+    return tuple(tuple(geometry.lines[line] for line in lines) for lines in geometry.cell_lines)
+
+
+def _difficulty_code(difficulty):
+    if difficulty is None:
+        return 0
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"unknown difficulty {difficulty!r}")
+    return DIFFICULTIES.index(difficulty) + 1
+
+
+class CompactSession:
+    """
+    One live game packed into two board masks, a move sequence and a flags word.
+
+    Plays like a GameSession but holds no per-game containers: the side to
+    move, result, boom and both players' difficulties all live in ``flags``,
+    the move count is the number of marks on the board, and the moves are
+    packed into one integer in play order, as in the replay archive.
+    Geometry, AIs, statistics and the boom roll are shared through the
+    owning SessionPool.
+    """
+
+    __slots__ = ("session_id", "x_mask", "o_mask", "moves", "flags", "pool")
+
+    def __init__(self, session_id, pool, flags=0, x_mask=0, o_mask=0, moves=0):
+        """
+        Initialize a session; normally done by SessionPool.acquire.
+
+        Args:
+            session_id (int): Id unique within the pool
+            pool (SessionPool): The pool the session belongs to
+            flags (int, optional): Packed state, see the module constants
+            x_mask (int, optional): Cells holding an X, as bits
+            o_mask (int, optional): Cells holding an O, as bits
+            moves (int, optional): Cell indices in play order, pool.move_bits
+                bits each, first move lowest
+        """
+        self.session_id = session_id
+        self.pool = pool
+        self.flags = flags
+        self.x_mask = x_mask
+        self.o_mask = o_mask
+        self.moves = moves
+
+    @property
+    def current_player(self):
+        """str: The player to move ("X" or "O")."""
+        return PLAYERS[self.flags & _O_TO_MOVE]
+
+    @property
+    def game_over(self):
+        """bool: Whether the game has ended."""
+        return bool(self.flags & _GAME_OVER)
+
+    @property
+    def winner(self):
+        """str: The winning player, or None."""
+        code = self.flags >> _WINNER_SHIFT & 3
+        return PLAYERS[code - 1] if code else None
+
+    @property
+    def had_boom(self):
+        """bool: Whether the win set off the boom."""
+        return bool(self.flags & _HAD_BOOM)
+
+    @property
+    def move_count(self):
+        """int: Marks on the board."""
+        return (self.x_mask | self.o_mask).bit_count()
+
+    @property
+    def difficulties(self):
+        """dict: AI difficulty per player, None for a human."""
+        x_code = self.flags >> _X_AI_SHIFT & _AI_BITS
+        o_code = self.flags >> _O_AI_SHIFT & _AI_BITS
+        return {"X": DIFFICULTIES[x_code - 1] if x_code else None,
+                "O": DIFFICULTIES[o_code - 1] if o_code else None}
+
+    @property
+    def ai_to_move(self):
+        """GameAI: The AI whose turn it is, or None if a human is to move or the game is over."""
+        flags = self.flags
+        if flags & _GAME_OVER:
+            return None
+        shift = _O_AI_SHIFT if flags & _O_TO_MOVE else _X_AI_SHIFT
+        code = flags >> shift & _AI_BITS
+        return self.pool.ai(DIFFICULTIES[code - 1]) if code else None
+
+    @property
+    def move_list(self):
+        """list: The (player, row, col) moves in play order."""
+        bits = self.pool.move_bits
+        mask = (1 << bits) - 1
+        moves = self.moves
+        return [(PLAYERS[number % 2],) + divmod(moves >> (number * bits) & mask, self.pool.size)
+                for number in range(self.move_count)]
+
+    def to_model(self):
+        """
+        Replay the session's moves into a GameModel, e.g. for GameAI.get_move.
+
+        Returns:
+            GameModel: A model of the position, its move stack in play order
+        """
+        pool = self.pool
+        model = GameModel(pool.size, pool.win_length)
+        bits = pool.move_bits
+        mask = (1 << bits) - 1
+        moves = self.moves
+        for number in range(self.move_count):
+            model.make(moves >> (number * bits) & mask)
+        return model
+
+    @property
+    def board(self):
+        """
+        Build a 2D list view of the board.
+
+        Returns:
+            list: size x size list of "X", "O" or "" strings
+        """
+        size = self.pool.size
+        x_mask, o_mask = self.x_mask, self.o_mask
+        return [
+            ["X" if x_mask >> (r * size + c) & 1 else "O" if o_mask >> (r * size + c) & 1 else ""
+             for c in range(size)]
+            for r in range(size)
+        ]
+
+    def play(self, row, col):
+        """
+        Make a move for the player to move.
+
+        Args:
+            row (int): Row index (0 to size - 1)
+            col (int): Column index (0 to size - 1)
+
+        Returns:
+            bool: True if the move was valid and made, False otherwise
+        """
+        pool = self.pool
+        size = pool.size
+        flags = self.flags
+        if flags & _GAME_OVER or not (0 <= row < size and 0 <= col < size):
+            return False
+        cell = row * size + col
+        bit = 1 << cell
+        if (self.x_mask | self.o_mask) & bit:
+            return False
+
+        side = flags & _O_TO_MOVE
+        self.moves |= cell << ((self.x_mask | self.o_mask).bit_count() * pool.move_bits)
+        if side:
+            mask = self.o_mask = self.o_mask | bit
+        else:
+            mask = self.x_mask = self.x_mask | bit
+        move_count = (self.x_mask | self.o_mask).bit_count()
+        pool.stats.record_move(PLAYERS[side], row, col, move_count)
+
+        if any(mask & line == line for line in pool.win_masks[cell]):
+            flags |= _GAME_OVER | (side + 1) << _WINNER_SHIFT
+            if pool.rng.random() < BOOM_CHANCE:
+                flags |= _HAD_BOOM
+        elif move_count == size * size:
+            flags |= _GAME_OVER
+        else:
+            flags ^= _O_TO_MOVE
+        self.flags = flags
+        return True
+
+    def restart(self):
+        """Record the finished game's result, if any, and start a new game."""
+        if self.flags & _GAME_OVER:
+            difficulties = self.difficulties
+            self.pool.stats.record_game_result(
+                winner=self.winner,
+                had_boom=self.had_boom,
+                x_difficulty=difficulties["X"],
+                o_difficulty=difficulties["O"],
+                moves=self.move_list
+            )
+        self.x_mask = self.o_mask = self.moves = 0
+        self.flags &= _CONFIG
+
+
+class SessionPool:
+    """
+    Hands out CompactSessions and takes them back for reuse.
+
+    Released sessions are reset in place and kept on a free list, so a busy
+    server stops allocating once it reaches its peak session count. The live
+    sessions can be checkpointed to bytes and restored in one call.
+    """
+
+    def __init__(self, size=3, win_length=None, stats=None, rng=None):
+        """
+        Initialize an empty pool.
+
+        Args:
+            size (int, optional): Board width and height of every session
+            win_length (int, optional): Marks in a row needed to win
+            stats (GameStats, optional): Statistics every session records
+                into, a new instance without move history by default
+            rng (random.Random, optional): Source for the AIs and the boom roll
+        """
+        geometry = board_geometry(size, win_length)
+        self.size = size
+        self.win_length = geometry.win_length
+        self.win_masks = cell_win_masks(size, self.win_length)
+        self.move_bits = move_bits(size)
+        self.stats = stats if stats is not None else GameStats(size=size, max_history=0)
+        self.rng = rng or random
+        self.live = {}
+        self._ais = {}
+        self._free = []
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self.live)
+
+    @property
+    def idle(self):
+        """int: Released sessions waiting to be reused."""
+        return len(self._free)
+
+    def ai(self, difficulty):
+        """
+        Get the AI for a difficulty, shared by every session in the pool.
+
+        Args:
+            difficulty (str): One of DIFFICULTIES
+
+        Returns:
+            GameAI: The AI
+        """
+        ai = self._ais.get(difficulty)
+        if ai is None:
+            ai = self._ais[difficulty] = GameAI(difficulty=difficulty, win_length=self.win_length,
+                                                rng=self.rng)
+        return ai
+
+    def acquire(self, x_difficulty=None, o_difficulty=None):
+        """
+        Start a session with an empty board.
+
+        Args:
+            x_difficulty (str, optional): AI difficulty playing X, None for a human
+            o_difficulty (str, optional): AI difficulty playing O, None for a human
+
+        Returns:
+            CompactSession: A recycled or new session with a fresh id
+        """
+        flags = _difficulty_code(x_difficulty) << _X_AI_SHIFT | _difficulty_code(o_difficulty) << _O_AI_SHIFT
+        session_id = self._next_id
+        self._next_id += 1
+        if self._free:
+            session = self._free.pop()
+            session.session_id = session_id
+            session.flags = flags
+        else:
+            session = CompactSession(session_id, self, flags)
+        self.live[session_id] = session
+        return session
+
+    def release(self, session):
+        """
+        Return a session to the pool; a game still in progress is dropped unrecorded.
+
+        Args:
+            session (CompactSession): A live session from this pool
+        """
+        if self.live.pop(session.session_id, None) is session:
+            session.x_mask = session.o_mask = session.moves = session.flags = 0
+            self._free.append(session)
+
+    def snapshot(self):
+        """
+        Checkpoint every live session.
+
+        Returns:
+            bytes: Header followed by one fixed-size record per session
+        """
+        mask_bytes, moves_bytes = self._field_sizes()
+        parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.size, self.win_length, len(self.live))]
+        for session in self.live.values():
+            parts.append(_RECORD.pack(session.session_id, session.flags))
+            parts.append(session.x_mask.to_bytes(mask_bytes, "little"))
+            parts.append(session.o_mask.to_bytes(mask_bytes, "little"))
+            parts.append(session.moves.to_bytes(moves_bytes, "little"))
+        return b"".join(parts)
+
+    def restore(self, data):
+        """
+        Bring back the sessions of a snapshot as live sessions, keeping their ids.
+
+        Args:
+            data (bytes): Output of snapshot() from a pool with the same board
+
+        Returns:
+            list: The restored CompactSessions
+
+        Raises:
+            ValueError: If the data is not a snapshot of this board, is of
+                another snapshot version or an id is live
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("not a session snapshot")
+        magic, version, size, win_length, count = _HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a session snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+        if (size, win_length) != (self.size, self.win_length):
+            raise ValueError(f"snapshot is of a {size}x{size} board with win length {win_length}")
+        mask_bytes, moves_bytes = self._field_sizes()
+        record_size = _RECORD.size + 2 * mask_bytes + moves_bytes
+        if len(data) != _HEADER.size + count * record_size:
+            raise ValueError("truncated session snapshot")
+
+        offsets = range(_HEADER.size, len(data), record_size)
+        for offset in offsets:
+            session_id, _ = _RECORD.unpack_from(data, offset)
+            if session_id in self.live:
+                raise ValueError(f"session {session_id} is already live")
+
+        sessions = []
+        for offset in offsets:
+            session_id, flags = _RECORD.unpack_from(data, offset)
+            masks = offset + _RECORD.size
+            session = self._free.pop() if self._free else CompactSession(session_id, self)
+            session.session_id = session_id
+            session.flags = flags
+            session.x_mask = int.from_bytes(data[masks:masks + mask_bytes], "little")
+            session.o_mask = int.from_bytes(data[masks + mask_bytes:masks + 2 * mask_bytes], "little")
+            session.moves = int.from_bytes(data[masks + 2 * mask_bytes:offset + record_size], "little")
+            self.live[session_id] = session
+            sessions.append(session)
+        self._next_id = max([self._next_id] + [session.session_id + 1 for session in sessions])
+        return sessions
+
+    def _field_sizes(self):
+        """Bytes per board mask and per packed move sequence in a snapshot."""
+        cells = self.size * self.size
+        return (cells + 7) // 8, (cells * self.move_bits + 7) // 8
@@ -0,0 +1,343 @@
+# game_replay.py - Append-only replay archive with random access by game number
+#
+# An archive is two files. The data file holds a header and one packed
+# record per game:
+#
+#     varint  move_count << 3 | had_boom << 2 | winner   (winner: 0 draw, 1 X, 2 O)
+#     bytes   the moves' cell indices, move_bits(size) bits each, little-endian
+#
+# so a 3x3 game takes at most 6 bytes. The index file (same path plus ".idx")
+# holds one little-endian uint64 per game: the offset where its record ends.
+# Data is written before the index entry, so a crash can leave unindexed
+# bytes at the end of the data file but never an index entry without data.
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from game_model import PLAYERS, board_geometry
+
+MAGIC = b"TTBR"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBx")  # magic, version, size, win_length
+INDEX_SUFFIX = ".idx"
+_OFFSET = struct.Struct("<Q")
+
+# Games buffered before the writer flushes on its own.
+FLUSH_EVERY = 4096
+
+# Record flag layout, below the move count.
+_WINNER_BITS = 0x03
+_BOOM = 0x04
+_COUNT_SHIFT = 3
+
+Replay = namedtuple("Replay", ["winner", "had_boom", "moves"])
+Replay.__doc__ = "One archived game: winner (None for a draw), boom flag and (row, col) moves in play order."
+
+
+def move_bits(size):
+    """
+    Bits needed to store one move on a board.
+
+    Args:
+        size (int): Board width and height
+
+    Returns:
+        int: 4 for 3x3 and 4x4 boards, 8 up to 16x16, and so on
+    """
+    return max(1, (size * size - 1).bit_length())
+
+
+def encode_game(moves, winner, had_boom, size):
+    """
+    Pack one game into a record.
+
+    Args:
+        moves (list): (row, col) pairs in play order
+        winner (str): "X", "O", or None for a draw
+        had_boom (bool): Whether the boom effect occurred
+        size (int): Board width and height
+
+    Returns:
+        bytes: The record
+    """
+    bits = move_bits(size)
+    head = len(moves) << _COUNT_SHIFT | (_BOOM if had_boom else 0) | (PLAYERS.index(winner) + 1 if winner else 0)
+    record = bytearray()
+    while head >= 0x80:
+        record.append(head & 0x7F | 0x80)
+        head >>= 7
+    record.append(head)
+
+    packed = 0
+    for index, (row, col) in enumerate(moves):
+        packed |= (row * size + col) << (index * bits)
+    record += packed.to_bytes((len(moves) * bits + 7) // 8, "little")
+    return bytes(record)
+
+
+def decode_game(record, size):
+    """
+    Unpack a record made by encode_game.
+
+    Args:
+        record (bytes): The record, e.g. a memoryview slice of the archive
+        size (int): Board width and height
+
+    Returns:
+        Replay: The game
+    """
+    head = 0
+    shift = 0
+    position = 0
+    while True:
+        byte = record[position]
+        position += 1
+        head |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+
+    count = head >> _COUNT_SHIFT
+    bits = move_bits(size)
+    packed = int.from_bytes(record[position:position + (count * bits + 7) // 8], "little")
+    mask = (1 << bits) - 1
+    moves = tuple(divmod(packed >> (index * bits) & mask, size) for index in range(count))
+    winner_code = head & _WINNER_BITS
+    return Replay(PLAYERS[winner_code - 1] if winner_code else None, bool(head & _BOOM), moves)
+
+
+class ReplayWriter:
+    """
+    Appends games to an archive, creating it if needed.
+
+    Writes are buffered; flush() or close() makes them visible to readers.
+    Opening an existing archive drops any unindexed bytes a crash left at
+    the end of its data file.
+    """
+
+    def __init__(self, path, size=3, win_length=None):
+        """
+        Open an archive for appending.
+
+        Args:
+            path (str): Data file path; the index goes next to it
+            size (int, optional): Board width and height of the games
+            win_length (int, optional): Marks in a row needed to win
+
+        Raises:
+            ValueError: If an existing archive is for a different board
+        """
+        win_length = board_geometry(size, win_length).win_length
+        self.path = path
+        self.size = size
+        self.win_length = win_length
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as handle:
+                handle.write(HEADER.pack(MAGIC, VERSION, size, win_length))
+            open(path + INDEX_SUFFIX, "wb").close()
+        else:
+            _check_header(path, size, win_length)
+
+        self._index = open(path + INDEX_SUFFIX, "r+b")
+        count = os.path.getsize(path + INDEX_SUFFIX) // _OFFSET.size
+        self._index.truncate(count * _OFFSET.size)
+        self._index.seek(0, os.SEEK_END)
+        if count:
+            self._index.seek(-_OFFSET.size, os.SEEK_END)
+            (self._end,) = _OFFSET.unpack(self._index.read(_OFFSET.size))
+        else:
+            self._end = HEADER.size
+        self.games = count
+
+        self._data = open(path, "r+b")
+        self._data.truncate(self._end)
+        self._data.seek(self._end)
+        self._pending_offsets = bytearray()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, moves, winner=None, had_boom=False):
+        """
+        Add a finished game.
+
+        Args:
+            moves (list): (row, col) pairs in play order
+            winner (str, optional): "X", "O", or None for a draw
+            had_boom (bool, optional): Whether the boom effect occurred
+
+        Returns:
+            int: The game's number in the archive, counting from 0
+        """
+        record = encode_game(moves, winner, had_boom, self.size)
+        self._data.write(record)
+        self._end += len(record)
+        self._pending_offsets += _OFFSET.pack(self._end)
+        self.games += 1
+        if len(self._pending_offsets) >= FLUSH_EVERY * _OFFSET.size:
+            self.flush()
+        return self.games - 1
+
+    def flush(self):
+        """Write buffered games to disk, data before index."""
+        self._data.flush()
+        self._index.write(self._pending_offsets)
+        self._index.flush()
+        self._pending_offsets.clear()
+
+    def close(self):
+        """Flush and close the archive."""
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+
+class ReplayArchive:
+    """
+    Memory-mapped reader for an archive.
+
+    Opening costs the same for ten games as for a billion: nothing is parsed
+    up front, and get() reads just one index entry and one record. The
+    reader sees the games indexed when it was opened; refresh() picks up
+    games appended since.
+    """
+
+    def __init__(self, path):
+        """
+        Open an archive for reading.
+
+        Args:
+            path (str): Data file path
+
+        Raises:
+            ValueError: If the file is not a replay archive
+        """
+        self.path = path
+        self.size, self.win_length = _check_header(path)
+        self._data = self._index = None
+        self._data_map = self._index_map = None
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, number):
+        return self.get(number)
+
+    def __iter__(self):
+        return self.iter_range(0, len(self))
+
+    def refresh(self):
+        """Map the archive again to see games appended since it was opened."""
+        self.close()
+        self._data = open(self.path, "rb")
+        self._index = open(self.path + INDEX_SUFFIX, "rb")
+        self._data_map = _map(self._data)
+        self._index_map = _map(self._index)
+        # The index is read in place as native uint64s, which matches the
+        # little-endian file format on every platform this runs on
+        entries = len(self._index_map) // _OFFSET.size
+        self._offsets = memoryview(self._index_map)[:entries * _OFFSET.size].cast("Q")
+
+    def raw(self):
+        """
+        Expose the mapped files for bulk readers such as game_analytics.
+
+        Returns:
+            tuple: (data, offsets): the data file as a read-only buffer
+                and a memoryview of the uint64 end offset of each game,
+                both valid until refresh() or close()
+        """
+        return self._data_map, self._offsets
+
+    def get(self, number):
+        """
+        Fetch one game.
+
+        Args:
+            number (int): Game number, counting from 0; negative counts from the end
+
+        Returns:
+            Replay: The game
+
+        Raises:
+            IndexError: If there is no such game
+        """
+        offsets = self._offsets
+        if number < 0:
+            number += len(offsets)
+        if not 0 <= number < len(offsets):
+            raise IndexError(f"game {number} is not in the archive")
+        start = offsets[number - 1] if number else HEADER.size
+        return decode_game(self._data_map[start:offsets[number]], self.size)
+
+    def iter_range(self, start, stop):
+        """
+        Stream consecutive games.
+
+        Both ends are read like slice bounds: negative numbers count from the
+        end and both are clamped to the archive, so a range past the last
+        game yields nothing.
+
+        Args:
+            start (int): First game number
+            stop (int): Game number to stop before
+
+        Yields:
+            Replay: Each game in order
+        """
+        offsets = self._offsets
+        start, stop, _ = slice(start, stop).indices(len(offsets))
+        data = self._data_map
+        begin = offsets[start - 1] if start else HEADER.size
+        for number in range(start, stop):
+            end = offsets[number]
+            # Slicing the map copies the record, so a paused iteration holds
+            # no buffer export and close() or refresh() can always unmap
+            yield decode_game(data[begin:end], self.size)
+            begin = end
+
+    def close(self):
+        """Unmap and close the archive."""
+        if self._index is None:
+            return
+        self._offsets.release()
+        for mapped in (self._data_map, self._index_map):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._data.close()
+        self._index.close()
+        self._data = self._index = None
+
+
+def _map(handle):
+    """Memory-map a file read-only; an empty file maps to empty bytes."""
+    if os.fstat(handle.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _check_header(path, size=None, win_length=None):
+    """Read an archive header, checking it against the expected board if given."""
+    with open(path, "rb") as handle:
+        header = handle.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise ValueError(f"{path} is not a replay archive")
+    magic, version, file_size, file_win_length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a replay archive")
+    if size is not None and (file_size, file_win_length) != (size, win_length):
+        raise ValueError(f"{path} holds {file_size}x{file_size} games with win length {file_win_length}")
+    return file_size, file_win_length
@@ -0,0 +1,373 @@
+# game_search.py - Negamax game-tree search backing the expert AI
+import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from game_model import board_geometry, board_symmetries
+
+# Transposition table entry flags: the stored value is exact, a lower bound
+# (the search failed high) or an upper bound (it failed low).
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Default bound on the number of positions kept per table.
+DEFAULT_TABLE_SIZE = 200000
+
+# Mixed into the key when O is to move, so a position is never confused with
+# the same marks with X to move.
+_O_TO_MOVE_KEY = 0x9E3779B97F4A7C15
+
+_INFINITY = float("inf")
+
+# How many nodes are searched between checks of the deadline and stop flag.
+_CHECK_INTERVAL = 1024
+
+
+class _SearchAborted(Exception):
+    """Raised inside the search when its deadline passes or it is stopped."""
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size):
+    """
+    Build (once) the Zobrist keys for a board size.
+
+    Every (player, cell) pair gets a random 64-bit key. To hash all eight
+    symmetric images of a position at once, the key for a cell is stored as
+    a tuple holding the base key of its image under each symmetry.
+
+    Args:
+        size (int): Board width and height
+
+    Returns:
+        tuple: keys[side][cell] is a tuple of 8 keys, one per symmetry
+    """
+    rng = random.Random(size)  # Fixed seed, so hashes are stable across runs
+    cells = range(size * size)
+    base = [[rng.getrandbits(64) for _ in cells] for _ in range(2)]
+    perms = board_symmetries(size)
+    return tuple(
+        tuple(tuple(base[side][perm[cell]] for perm in perms) for cell in cells)
+        for side in range(2)
+    )
+
+
+@lru_cache(maxsize=None)
+def inverse_symmetries(size):
+    """
+    Build (once) the inverse of each board symmetry.
+
+    Args:
+        size (int): Board width and height
+
+    Returns:
+        tuple: Eight tuples mapping an image cell back to its original cell
+    """
+    inverses = []
+    for perm in board_symmetries(size):
+        inverse = [0] * len(perm)
+        for cell, image in enumerate(perm):
+            inverse[image] = cell
+        inverses.append(tuple(inverse))
+    return tuple(inverses)
+
+
+@lru_cache(maxsize=None)
+def move_order(size, win_length):
+    """
+    Return the cells ordered by how many winning windows pass through them.
+
+    Trying the most connected cells (the center, then corners on 3x3) first
+    makes alpha-beta cut off much earlier.
+
+    Args:
+        size (int): Board width and height
+        win_length (int): Marks in a row needed to win
+
+    Returns:
+        tuple: Cell indices, best candidates first
+    """
+    cell_lines = board_geometry(size, win_length).cell_lines
+    return tuple(sorted(range(size * size), key=lambda cell: -len(cell_lines[cell])))
+
+
+def position_hashes(model):
+    """
+    Compute the Zobrist hash of every symmetric image of a position.
+
+    Args:
+        model (GameModel): The position to hash
+
+    Returns:
+        list: Eight hashes, one per board symmetry
+    """
+    keys = zobrist_keys(model.size)
+    hashes = [0] * 8
+    for side, mask in enumerate(model.masks):
+        cell = 0
+        while mask:
+            if mask & 1:
+                hashes = [h ^ k for h, k in zip(hashes, keys[side][cell])]
+            mask >>= 1
+            cell += 1
+    return hashes
+
+
+def canonical_key(hashes, current_player):
+    """
+    Pick the key shared by all symmetric images of a position.
+
+    Args:
+        hashes (list): The eight symmetric hashes from position_hashes
+        current_player (str): The player to move
+
+    Returns:
+        tuple: (key, symmetry) where symmetry is the index of the image
+            the key was taken from
+    """
+    key = min(hashes)
+    symmetry = hashes.index(key)
+    if current_player == "O":
+        key ^= _O_TO_MOVE_KEY
+    return key, symmetry
+
+
+def canonical_position(model):
+    """
+    Encode a position exactly, identically for all its symmetric images.
+
+    Unlike canonical_key, which picks among hashes, this compares the images'
+    actual board masks, so distinct positions never share an encoding.
+
+    Args:
+        model (GameModel): The position to encode
+
+    Returns:
+        tuple: (encoding, symmetry) where encoding is (x_mask, o_mask, player
+            to move) of the smallest image and symmetry is that image's index
+    """
+    occupied = [[cell for cell in range(model.size * model.size) if mask >> cell & 1]
+                for mask in model.masks]
+    best = None
+    symmetry = 0
+    for index, perm in enumerate(board_symmetries(model.size)):
+        image = tuple(sum(1 << perm[cell] for cell in cells) for cells in occupied)
+        if best is None or image < best:
+            best = image
+            symmetry = index
+    return best + (model.current_player,), symmetry
+
+
+class TranspositionTable:
+    """
+    Bounded cache of searched positions, evicting the least recently used.
+
+    Entries are (depth, value, flag, move) tuples where move is a cell index
+    in the canonical orientation of the position.
+    """
+
+    def __init__(self, max_entries=DEFAULT_TABLE_SIZE):
+        """
+        Initialize an empty table.
+
+        Args:
+            max_entries (int, optional): Number of positions kept before the
+                least recently used ones are evicted
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Look up a position.
+
+        Args:
+            key (int): Canonical position key
+
+        Returns:
+            tuple: The stored entry, or None if the position is not cached
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key, entry):
+        """
+        Store a position, evicting the oldest one if the table is full.
+
+        Args:
+            key (int): Canonical position key
+            entry (tuple): (depth, value, flag, move) for the position
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry and reset the hit and miss counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class NegamaxSearch:
+    """
+    Negamax search with alpha-beta pruning over a GameModel.
+
+    Moves are explored in place with GameModel.make/unmake while the eight
+    symmetric hashes are updated alongside, so equivalent positions share one
+    transposition table entry.
+
+    Scores are from the point of view of the player to move: a win is worth
+    one more than the number of empty cells left after it (so quicker wins
+    score higher), a draw or an unresolved position at the depth limit is 0.
+    """
+
+    def __init__(self, model, table, max_depth=None, deadline=None, stop=None):
+        """
+        Prepare a search from the model's current position.
+
+        Args:
+            model (GameModel): The position to search; it is restored on return
+            table (TranspositionTable): Table shared with other searches on the
+                same board size and win length
+            max_depth (int, optional): Plies to search, None for a full solve
+            deadline (float, optional): time.monotonic() value at which to
+                stop and return the deepest completed result
+            stop (threading.Event, optional): Set from another thread to stop
+                the search the same way
+        """
+        self.model = model
+        self.table = table
+        self.max_depth = max_depth
+        self.deadline = deadline
+        self.stop = stop
+        self.nodes = 0
+        self._keys = zobrist_keys(model.size)
+        self._symmetries = board_symmetries(model.size)
+        self._inverses = inverse_symmetries(model.size)
+        self._order = move_order(model.size, model.win_length)
+        self._cell_count = model.size * model.size
+        self._hashes = position_hashes(model)
+
+    def best_move(self):
+        """
+        Search the position.
+
+        Returns:
+            tuple: (cell, value) for the best move, cell is None if the game
+                is already over
+        """
+        if self.model.game_over:
+            return None, 0
+
+        empty = self._cell_count - len(self.model.move_stack)
+        depth = empty if self.max_depth is None else min(self.max_depth, empty)
+        if self.deadline is None and self.stop is None:
+            value, cell = self._negamax(depth, -_INFINITY, _INFINITY)
+            return cell, value
+
+        # Iterative deepening, so there is a result to return when time is up
+        root_length = len(self.model.move_stack)
+        cell, value = None, 0
+        for iteration_depth in range(1, depth + 1):
+            try:
+                value, cell = self._negamax(iteration_depth, -_INFINITY, _INFINITY)
+            except _SearchAborted:
+                while len(self.model.move_stack) > root_length:
+                    self._unmake()
+                break
+            if value != 0:
+                break  # A forced win or loss was found; deeper search cannot change it
+
+        if cell is None:
+            occupied = self.model.masks[0] | self.model.masks[1]
+            cell = next(c for c in self._order if not occupied >> c & 1)
+        return cell, value
+
+    def _check_limits(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise _SearchAborted()
+        if self.stop is not None and self.stop.is_set():
+            raise _SearchAborted()
+
+    def _make(self, cell):
+        side = 0 if self.model.current_player == "X" else 1
+        self._hashes = [h ^ k for h, k in zip(self._hashes, self._keys[side][cell])]
+        self.model.make(cell)
+
+    def _unmake(self):
+        cell = self.model.unmake()
+        side = 0 if self.model.current_player == "X" else 1
+        self._hashes = [h ^ k for h, k in zip(self._hashes, self._keys[side][cell])]
+
+    def _negamax(self, depth, alpha, beta):
+        self.nodes += 1
+        if self.nodes % _CHECK_INTERVAL == 0 and (self.deadline is not None or self.stop is not None):
+            self._check_limits()
+        model = self.model
+        key, symmetry = canonical_key(self._hashes, model.current_player)
+        original_alpha = alpha
+
+        # Probe the table; a deep enough entry may settle the node outright
+        tt_move = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, entry_value, flag, entry_move = entry
+            if entry_move is not None:
+                tt_move = self._inverses[symmetry][entry_move]
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_value, tt_move
+                if flag == LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value, tt_move
+
+        if depth == 0:
+            return 0, None
+
+        occupied = model.masks[0] | model.masks[1]
+        moves = self._order if tt_move is None else (tt_move,) + self._order
+        best_value = -_INFINITY
+        best_move = None
+        for cell in moves:
+            if occupied >> cell & 1:
+                continue
+            occupied |= 1 << cell  # Skips the TT move when it comes round again
+
+            self._make(cell)
+            if model.game_over:
+                value = self._cell_count - len(model.move_stack) + 1 if model.winner else 0
+            else:
+                value = -self._negamax(depth - 1, -beta, -alpha)[0]
+            self._unmake()
+
+            if value > best_value:
+                best_value = value
+                best_move = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, (depth, best_value, flag, self._symmetries[symmetry][best_move]))
+        return best_value, best_move
\ No newline at end of file
@@ -0,0 +1,407 @@
+# game_server.py - asyncio server hosting many game sessions over TCP
+#
+#     python game_server.py [--port 8765] [--size 3] [--db games.db] [--archive games.ttbr]
+#
+# Clients send one JSON object per line and get one back per request:
+#
+#     {"op": "new", "ai": "medium", "human": "X"}        -> state
+#     {"op": "move", "session": 1, "row": 1, "col": 1}   -> state after the AI replied
+#     {"op": "restart", "session": 1}                    -> state of the new game
+#     {"op": "close", "session": 1}                      -> closed
+#     {"op": "resume", "session": 1}                     -> state of a checkpointed game,
+#                                                           or retries a failed AI move
+#     {"op": "stats"}                                    -> stats
+#
+# A request's "seq" value, if any, is echoed in its reply. A connection can
+# host any number of sessions; they end when the connection closes. With
+# --checkpoint, live sessions are saved periodically and on shutdown, and
+# brought back on the next start for their players to resume.
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import game_trace
+from game_openings import load_openings, save_openings
+from game_pool import SessionPool
+from game_replay import ReplayWriter
+from game_stats import GameStats
+from game_store import GameStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Seconds between checkpoints of the live sessions.
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+
+class _ServedGame:
+    """A session plus the connection it reports to (None until resumed)."""
+
+    __slots__ = ("session_id", "session", "writer", "thinking", "closed")
+
+    def __init__(self, session_id, session, writer):
+        self.session_id = session_id
+        self.session = session
+        self.writer = writer
+        self.thinking = False
+        self.closed = False
+
+
+def _think(requests):
+    """Executor entry point: compute one tick's AI moves."""
+    with game_trace.span("server.ai_batch"):
+        return [ai.get_move(None, model.current_player, model=model) for ai, model in requests]
+
+
+class GameServer:
+    """
+    Hosts human-versus-AI game sessions for many clients on one event loop.
+
+    AI moves are not computed per request. Every session waiting for its AI
+    during an event-loop tick joins one batch, and each batch runs as a
+    single job on a worker thread, so slow searches never stall the loop
+    and the thread handoff is paid once per tick. Sessions are packed
+    CompactSessions recycled through a SessionPool, and all of them record
+    into the pool's GameStats.
+    """
+
+    def __init__(self, size=3, win_length=None, stats=None):
+        """
+        Initialize the server.
+
+        Args:
+            size (int, optional): Board width and height of every session
+            win_length (int, optional): Marks in a row needed to win
+            stats (GameStats, optional): Shared statistics, a new instance by default
+        """
+        self.pool = SessionPool(size, win_length, stats)
+        self.stats = self.pool.stats
+        self.games = {}
+        self.ai_batches = 0
+        self.ai_moves = 0
+        self._pending = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-ai")
+        self._server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Start listening.
+
+        Args:
+            host (str, optional): Interface to bind
+            port (int, optional): Port to bind, 0 for any free port
+
+        Returns:
+            int: The port being listened on
+        """
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Serve until cancelled."""
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and release the AI thread."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self):
+        """
+        Checkpoint every live session.
+
+        Returns:
+            bytes: A SessionPool snapshot
+        """
+        return self.pool.snapshot()
+
+    def restore(self, data):
+        """
+        Bring back checkpointed sessions; each waits for a "resume" request.
+
+        Args:
+            data (bytes): Output of snapshot()
+
+        Returns:
+            int: Number of sessions restored
+        """
+        sessions = self.pool.restore(data)
+        for session in sessions:
+            self.games[session.session_id] = _ServedGame(session.session_id, session, None)
+        return len(sessions)
+
+    async def _handle_client(self, reader, writer):
+        owned = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as error:
+                    self._send(writer, {"op": "error", "error": str(error)})
+                else:
+                    with game_trace.span("server.request"):
+                        self._dispatch(request, writer, owned)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                game = self.games.pop(session_id, None)
+                if game is not None:
+                    self._drop(game)
+            writer.close()
+
+    def _dispatch(self, request, writer, owned):
+        op = request.get("op")
+        seq = request.get("seq")
+        try:
+            if op == "new":
+                self._new_game(request, writer, owned, seq)
+            elif op == "stats":
+                self._send(writer, self._stats_message(seq))
+            elif op in ("move", "restart", "close", "resume"):
+                game = self.games.get(request.get("session"))
+                if game is not None and op == "resume" and game.writer is None:
+                    game.writer = writer
+                    owned.append(game.session_id)
+                elif game is None or game.writer is not writer:
+                    raise ValueError("unknown session")
+                if game.thinking:
+                    raise ValueError("the AI is still moving")
+                if op == "move":
+                    self._human_move(game, int(request["row"]), int(request["col"]), seq)
+                elif op == "restart":
+                    game.session.restart()
+                    self._advance(game, seq)
+                elif op == "resume":
+                    self._advance(game, seq)
+                else:
+                    del self.games[game.session_id]
+                    owned.remove(game.session_id)
+                    self._drop(game)
+                    self._send(writer, {"op": "closed", "session": game.session_id, "seq": seq})
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except (KeyError, TypeError, ValueError) as error:
+            message = str(error) if not isinstance(error, KeyError) else f"missing {error}"
+            self._send(writer, {"op": "error", "error": message, "seq": seq})
+
+    def _new_game(self, request, writer, owned, seq):
+        difficulty = request.get("ai", "medium")
+        human = request.get("human", "X")
+        if human not in ("X", "O"):
+            raise ValueError("human must be 'X' or 'O'")
+        ai_player = "O" if human == "X" else "X"
+        session = self.pool.acquire(**{f"{ai_player.lower()}_difficulty": difficulty})
+        game = _ServedGame(session.session_id, session, writer)
+        self.games[game.session_id] = game
+        owned.append(game.session_id)
+        self._advance(game, seq)
+
+    def _human_move(self, game, row, col, seq):
+        session = game.session
+        if session.game_over:
+            raise ValueError("the game is over")
+        if session.ai_to_move is not None:
+            raise ValueError("it is the AI's turn; send resume")
+        if not session.play(row, col):
+            raise ValueError("illegal move")
+        self._advance(game, seq)
+
+    def _drop(self, game):
+        """Retire a game whose connection or session has closed."""
+        game.closed = True
+        if not game.thinking:
+            self.pool.release(game.session)
+
+    def _advance(self, game, seq):
+        """Reply with the game's state, or queue its AI move if it is the AI's turn."""
+        if game.session.ai_to_move is None:
+            self._send(game.writer, self._state_message(game, seq))
+            return
+        game.thinking = True
+        if not self._pending:
+            asyncio.get_running_loop().call_soon(self._start_batch)
+        self._pending.append((game, seq))
+
+    def _start_batch(self):
+        batch, self._pending = self._pending, []
+        requests = [(game.session.ai_to_move, game.session.to_model()) for game, _ in batch]
+        future = asyncio.get_running_loop().run_in_executor(self._executor, _think, requests)
+        future.add_done_callback(lambda done: self._finish_batch(batch, done))
+        self.ai_batches += 1
+
+    def _finish_batch(self, batch, future):
+        if future.cancelled():
+            return
+        try:
+            moves = future.result()
+        except Exception as error:
+            # Leave each game waiting for its AI; "resume" asks again
+            for game, seq in batch:
+                game.thinking = False
+                if game.closed:
+                    self.pool.release(game.session)
+                    continue
+                self._send(game.writer, {"op": "error", "error": f"AI move failed: {error}",
+                                         "session": game.session_id, "seq": seq})
+            return
+        self.ai_moves += len(moves)
+        for (game, seq), (row, col) in zip(batch, moves):
+            game.thinking = False
+            if game.closed:
+                self.pool.release(game.session)
+                continue
+            game.session.play(row, col)
+            message = self._state_message(game, seq)
+            message["ai_move"] = [row, col]
+            self._send(game.writer, message)
+
+    def _state_message(self, game, seq):
+        session = game.session
+        return {
+            "op": "state",
+            "session": game.session_id,
+            "seq": seq,
+            "board": "".join(mark or "." for row in session.board for mark in row),
+            "to_move": session.current_player,
+            "over": session.game_over,
+            "winner": session.winner,
+            "boom": session.had_boom,
+        }
+
+    def _stats_message(self, seq):
+        stats = self.stats
+        return {
+            "op": "stats",
+            "seq": seq,
+            "sessions": len(self.games),
+            "pooled": self.pool.idle,
+            "games": stats.games_played,
+            "x_wins": stats.x_wins,
+            "o_wins": stats.o_wins,
+            "draws": stats.draws,
+            "booms": stats.boom_occurrences,
+            "moves": stats.total_moves,
+            "ai_batches": self.ai_batches,
+            "ai_moves": self.ai_moves,
+            "cpu_time": time.process_time(),
+        }
+
+    @staticmethod
+    def _send(writer, message):
+        if writer is not None and not writer.is_closing():
+            writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, size=3, win_length=None, store=None,
+                checkpoint=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, archive=None,
+                openings=None):
+    """
+    Run a server until cancelled.
+
+    Args:
+        host (str, optional): Interface to bind
+        port (int, optional): Port to bind, 0 for any free port
+        size (int, optional): Board width and height
+        win_length (int, optional): Marks in a row needed to win
+        store (GameStore, optional): Database every finished game is saved to
+        checkpoint (str, optional): File the live sessions are restored from
+            at start and saved to periodically and on shutdown
+        checkpoint_interval (float, optional): Seconds between checkpoints
+        archive (ReplayWriter, optional): Replay archive every finished game
+            is appended to
+        openings (OpeningTree, optional): Opening tree every finished game
+            is added to
+    """
+    server = GameServer(size, win_length,
+                        GameStats(size=size, max_history=0, store=store, archive=archive, openings=openings))
+    if checkpoint is not None and os.path.exists(checkpoint):
+        with open(checkpoint, "rb") as handle:
+            data = handle.read()
+        try:
+            restored = server.restore(data)
+        except ValueError as error:
+            # Keep the unreadable checkpoint rather than overwrite it with the next save
+            os.replace(checkpoint, checkpoint + ".rejected")
+            print(f"Cannot restore {checkpoint} ({error}); moved it to {checkpoint}.rejected",
+                  file=sys.stderr, flush=True)
+        else:
+            print(f"Restored {restored} sessions from {checkpoint}", flush=True)
+    port = await server.start(host, port)
+    print(f"Serving on {host}:{port}", flush=True)
+
+    async def save_periodically():
+        while True:
+            await asyncio.sleep(checkpoint_interval)
+            _write_checkpoint(server, checkpoint)
+
+    saver = asyncio.create_task(save_periodically()) if checkpoint is not None else None
+    with contextlib.suppress(NotImplementedError):  # No signal handlers on Windows
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        await server.serve_forever()
+    finally:
+        if saver is not None:
+            saver.cancel()
+            _write_checkpoint(server, checkpoint)
+        await server.close()
+
+
+def _write_checkpoint(server, path):
+    """Save the live sessions, replacing the previous checkpoint atomically."""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(server.snapshot())
+    os.replace(temporary, path)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Serve Tic Tac Boom games over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="interface to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to bind, 0 for any")
+    parser.add_argument("--size", type=int, default=3, help="board width and height")
+    parser.add_argument("--win-length", type=int, default=None, help="marks in a row needed to win")
+    parser.add_argument("--db", default=None, help="SQLite database to save finished games to")
+    parser.add_argument("--archive", default=None, help="replay archive to append finished games to")
+    parser.add_argument("--checkpoint", default=None, help="file to checkpoint live sessions to")
+    parser.add_argument("--checkpoint-interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        help="seconds between checkpoints (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    store = GameStore(args.db) if args.db else None
+    archive = openings = None
+    if args.archive:
+        openings = load_openings(args.archive, args.size, args.win_length)
+        archive = ReplayWriter(args.archive, args.size, args.win_length)
+    try:
+        asyncio.run(serve(args.host, args.port, args.size, args.win_length, store,
+                          args.checkpoint, args.checkpoint_interval, archive, openings))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        if store is not None:
+            store.close()
+        if archive is not None:
+            archive.close()
+            save_openings(openings, args.archive)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# game_session.py - Headless game flow shared by the terminal and server front ends
+import random
+
+import game_trace
+from game_ai import GameAI
+from game_events import BOOM
+from game_model import BOOM_CHANCE, GameModel
+from game_stats import GameStats
+
+
+class GameSession:
+    """
+    Runs one game after another without any UI.
+
+    Ties a GameModel to optional AI players and GameStats and applies the
+    boom roll on wins, the same way the Qt game window does.
+    """
+
+    def __init__(self, size=3, win_length=None, x_difficulty=None, o_difficulty=None,
+                 stats=None, rng=None, events=None):
+        """
+        Initialize a session with an empty board.
+
+        Args:
+            size (int, optional): Board width and height
+            win_length (int, optional): Marks in a row needed to win
+            x_difficulty (str, optional): AI difficulty playing X, None for a human
+            o_difficulty (str, optional): AI difficulty playing O, None for a human
+            stats (GameStats, optional): Statistics to record into, a new
+                instance by default
+            rng (random.Random, optional): Source for the AI and the boom roll
+            events (EventStream, optional): Stream the model's events and
+                boom events are reported to, for loggers and analytics
+        """
+        self.model = GameModel(size, win_length, events)
+        self.rng = rng or random
+        self.difficulties = {"X": x_difficulty, "O": o_difficulty}
+        self.ais = {
+            player: GameAI(difficulty=difficulty, win_length=self.model.win_length, rng=rng)
+            for player, difficulty in self.difficulties.items() if difficulty
+        }
+        self.stats = stats if stats is not None else GameStats(size=size)
+        self.move_count = 0
+        self.had_boom = False
+
+    @property
+    def ai_to_move(self):
+        """GameAI: The AI whose turn it is, or None if a human is to move or the game is over."""
+        if self.model.game_over:
+            return None
+        return self.ais.get(self.model.current_player)
+
+    def play(self, row, col):
+        """
+        Make a move for the player to move.
+
+        Args:
+            row (int): Row index (0 to size - 1)
+            col (int): Column index (0 to size - 1)
+
+        Returns:
+            bool: True if the move was valid and made, False otherwise
+        """
+        player = self.model.current_player
+        with game_trace.span("model.make_move"):
+            moved = self.model.make_move(row, col)
+        if not moved:
+            return False
+
+        game_trace.count("moves")
+        self.move_count += 1
+        with game_trace.span("stats.record_move"):
+            self.stats.record_move(player, row, col, self.move_count)
+        if self.model.winner and self.rng.random() < BOOM_CHANCE:
+            self.had_boom = True
+            if self.model.events is not None:
+                self.model.events.emit(BOOM, player, move_number=self.move_count)
+        return True
+
+    def play_ai_move(self):
+        """
+        Let the AI to move pick and play its move.
+
+        Returns:
+            tuple: The (row, col) played, or None if no AI is to move
+        """
+        ai = self.ai_to_move
+        if ai is None:
+            return None
+
+        with game_trace.span("ai.get_move"):
+            row, col = ai.get_move(None, self.model.current_player, model=self.model)
+        self.play(row, col)
+        return row, col
+
+    def restart(self):
+        """Record the finished game's result, if any, and start a new game."""
+        if self.model.game_over:
+            self.stats.record_game_result(
+                winner=self.model.winner,
+                had_boom=self.had_boom,
+                x_difficulty=self.difficulties["X"],
+                o_difficulty=self.difficulties["O"]
+            )
+        self.model.reset_game()
+        self.move_count = 0
+        self.had_boom = False
\ No newline at end of file
@@ -1,27 +1,84 @@
 # game_stats.py - Handles numerical tracking of game statistics
+from array import array
+
+PLAYERS = ("X", "O")
+
+
 class GameStats:
     """
     Tracks and analyzes numerical data about game play.
     Demonstrates numerical programming concepts.
+    
+    Moves are kept in compact typed arrays, optionally as a ring buffer
+    holding only the most recent ones. Position, per-player and total move
+    counts are updated as moves are recorded, so the getters never walk the
+    history and keep counting moves the buffer has already dropped.
     """
     
-    def __init__(self):
-        """Initialize game statistics tracking."""
+    def __init__(self, size=3, max_history=None, store=None, archive=None, openings=None):
+        """
+        Initialize game statistics tracking.
+        
+        Args:
+            size (int, optional): Board width and height
+            max_history (int, optional): Number of most recent moves to keep,
+                None to keep every move
+            store (GameStore, optional): Persistent store every finished game
+                is also written to
+            archive (ReplayWriter, optional): Replay archive every finished
+                game is also appended to
+            openings (OpeningTree, optional): Opening tree every finished game
+                is also added to
+        """
+        self.size = size
+        self.max_history = max_history
+        self.store = store
+        self.archive = archive
+        self.openings = openings
         self.games_played = 0
         self.x_wins = 0
         self.o_wins = 0
         self.draws = 0
         self.boom_occurrences = 0
-        self.move_history = []
+        self.total_moves = 0
+        self.player_moves = {"X": 0, "O": 0}
+        self._position_counts = array("Q", bytes(8 * size * size))
+        
+        # Move history as parallel arrays; once max_history moves are stored,
+        # _start is the index of the oldest one
+        self._players = array("b")
+        self._cells = array("I")
+        self._move_numbers = array("I")
+        self._start = 0
+        
+        # Moves of the game in progress, handed to the store, archive and
+        # opening tree when it ends
+        self._game_moves = []
     
-    def record_game_result(self, winner=None, had_boom=False):
+    def record_game_result(self, winner=None, had_boom=False, x_difficulty=None, o_difficulty=None,
+                           moves=None):
         """
         Record the result of a completed game.
         
         Args:
             winner (str, optional): The winning player ("X" or "O"), or None for a draw
             had_boom (bool, optional): Whether the boom effect occurred
+            x_difficulty (str, optional): AI difficulty playing X, None for a human
+            o_difficulty (str, optional): AI difficulty playing O, None for a human
+            moves (list, optional): The game's (player, row, col) moves for the
+                store, archive and opening tree, defaults to the moves recorded since the
+                last result; pass them when several games share these stats
         """
+        if moves is None:
+            moves = self._game_moves
+        if self.store is not None:
+            self.store.record_game(winner, had_boom, moves, x_difficulty, o_difficulty)
+        if self.archive is not None:
+            self.archive.append([(row, col) for _, row, col in moves], winner, had_boom)
+        if self.openings is not None:
+            self.openings.add_game([(row, col) for _, row, col in moves], winner)
+        self._game_moves = []
+        
         self.games_played += 1
         
         if winner == "X":
@@ -44,12 +101,94 @@ class GameStats:
             col (int): Column index of the move
             move_number (int): The sequential number of this move in the game
         """
-        self.move_history.append({
-            'player': player,
-            'row': row,
-            'col': col,
-            'move_number': move_number
-        })
+        cell = row * self.size + col
+        self.total_moves += 1
+        self.player_moves[player] += 1
+        self._position_counts[cell] += 1
+        self._store_move(PLAYERS.index(player), cell, move_number)
+        if self.store is not None or self.archive is not None or self.openings is not None:
+            self._game_moves.append((player, row, col))
+    
+    def _store_move(self, side, cell, move_number):
+        """Append a move to the history, overwriting the oldest one when full."""
+        if self.max_history is None or len(self._cells) < self.max_history:
+            self._players.append(side)
+            self._cells.append(cell)
+            self._move_numbers.append(move_number)
+        elif self.max_history:
+            index = self._start
+            self._players[index] = side
+            self._cells[index] = cell
+            self._move_numbers[index] = move_number
+            self._start = (index + 1) % self.max_history
+    
+    @property
+    def move_history(self):
+        """
+        Build the retained move history, oldest move first.
+        
+        This materializes one dict per stored move; prefer the counting
+        getters, which do not depend on the history length.
+        
+        Returns:
+            list: Dicts with 'player', 'row', 'col' and 'move_number' keys
+        """
+        order = list(range(self._start, len(self._cells))) + list(range(self._start))
+        return [
+            {
+                'player': PLAYERS[self._players[i]],
+                'row': self._cells[i] // self.size,
+                'col': self._cells[i] % self.size,
+                'move_number': self._move_numbers[i]
+            }
+            for i in order
+        ]
+    
+    def merge(self, other):
+        """
+        Add the results and moves recorded by another GameStats to this one.
+        
+        Args:
+            other (GameStats): Statistics to fold in, e.g. from a worker process
+        """
+        self.games_played += other.games_played
+        self.x_wins += other.x_wins
+        self.o_wins += other.o_wins
+        self.draws += other.draws
+        self.boom_occurrences += other.boom_occurrences
+        self.total_moves += other.total_moves
+        for player in PLAYERS:
+            self.player_moves[player] += other.player_moves[player]
+        for cell, count in enumerate(other._position_counts):
+            self._position_counts[cell] += count
+        
+        order = list(range(other._start, len(other._cells))) + list(range(other._start))
+        for i in order:
+            self._store_move(other._players[i], other._cells[i], other._move_numbers[i])
+    
+    def add_totals(self, x_wins=0, o_wins=0, draws=0, boom_occurrences=0,
+                   player_moves=None, position_counts=None):
+        """
+        Add precomputed counts, e.g. aggregates loaded from a store.
+        
+        Args:
+            x_wins (int, optional): Games won by X
+            o_wins (int, optional): Games won by O
+            draws (int, optional): Drawn games
+            boom_occurrences (int, optional): Games that ended with a boom
+            player_moves (dict, optional): Maps "X" and "O" to move counts
+            position_counts (dict, optional): Maps (row, col) to move counts
+        """
+        self.games_played += x_wins + o_wins + draws
+        self.x_wins += x_wins
+        self.o_wins += o_wins
+        self.draws += draws
+        self.boom_occurrences += boom_occurrences
+        for player, count in (player_moves or {}).items():
+            self.player_moves[player] += count
+            self.total_moves += count
+        for (row, col), count in (position_counts or {}).items():
+            self._position_counts[row * self.size + col] += count
     
     def get_win_percentage(self, player):
         """
@@ -86,13 +225,7 @@ class GameStats:
         Returns:
             dict: A dictionary mapping positions to move counts
         """
-        position_counts = {(r, c): 0 for r in range(3) for c in range(3)}
-        
-        for move in self.move_history:
-            position = (move['row'], move['col'])
-            position_counts[position] += 1
-            
-        return position_counts
+        return {divmod(cell, self.size): count for cell, count in enumerate(self._position_counts)}
     
     def get_average_moves_per_game(self):
         """
@@ -104,5 +237,4 @@ class GameStats:
         if self.games_played == 0:
             return 0.0
             
-        total_moves = len(self.move_history)
-        return total_moves / self.games_played
\ No newline at end of file
+        return self.total_moves / self.games_played
\ No newline at end of file
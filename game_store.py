@@ -0,0 +1,329 @@
+# game_store.py - Persists game results and moves to a local SQLite database
+import math
+import sqlite3
+import time
+from collections import Counter
+
+from game_stats import GameStats
+
+# Games buffered in memory before they are written in one transaction.
+DEFAULT_BATCH_SIZE = 500
+
+# Difficulty label stored for a human player (primary keys cannot be NULL).
+HUMAN = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    winner TEXT,
+    had_boom INTEGER NOT NULL,
+    move_count INTEGER NOT NULL,
+    x_difficulty TEXT NOT NULL,
+    o_difficulty TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_played_at ON games (played_at);
+CREATE INDEX IF NOT EXISTS games_difficulty ON games (x_difficulty, o_difficulty);
+
+CREATE TABLE IF NOT EXISTS moves (
+    game_id INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+
+-- Aggregates maintained in the same transaction as the rows above
+CREATE TABLE IF NOT EXISTS difficulty_totals (
+    x_difficulty TEXT NOT NULL,
+    o_difficulty TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    x_wins INTEGER NOT NULL,
+    o_wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    booms INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    PRIMARY KEY (x_difficulty, o_difficulty)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS hourly_totals (
+    hour INTEGER PRIMARY KEY,
+    games INTEGER NOT NULL,
+    booms INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS position_counts (
+    ply INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (ply, player, row, col)
+) WITHOUT ROWID;
+"""
+
+
+class GameStore:
+    """
+    SQLite-backed archive of every game played.
+
+    Games are buffered and written in batched transactions. Alongside the
+    raw games and moves, the store keeps aggregate tables per difficulty
+    pairing, per hour and per (ply, player, cell), so the reporting queries
+    and load_stats read a few small rows instead of scanning the archive.
+
+    The store assigns game ids itself, so only one process should write to a
+    database at a time.
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Open (creating if needed) a database.
+
+        Args:
+            path (str): Database file, or ":memory:"
+            batch_size (int, optional): Games buffered before an automatic flush
+        """
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._next_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM games").fetchone()[0]
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record_game(self, winner, had_boom, moves, x_difficulty=HUMAN, o_difficulty=HUMAN,
+                    played_at=None):
+        """
+        Buffer a finished game, flushing once a batch is full.
+
+        Args:
+            winner (str): "X", "O", or None for a draw
+            had_boom (bool): Whether the boom effect occurred
+            moves (list): (player, row, col) tuples in play order
+            x_difficulty (str, optional): AI difficulty of X, HUMAN for a person
+            o_difficulty (str, optional): AI difficulty of O, HUMAN for a person
+            played_at (float, optional): Unix time the game ended, defaults to now
+        """
+        if played_at is None:
+            played_at = time.time()
+        self._pending.append((winner, bool(had_boom), list(moves), x_difficulty or HUMAN,
+                              o_difficulty or HUMAN, played_at))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered games and their aggregates in one transaction."""
+        if not self._pending:
+            return
+
+        games = []
+        move_rows = []
+        difficulty = {}
+        hourly = {}
+        positions = Counter()
+        for winner, had_boom, moves, x_difficulty, o_difficulty, played_at in self._pending:
+            game_id = self._next_id
+            self._next_id += 1
+            games.append((game_id, played_at, winner, had_boom, len(moves), x_difficulty, o_difficulty))
+            for ply, (player, row, col) in enumerate(moves, 1):
+                move_rows.append((game_id, ply, player, row, col))
+                positions[(ply, player, row, col)] += 1
+
+            totals = difficulty.setdefault((x_difficulty, o_difficulty), [0, 0, 0, 0, 0, 0])
+            totals[0] += 1
+            totals[1 if winner == "X" else 2 if winner == "O" else 3] += 1
+            totals[4] += had_boom
+            totals[5] += len(moves)
+
+            hour = hourly.setdefault(int(played_at // 3600), [0, 0])
+            hour[0] += 1
+            hour[1] += had_boom
+
+        with self._conn:
+            self._conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)", games)
+            self._conn.executemany("INSERT INTO moves VALUES (?, ?, ?, ?, ?)", move_rows)
+            self._conn.executemany(
+                """INSERT INTO difficulty_totals VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (x_difficulty, o_difficulty) DO UPDATE SET
+                       games = games + excluded.games, x_wins = x_wins + excluded.x_wins,
+                       o_wins = o_wins + excluded.o_wins, draws = draws + excluded.draws,
+                       booms = booms + excluded.booms, moves = moves + excluded.moves""",
+                [key + tuple(values) for key, values in difficulty.items()])
+            self._conn.executemany(
+                """INSERT INTO hourly_totals VALUES (?, ?, ?)
+                   ON CONFLICT (hour) DO UPDATE SET
+                       games = games + excluded.games, booms = booms + excluded.booms""",
+                [(hour, games, booms) for hour, (games, booms) in hourly.items()])
+            self._conn.executemany(
+                """INSERT INTO position_counts VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (ply, player, row, col) DO UPDATE SET
+                       count = count + excluded.count""",
+                [key + (count,) for key, count in positions.items()])
+        self._pending.clear()
+
+    def close(self):
+        """Flush buffered games and close the database."""
+        self.flush()
+        self._conn.close()
+
+    def load_stats(self, size=3, max_history=0):
+        """
+        Rebuild a GameStats from the aggregate tables.
+
+        Only the totals are loaded, not the move history, so this is fast
+        however many games are stored. The returned stats write new games
+        back to this store.
+
+        Args:
+            size (int, optional): Board width and height
+            max_history (int, optional): History limit for moves recorded from now on
+
+        Returns:
+            GameStats: Statistics covering every stored game
+        """
+        self.flush()
+        x_wins, o_wins, draws, booms = self._conn.execute(
+            """SELECT COALESCE(SUM(x_wins), 0), COALESCE(SUM(o_wins), 0),
+                      COALESCE(SUM(draws), 0), COALESCE(SUM(booms), 0)
+               FROM difficulty_totals""").fetchone()
+
+        player_moves = {"X": 0, "O": 0}
+        position_counts = {}
+        for player, row, col, count in self._conn.execute(
+                "SELECT player, row, col, SUM(count) FROM position_counts GROUP BY player, row, col"):
+            player_moves[player] += count
+            position_counts[(row, col)] = position_counts.get((row, col), 0) + count
+
+        stats = GameStats(size=size, max_history=max_history, store=self)
+        stats.add_totals(x_wins=x_wins, o_wins=o_wins, draws=draws, boom_occurrences=booms,
+                         player_moves=player_moves, position_counts=position_counts)
+        return stats
+
+    def win_rate_by_difficulty(self):
+        """
+        Report results for each pairing of difficulties.
+
+        Returns:
+            dict: Maps (x_difficulty, o_difficulty) to a dict with 'games' and
+                the 'x_win', 'o_win', 'draw' and 'boom' percentages
+        """
+        self.flush()
+        report = {}
+        for x_difficulty, o_difficulty, games, x_wins, o_wins, draws, booms in self._conn.execute(
+                "SELECT x_difficulty, o_difficulty, games, x_wins, o_wins, draws, booms "
+                "FROM difficulty_totals"):
+            report[(x_difficulty, o_difficulty)] = {
+                'games': games,
+                'x_win': x_wins / games * 100,
+                'o_win': o_wins / games * 100,
+                'draw': draws / games * 100,
+                'boom': booms / games * 100,
+            }
+        return report
+
+    def boom_percentage(self, since=None, until=None):
+        """
+        Calculate the boom percentage over a time window.
+
+        The window is read from hourly buckets, so it is widened to whole
+        hours: a partial hour at either end counts in full.
+
+        Args:
+            since (float, optional): Unix time the window starts
+            until (float, optional): Unix time the window ends (exclusive)
+
+        Returns:
+            float: Boom occurrence percentage (0-100)
+        """
+        self.flush()
+        first = -1 if since is None else int(since // 3600)
+        last = (1 << 62) if until is None else math.ceil(until / 3600)
+        games, booms = self._conn.execute(
+            "SELECT COALESCE(SUM(games), 0), COALESCE(SUM(booms), 0) "
+            "FROM hourly_totals WHERE hour >= ? AND hour < ?", (first, last)).fetchone()
+        if games == 0:
+            return 0.0
+        return booms / games * 100
+
+    def position_frequency(self, ply=None):
+        """
+        Count how often each cell was played.
+
+        Args:
+            ply (int, optional): Only count the ply-th move of each game,
+                e.g. 1 for opening moves; None counts every move
+
+        Returns:
+            dict: Maps (row, col) to a move count
+        """
+        self.flush()
+        if ply is None:
+            rows = self._conn.execute("SELECT row, col, SUM(count) FROM position_counts GROUP BY row, col")
+        else:
+            rows = self._conn.execute(
+                "SELECT row, col, SUM(count) FROM position_counts WHERE ply = ? GROUP BY row, col", (ply,))
+        return {(row, col): count for row, col, count in rows}
+
+    def export_games(self):
+        """
+        Stream every game's summary in id order, for bulk readers such as game_analytics.
+
+        Returns:
+            sqlite3.Cursor: (id, winner, had_boom, move_count, x_difficulty,
+                o_difficulty, played_at) rows, with winner 1 for X, 2 for O
+                and 0 for a draw
+        """
+        self.flush()
+        return self._conn.execute(
+            "SELECT id, CASE winner WHEN 'X' THEN 1 WHEN 'O' THEN 2 ELSE 0 END, had_boom, move_count, "
+            "x_difficulty, o_difficulty, played_at FROM games ORDER BY id")
+
+    def export_moves(self, size):
+        """
+        Stream every stored move in (game id, ply) order, for bulk readers.
+
+        Args:
+            size (int): Board width and height, to number the cells
+
+        Returns:
+            sqlite3.Cursor: (game_id, ply, cell) rows with cell = row * size + col
+        """
+        self.flush()
+        return self._conn.execute("SELECT game_id, ply, row * ? + col FROM moves ORDER BY game_id, ply", (size,))
+
+    def count(self, table):
+        """
+        Count the rows of a table, e.g. to preallocate a bulk load.
+
+        Args:
+            table (str): "games" or "moves"
+
+        Returns:
+            int: The number of rows
+        """
+        if table not in ("games", "moves"):
+            raise ValueError(f"unknown table {table!r}")
+        self.flush()
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def game_moves(self, game_id):
+        """
+        Fetch the moves of one stored game.
+
+        Args:
+            game_id (int): Id of the game (games are numbered from 1)
+
+        Returns:
+            list: (player, row, col) tuples in play order
+        """
+        self.flush()
+        return self._conn.execute(
+            "SELECT player, row, col FROM moves WHERE game_id = ? ORDER BY ply", (game_id,)).fetchall()
\ No newline at end of file
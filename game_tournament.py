@@ -0,0 +1,366 @@
+# game_tournament.py - AI strength matches that stop as soon as the result is decided
+#
+#     python game_tournament.py hard medium
+#     python game_tournament.py expert hard "expert:search_depth=1" --size 4 --win-length 3
+#
+# Every pair of players plays a match of game pairs: the same seed twice,
+# with colors swapped, so lucky openings cancel out. After each pair a
+# sequential probability ratio test weighs "A is elo1 stronger" against "A
+# is at most elo0 stronger" and the match stops once one of them is accepted
+# at the requested error rates, usually far sooner than a fixed-size batch.
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import deque, namedtuple
+from multiprocessing import Pool
+
+from game_ai import GameAI
+from game_model import PLAYERS, GameModel
+from game_stats import GameStats
+from simulate import play_game
+
+# Default hypotheses, in Elo of the first player over the second.
+DEFAULT_ELO0 = 0.0
+DEFAULT_ELO1 = 20.0
+
+# Default chances of accepting H1 when H0 holds (alpha) and the reverse (beta).
+DEFAULT_ALPHA = 0.05
+DEFAULT_BETA = 0.05
+
+# Pairs played before the test may stop, so the variance estimate means something.
+MIN_PAIRS = 16
+
+# Pairs after which an undecided match is called inconclusive.
+DEFAULT_MAX_PAIRS = 20000
+
+# Game pairs handed to a worker at once.
+PAIRS_PER_TASK = 25
+
+# Floor for the pair-score variance, so a run of identical pairs still decides.
+MIN_VARIANCE = 1e-4
+
+# z for the two-sided 95% confidence interval.
+Z_95 = 1.959964
+
+MatchResult = namedtuple("MatchResult", ["first", "second", "verdict", "pairs", "llr", "elo",
+                                         "elo_low", "elo_high", "wins", "draws", "losses", "stats"])
+MatchResult.__doc__ = """Outcome of one match.
+
+verdict is "H1" (first is at least elo1 stronger), "H0" (at most elo0
+stronger) or "inconclusive". elo, elo_low and elo_high are the first
+player's estimated Elo over the second with a 95% confidence interval;
+wins, draws and losses count its games. stats is the GameStats every
+scored game was recorded in, with the players' specs as difficulties.
+"""
+
+
+def parse_player(spec):
+    """
+    Parse a player given as a difficulty with optional GameAI options.
+
+    Args:
+        spec (str): E.g. "hard" or "expert:search_depth=2,think_time=0.05"
+
+    Returns:
+        tuple: (difficulty, dict of GameAI keyword arguments)
+    """
+    difficulty, _, options = spec.partition(":")
+    kwargs = {}
+    for option in filter(None, options.split(",")):
+        name, _, value = option.partition("=")
+        kwargs[name.strip()] = float(value) if "." in value else int(value)
+    return difficulty, kwargs
+
+
+def score_to_elo(score):
+    """
+    Convert an expected score to an Elo difference.
+
+    Args:
+        score (float): Expected score between 0 and 1
+
+    Returns:
+        float: The Elo difference, infinite for a score of 0 or 1
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_to_score(elo):
+    """
+    Convert an Elo difference to an expected score.
+
+    Args:
+        elo (float): The Elo difference
+
+    Returns:
+        float: Expected score between 0 and 1
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class SPRT:
+    """
+    Generalized sequential probability ratio test on game-pair scores.
+
+    Each pair scores 0, 0.25, 0.5, 0.75 or 1 for the first player. The
+    log-likelihood ratio uses the normal approximation of the pair scores,
+    which stays valid with many draws and needs no draw model.
+    """
+
+    def __init__(self, elo0=DEFAULT_ELO0, elo1=DEFAULT_ELO1, alpha=DEFAULT_ALPHA, beta=DEFAULT_BETA):
+        """
+        Initialize an empty test.
+
+        Args:
+            elo0 (float, optional): Elo difference of the null hypothesis
+            elo1 (float, optional): Elo difference of the alternative
+            alpha (float, optional): Chance of accepting H1 when H0 holds
+            beta (float, optional): Chance of accepting H0 when H1 holds
+        """
+        self.score0 = elo_to_score(elo0)
+        self.score1 = elo_to_score(elo1)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        # Pair counts by score in quarter points: 0, 1, 2, 3, 4
+        self.counts = [0] * 5
+
+    @property
+    def pairs(self):
+        return sum(self.counts)
+
+    def add(self, quarters):
+        """
+        Count one game pair.
+
+        Args:
+            quarters (int): The first player's pair score in quarter points, 0 to 4
+        """
+        self.counts[quarters] += 1
+
+    def mean_and_variance(self):
+        """
+        Estimate the first player's score per pair.
+
+        Returns:
+            tuple: (mean, variance) of the pair scores, (0.5, MIN_VARIANCE)
+                before any pair is played
+        """
+        pairs = self.pairs
+        if not pairs:
+            return 0.5, MIN_VARIANCE
+        mean = sum(q * count for q, count in enumerate(self.counts)) / (4 * pairs)
+        variance = sum((q / 4 - mean) ** 2 * count for q, count in enumerate(self.counts)) / pairs
+        return mean, max(variance, MIN_VARIANCE)
+
+    def llr(self):
+        """
+        Log-likelihood ratio of H1 against H0 so far.
+
+        Returns:
+            float: The ratio, 0.0 before any pair is played
+        """
+        if not self.pairs:
+            return 0.0
+        mean, variance = self.mean_and_variance()
+        return (self.pairs * (self.score1 - self.score0)
+                * (2 * mean - self.score0 - self.score1) / (2 * variance))
+
+    def verdict(self, min_pairs=MIN_PAIRS):
+        """
+        Check whether the test has decided.
+
+        Args:
+            min_pairs (int, optional): Pairs needed before a decision
+
+        Returns:
+            str: "H1", "H0", or None while undecided
+        """
+        if self.pairs < min_pairs:
+            return None
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def elo_interval(self):
+        """
+        Estimate the Elo difference with a 95% confidence interval.
+
+        Returns:
+            tuple: (elo, low, high), (0.0, -inf, inf) before any pair is played
+        """
+        if not self.pairs:
+            return 0.0, -math.inf, math.inf
+        mean, variance = self.mean_and_variance()
+        margin = Z_95 * math.sqrt(variance / self.pairs)
+        return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+
+def play_pairs(task):
+    """
+    Play game pairs with colors swapped, each pair from its own seed.
+
+    Args:
+        task (tuple): (first, second, seeds, size, win_length) where first and
+            second are parse_player results and seeds has one seed per pair
+
+    Returns:
+        list: One (game with first as X, game with second as X) tuple per
+            pair, each game a (winner, had_boom, moves) tuple with winner "X",
+            "O" or None and moves the (player, row, col) tuples in play order
+    """
+    first, second, seeds, size, win_length = task
+    model = GameModel(size, win_length)
+    rng = random.Random()
+    ai_first = GameAI(first[0], win_length=model.win_length, rng=rng, **{"workers": 1, **first[1]})
+    ai_second = GameAI(second[0], win_length=model.win_length, rng=rng, **{"workers": 1, **second[1]})
+    scratch = GameStats(size=size, max_history=0)
+    results = []
+    for seed in seeds:
+        games = []
+        for ai_x, ai_o in ((ai_first, ai_second), (ai_second, ai_first)):
+            rng.seed(seed)
+            model.reset_game()
+            # The scratch stats only serve to read play_game's boom roll
+            booms = scratch.boom_occurrences
+            winner = play_game(model, ai_x, ai_o, scratch, rng)
+            moves = [(PLAYERS[ply % 2],) + divmod(cell, size) for ply, cell in enumerate(model.move_stack)]
+            games.append((winner, scratch.boom_occurrences > booms, moves))
+        results.append(tuple(games))
+    return results
+
+
+def run_match(first, second, size=3, win_length=None, elo0=DEFAULT_ELO0, elo1=DEFAULT_ELO1,
+              alpha=DEFAULT_ALPHA, beta=DEFAULT_BETA, max_pairs=DEFAULT_MAX_PAIRS,
+              workers=None, seed=0, stats=None):
+    """
+    Play one player against another until the SPRT decides.
+
+    Pairs are scored in order whatever the number of workers, so a match is
+    reproducible from its seed; pairs still in flight when the test stops
+    are thrown away.
+
+    Args:
+        first (str): Player spec for parse_player, e.g. "hard"
+        second (str): Player spec of the opponent
+        size (int, optional): Board width and height
+        win_length (int, optional): Marks in a row needed to win
+        elo0 (float, optional): Elo of first over second under H0
+        elo1 (float, optional): Elo of first over second under H1
+        alpha (float, optional): Chance of accepting H1 when H0 holds
+        beta (float, optional): Chance of accepting H0 when H1 holds
+        max_pairs (int, optional): Pairs after which the match is inconclusive
+        workers (int, optional): Worker processes, defaults to the CPU count;
+            1 plays in the calling process
+        seed (int, optional): Base random seed
+        stats (GameStats, optional): Where the scored games are recorded,
+            e.g. one with a store attached; a new one by default
+
+    Returns:
+        MatchResult: The verdict, Elo estimate and statistics
+    """
+    players = (parse_player(first), parse_player(second))
+    test = SPRT(elo0, elo1, alpha, beta)
+    if stats is None:
+        stats = GameStats(size=size, max_history=0)
+    # The first player's wins, draws and losses
+    record = [0, 0, 0]
+
+    def tasks():
+        for start in range(0, max_pairs, PAIRS_PER_TASK):
+            seeds = [seed * 1000003 + pair for pair in range(start, min(start + PAIRS_PER_TASK, max_pairs))]
+            yield players + (seeds, size, win_length)
+
+    def score(results):
+        # Fold in a finished task pair by pair; returns the verdict if it stopped the test
+        for games in results:
+            quarters = 0
+            for (x_player, o_player, first_mark), (winner, had_boom, moves) in zip(
+                    ((first, second, "X"), (second, first, "O")), games):
+                for number, (player, row, col) in enumerate(moves, 1):
+                    stats.record_move(player, row, col, number)
+                stats.record_game_result(winner, had_boom, x_difficulty=x_player, o_difficulty=o_player,
+                                         moves=moves)
+                outcome = 1 if winner is None else 0 if winner == first_mark else 2
+                record[outcome] += 1
+                quarters += 2 - outcome
+            test.add(quarters)
+            verdict = test.verdict()
+            if verdict:
+                return verdict
+        return None
+
+    verdict = None
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for task in tasks():
+            verdict = score(play_pairs(task))
+            if verdict:
+                break
+    else:
+        with Pool(workers) as pool:
+            pending = deque()
+            for task in tasks():
+                pending.append(pool.apply_async(play_pairs, (task,)))
+                if len(pending) < 2 * workers:
+                    continue
+                verdict = score(pending.popleft().get())
+                if verdict:
+                    break
+            while pending and not verdict:
+                verdict = score(pending.popleft().get())
+
+    elo, low, high = test.elo_interval()
+    return MatchResult(first, second, verdict or "inconclusive", test.pairs, test.llr(),
+                       elo, low, high, record[0], record[1], record[2], stats)
+
+
+def format_elo(elo):
+    """Format an Elo difference with its sign."""
+    return f"{elo:+.1f}" if math.isfinite(elo) else ("+inf" if elo > 0 else "-inf")
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Run SPRT matches between Tic Tac Boom AIs.")
+    parser.add_argument("players", nargs="+",
+                        help='two or more players, e.g. hard or "expert:search_depth=2"')
+    parser.add_argument("--size", type=int, default=3, help="board width and height")
+    parser.add_argument("--win-length", type=int, default=None, help="marks in a row needed to win")
+    parser.add_argument("--elo0", type=float, default=DEFAULT_ELO0, help="Elo difference under H0")
+    parser.add_argument("--elo1", type=float, default=DEFAULT_ELO1, help="Elo difference under H1")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="false positive rate")
+    parser.add_argument("--beta", type=float, default=DEFAULT_BETA, help="false negative rate")
+    parser.add_argument("--max-pairs", type=int, default=DEFAULT_MAX_PAIRS,
+                        help="game pairs before a match is called inconclusive")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    args = parser.parse_args(argv)
+    if len(args.players) < 2:
+        parser.error("need at least two players")
+
+    for index, first in enumerate(args.players):
+        for second in args.players[index + 1:]:
+            start = time.perf_counter()
+            result = run_match(first, second, args.size, args.win_length, args.elo0, args.elo1,
+                               args.alpha, args.beta, args.max_pairs, args.workers, args.seed)
+            print(f"{first} vs {second}: {result.verdict} after {result.pairs} pairs "
+                  f"({result.stats.games_played} games, {time.perf_counter() - start:.1f}s), "
+                  f"LLR {result.llr:.2f}")
+            print(f"  Elo {format_elo(result.elo)} "
+                  f"[{format_elo(result.elo_low)}, {format_elo(result.elo_high)}]  "
+                  f"W {result.wins} / D {result.draws} / L {result.losses}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
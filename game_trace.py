@@ -0,0 +1,321 @@
+# game_trace.py - Opt-in span timers, counters and memory snapshots
+#
+# Tracing is off by default. While it is off, span() hands back one shared
+# no-op context manager and count() returns at once, so instrumented code
+# pays a function call and nothing else.
+#
+#     game_trace.enable()
+#     with game_trace.span("ai.get_move"):
+#         ...
+#     game_trace.count("ai.positions", nodes)
+#     tracer = game_trace.disable()
+#     tracer.write_chrome_trace("trace.json")   # open in chrome://tracing
+#     print(tracer.summary())
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Seconds between tracemalloc snapshots while tracing.
+DEFAULT_MEMORY_INTERVAL = 1.0
+
+# Allocation sites kept per snapshot.
+SNAPSHOT_TOP = 10
+
+# The active Tracer, or None while tracing is off.
+_tracer = None
+
+
+class _NullSpan:
+    """Context manager that does nothing; shared by every disabled span."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times one block and hands the result to its tracer."""
+
+    __slots__ = ("_tracer", "_name", "_start")
+
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self._tracer._record_span(self._name, self._start, end)
+        return False
+
+
+class Tracer:
+    """
+    Collects spans, counters and memory snapshots while tracing is on.
+
+    Spans are kept as (name, thread id, start ns, end ns) tuples, so spans
+    from the AI worker thread show up on their own track in the trace.
+    Memory snapshots are taken when a span ends and the snapshot interval
+    has passed, rather than from a timer thread.
+    """
+
+    def __init__(self, memory_interval=DEFAULT_MEMORY_INTERVAL):
+        """
+        Initialize an empty trace.
+
+        Args:
+            memory_interval (float, optional): Seconds between tracemalloc
+                snapshots, None to leave memory untraced
+        """
+        self.memory_interval = memory_interval
+        self.spans = []
+        self.counters = {}
+        # (name, time ns, running total), for the counter tracks
+        self.counter_samples = []
+        # (time ns, current bytes, peak bytes, [(site, bytes, blocks), ...])
+        self.snapshots = []
+        self.started_ns = time.perf_counter_ns()
+        self.stopped_ns = None
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._next_snapshot_ns = self.started_ns
+        if memory_interval is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def span(self, name):
+        """
+        Time a block of code.
+
+        Args:
+            name (str): Span name, dotted by subsystem, e.g. "model.make_move"
+
+        Returns:
+            context manager: Records the span when the block exits
+        """
+        return _Span(self, name)
+
+    def count(self, name, amount=1):
+        """
+        Add to a counter.
+
+        Args:
+            name (str): Counter name
+            amount (int, optional): Amount to add
+        """
+        now = time.perf_counter_ns()
+        with self._lock:
+            total = self.counters.get(name, 0) + amount
+            self.counters[name] = total
+            self.counter_samples.append((name, now, total))
+
+    def stop(self):
+        """Stop the clock and release tracemalloc if this tracer started it."""
+        if self.stopped_ns is None:
+            self.stopped_ns = time.perf_counter_ns()
+        if self._started_tracemalloc:
+            self.take_snapshot()
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def take_snapshot(self):
+        """Record the traced memory and the largest allocation sites now."""
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        top = [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size, stat.count)
+               for stat in snapshot.statistics("lineno")[:SNAPSHOT_TOP]]
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self.snapshots.append((time.perf_counter_ns(), current, peak, top))
+
+    def elapsed(self):
+        """
+        Seconds traced so far, or in total once stopped.
+
+        Returns:
+            float: Elapsed seconds
+        """
+        end = self.stopped_ns if self.stopped_ns is not None else time.perf_counter_ns()
+        return (end - self.started_ns) / 1e9
+
+    def chrome_trace(self):
+        """
+        Build the trace in Chrome trace-event format.
+
+        Spans become complete ("X") events; counters and traced memory become
+        counter ("C") tracks.
+
+        Returns:
+            dict: JSON-serializable trace for chrome://tracing or Perfetto
+        """
+        pid = os.getpid()
+
+        def micros(ns):
+            return (ns - self.started_ns) / 1000
+
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in self._thread_names.items()]
+        for name, tid, start, end in self.spans:
+            events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid,
+                           "tid": tid, "ts": micros(start), "dur": (end - start) / 1000})
+        for name, now, total in self.counter_samples:
+            events.append({"name": name, "ph": "C", "pid": pid, "ts": micros(now),
+                           "args": {name: total}})
+        for now, current, peak, _ in self.snapshots:
+            events.append({"name": "memory", "ph": "C", "pid": pid, "ts": micros(now),
+                           "args": {"current": current, "peak": peak}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        """
+        Write the trace as Chrome trace-event JSON.
+
+        Args:
+            path (str): Output file
+        """
+        with open(path, "w") as handle:
+            json.dump(self.chrome_trace(), handle)
+
+    def summary(self):
+        """
+        Summarize the trace as plain text.
+
+        Returns:
+            str: Per-span call counts and times, counter totals and rates,
+                and the latest memory snapshot
+        """
+        totals = {}
+        for name, _, start, end in self.spans:
+            calls, total, longest = totals.get(name, (0, 0, 0))
+            duration = end - start
+            totals[name] = (calls + 1, total + duration, max(longest, duration))
+
+        elapsed = self.elapsed()
+        lines = [f"Traced {elapsed:.3f} s", "",
+                 f"{'span':<28}{'calls':>9}{'total ms':>12}{'mean us':>12}{'max us':>12}"]
+        for name, (calls, total, longest) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28}{calls:>9}{total / 1e6:>12.3f}"
+                         f"{total / calls / 1000:>12.2f}{longest / 1000:>12.2f}")
+
+        if self.counters:
+            lines += ["", f"{'counter':<28}{'total':>12}{'per second':>14}"]
+            for name, total in sorted(self.counters.items()):
+                rate = total / elapsed if elapsed else 0.0
+                lines.append(f"{name:<28}{total:>12}{rate:>14.1f}")
+
+        if self.snapshots:
+            _, current, peak, top = self.snapshots[-1]
+            lines += ["", f"Memory: {current / 1024:.1f} KiB traced, {peak / 1024:.1f} KiB peak "
+                          f"({len(self.snapshots)} snapshots)"]
+            for site, size, blocks in top:
+                lines.append(f"  {size / 1024:>10.1f} KiB {blocks:>8} blocks  {site}")
+        return "\n".join(lines)
+
+    def _record_span(self, name, start, end):
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        self.spans.append((name, tid, start, end))
+        if self.memory_interval is not None and end >= self._next_snapshot_ns:
+            self._next_snapshot_ns = end + int(self.memory_interval * 1e9)
+            self.take_snapshot()
+
+
+def enable(memory_interval=DEFAULT_MEMORY_INTERVAL, output=None):
+    """
+    Start tracing, replacing any trace in progress.
+
+    Args:
+        memory_interval (float, optional): Seconds between tracemalloc
+            snapshots, None to leave memory untraced
+        output (str, optional): Chrome trace file written at interpreter
+            exit; the summary goes next to it with a .txt extension
+
+    Returns:
+        Tracer: The new tracer
+    """
+    global _tracer
+    disable()
+    _tracer = Tracer(memory_interval)
+    if output is not None:
+        atexit.register(_write_at_exit, _tracer, output)
+    return _tracer
+
+
+def disable():
+    """
+    Stop tracing.
+
+    Returns:
+        Tracer: The tracer that was active, or None
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.stop()
+    return tracer
+
+
+def is_enabled():
+    """
+    Report whether tracing is on.
+
+    Returns:
+        bool: True while a tracer is active
+    """
+    return _tracer is not None
+
+
+def span(name):
+    """
+    Time a block of code if tracing is on.
+
+    Args:
+        name (str): Span name
+
+    Returns:
+        context manager: A timing span, or a shared no-op while tracing is off
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name)
+
+
+def count(name, amount=1):
+    """
+    Add to a counter if tracing is on.
+
+    Args:
+        name (str): Counter name
+        amount (int, optional): Amount to add
+    """
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, amount)
+
+
+def _write_at_exit(tracer, path):
+    tracer.stop()
+    tracer.write_chrome_trace(path)
+    summary_path = os.path.splitext(path)[0] + ".txt"
+    with open(summary_path, "w") as handle:
+        handle.write(tracer.summary() + "\n")
+    print(f"Trace written to {path}, summary to {summary_path}", file=sys.stderr)
@@ -0,0 +1,153 @@
+# game_window.py - Enhanced game window with AI and stats tracking
+from PyQt5.QtWidgets import QMessageBox
+from game_controller import TicTacBoomGame
+from game_events import StatsRecorder
+from game_stats import GameStats
+from game_store import GameStore
+from game_ai import GameAI
+from game_worker import AIWorker
+
+class EnhancedTicTacBoomGame(TicTacBoomGame):
+    """
+    Enhanced version of the Tic Tac Boom game with AI opponent and statistics tracking.
+    """
+
+    def __init__(self, ai_enabled=False, ai_difficulty="medium", track_stats=True,
+                 size=3, win_length=None, stats_path=None, ai_think_time=None, ai_delay=0):
+        """
+        Initialize the enhanced game.
+
+        Args:
+            ai_enabled (bool): Whether to enable AI opponent
+            ai_difficulty (str): AI difficulty level ("easy", "medium", "hard" or "expert")
+            track_stats (bool): Whether to track game statistics
+            size (int): Board width and height
+            win_length (int, optional): Marks in a row needed to win
+            stats_path (str, optional): SQLite database to load statistics from
+                and save every game to
+            ai_think_time (float, optional): Seconds the AI may think per move,
+                for the difficulties that search
+            ai_delay (int, optional): Minimum milliseconds before an AI move is
+                shown; 0 shows it as soon as the AI has decided
+        """
+        # Call parent constructor first
+        super().__init__(size, win_length)
+
+        self.ai_enabled = ai_enabled
+        self.ai_difficulty = ai_difficulty
+        if ai_enabled:
+            self.ai = GameAI(difficulty=ai_difficulty, win_length=self.game_model.win_length,
+                             think_time=ai_think_time)
+            self.ai_worker = AIWorker(self, min_delay=ai_delay)
+            self.ai_worker.move_ready.connect(self._on_ai_move)
+            self.ai_worker.move_failed.connect(self._on_ai_failed)
+            self.ai_worker.ponder(self.ai, self.game_model.board, "O", "X")
+        self._ai_thinking = False
+        self._ai_request = 0
+
+        self.track_stats = track_stats
+        if track_stats:
+            if stats_path:
+                self.stats = GameStore(stats_path).load_stats(size=self.game_model.size)
+            else:
+                self.stats = GameStats(size=self.game_model.size)
+            self.events.subscribe(StatsRecorder(self.stats, o_difficulty=ai_difficulty if ai_enabled else None))
+
+    def make_move(self, row, col):
+        """
+        Handle a click, ignoring it while the AI is to move.
+
+        If the AI's last attempt failed, the click asks it to try again.
+
+        Args:
+            row (int): Row index (0 to size - 1)
+            col (int): Column index (0 to size - 1)
+        """
+        if self._ai_thinking:
+            return
+        if self.ai_enabled and self.game_model.current_player == "O":
+            if not self.game_model.game_over:
+                self._make_ai_move()
+            return
+        super().make_move(row, col)
+
+    def _on_events(self, events):
+        """
+        Update the UI from a batch of game events, then start the AI if it is to move.
+
+        Args:
+            events (list): Events from the game model's stream
+        """
+        super()._on_events(events)
+        if not self.ai_enabled or self._ai_thinking or self.game_model.game_over:
+            return
+
+        # AI move if it's AI's turn; otherwise think ahead while the player does
+        if self.game_model.current_player == "O":
+            self._make_ai_move()
+        else:
+            self.ai_worker.ponder(self.ai, self.game_model.board, "O", "X")
+
+    def _make_ai_move(self):
+        """Ask the AI worker for a move; clicks are ignored until it arrives."""
+        self._ai_thinking = True
+        self._ai_request = self.ai_worker.request_move(self.ai, self.game_model.board, "O")
+
+    def _on_ai_move(self, request, row, col):
+        """Play a move delivered by the AI worker."""
+        if not self._ai_thinking or request != self._ai_request:
+            return
+        self._ai_thinking = False
+        super().make_move(row, col)
+
+    def _on_ai_failed(self, request, message):
+        """Report an AI failure and let a click ask it again."""
+        if not self._ai_thinking or request != self._ai_request:
+            return
+        self._ai_thinking = False
+        self.status_text.setText(f"{message} - click the board to retry")
+
+    def restart_game(self):
+        """Override to show statistics every 5 recorded games after restarting."""
+        finished = self.game_model.game_over
+
+        # Drop any AI move still being computed and the replies pondered
+        if self.ai_enabled:
+            self.ai_worker.cancel()
+            self.ai_worker.clear()
+        self._ai_thinking = False
+
+        # Call the parent restart_game method; its RESET event records the result
+        super().restart_game()
+
+        if self.track_stats and finished:
+            # Deliver the game's events now so the totals include it
+            self.events.flush()
+            if self.stats.games_played % 5 == 0:
+                self._show_stats()
+
+    def closeEvent(self, event):
+        """Stop the AI worker and write buffered games to the database on exit."""
+        # Deliver pending events first: they may still hand the worker a search
+        self.events.flush()
+        if self.ai_enabled:
+            self.ai_worker.shutdown()
+        if self.track_stats and self.stats.store is not None:
+            self.stats.store.close()
+        super().closeEvent(event)
+
+    def _show_stats(self):
+        """Display a message box with current game statistics."""
+        msg = QMessageBox()
+        msg.setWindowTitle("Game Statistics")
+
+        # Build statistics message
+        text = f"Games Played: {self.stats.games_played}\n"
+        text += f"Player X Wins: {self.stats.x_wins} ({self.stats.get_win_percentage('X'):.1f}%)\n"
+        text += f"Player O Wins: {self.stats.o_wins} ({self.stats.get_win_percentage('O'):.1f}%)\n"
+        text += f"Draws: {self.stats.draws}\n"
+        text += f"Boom Occurrences: {self.stats.boom_occurrences} ({self.stats.get_boom_percentage():.1f}%)\n"
+        text += f"Average Moves Per Game: {self.stats.get_average_moves_per_game():.1f}"
+
+        msg.setText(text)
+        msg.exec_()
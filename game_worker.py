@@ -0,0 +1,239 @@
+# game_worker.py - Runs GameAI off the Qt event loop and delivers moves by signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import game_trace
+from game_model import GameModel
+
+
+class AIWorker(QObject):
+    """
+    Computes AI moves on a background thread so the window stays responsive.
+
+    Each request gets an id. The move arrives on the ``move_ready`` signal in
+    the GUI thread, tagged with that id; if the AI raises instead,
+    ``move_failed`` carries the error for that id. Cancelling stops the
+    search in progress and drops any result still on its way.
+
+    While the opponent is thinking, ponder() uses the idle thread to compute
+    the AI's answer to each of their possible replies. A request for a
+    position already pondered is answered from that cache on the next tick,
+    and one for the reply being pondered right now waits for that search
+    instead of starting over.
+    """
+
+    # Request id, row, col
+    move_ready = pyqtSignal(int, int, int)
+
+    # Request id, error message
+    move_failed = pyqtSignal(int, str)
+
+    # Emitted from the worker thread; queued into the GUI thread
+    _finished = pyqtSignal(int, object)
+    _failed = pyqtSignal(int, str)
+    _pondered = pyqtSignal(object, object, object)
+    _ponder_failed = pyqtSignal(object, object, str)
+
+    def __init__(self, parent=None, min_delay=0):
+        """
+        Initialize the worker and its thread.
+
+        Args:
+            parent (QObject, optional): Qt parent, normally the game window
+            min_delay (int, optional): Milliseconds a move is held back after
+                its request, for a paced feel; 0 delivers moves as soon as
+                they are ready
+        """
+        super().__init__(parent)
+        self.min_delay = min_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="game-ai")
+        self._request = 0
+        self._stop = threading.Event()
+        self._started_at = 0.0
+        self._finished.connect(self._on_finished)
+        self._failed.connect(self._on_failed)
+
+        # Pondering: the position pondered, the AI's move for each position
+        # after a reply and the reply position being searched right now, both
+        # written by the worker thread under the lock, and a request waiting
+        # for that search
+        self._lock = threading.Lock()
+        self._ponder_position = None
+        self._ponder_stop = threading.Event()
+        self._ponder_halt = threading.Event()
+        self._cache = {}
+        self._pondering = None
+        self._waiting = None
+        self._pondered.connect(self._on_pondered)
+        self._ponder_failed.connect(self._on_ponder_failed)
+
+    def request_move(self, ai, board, player):
+        """
+        Start computing a move, cancelling any request still running.
+
+        Args:
+            ai (GameAI): The AI to ask
+            board (list): 2D list representing the game board
+            player (str): The AI's player symbol ("X" or "O")
+
+        Returns:
+            int: Id the move will be delivered with
+        """
+        self.cancel()
+        self._request += 1
+        request = self._request
+        self._started_at = time.monotonic()
+
+        # The opponent has replied, so pondering the other replies is wasted
+        # work; halt it unless this request waits for the search under way
+        position = _position(board, player)
+        with self._lock:
+            move = self._cache.get(position)
+            self._ponder_halt.set()
+            if move is None and position == self._pondering:
+                self._waiting = (request, position)
+                return request
+        self._ponder_stop.set()
+        if move is not None:
+            # Answer on the next tick, after the caller has the request id
+            QTimer.singleShot(0, lambda: self._on_finished(request, move))
+            return request
+
+        stop = self._stop = threading.Event()
+
+        def think():
+            if not stop.is_set():
+                try:
+                    with game_trace.span("ai.get_move"):
+                        move = ai.get_move(board, player, stop)
+                except Exception as error:
+                    self._failed.emit(request, f"AI move failed: {error}")
+                    return
+                self._finished.emit(request, move)
+
+        self._executor.submit(think)
+        return request
+
+    def ponder(self, ai, board, player, opponent):
+        """
+        Precompute the AI's move after every reply the opponent could make.
+
+        Replaces the results of pondering any earlier position. Does nothing
+        if this position is already being pondered.
+
+        Args:
+            ai (GameAI): The AI that will be asked
+            board (list): 2D list of the position, with the opponent to move
+            player (str): The AI's player symbol ("X" or "O")
+            opponent (str): The symbol of the player to move now
+        """
+        position = _position(board, opponent)
+        if position == self._ponder_position:
+            return
+        self.clear()
+        self._ponder_position = position
+        cache = self._cache = {}
+        stop = self._ponder_stop = threading.Event()
+        halt = self._ponder_halt = threading.Event()
+        replies = [(row, col) for row, line in enumerate(board) for col, cell in enumerate(line) if not cell]
+
+        def think():
+            # One model for every reply: making and unmaking each reply keeps
+            # its threat index up to date instead of rebuilding it per reply
+            model = GameModel.from_board(board, opponent, ai.win_length)
+            for row, col in replies:
+                reply = [list(line) for line in board]
+                reply[row][col] = opponent
+                key = _position(reply, player)
+                with self._lock:
+                    if halt.is_set():
+                        break
+                    self._pondering = key
+                model.make(row * model.size + col)
+                try:
+                    with game_trace.span("ai.ponder"):
+                        move = ai.get_move(reply, player, stop, model=model)
+                except Exception as error:
+                    # Give up pondering; a request waiting for this search fails with it
+                    with self._lock:
+                        self._pondering = None
+                    self._ponder_failed.emit(cache, key, f"AI move failed: {error}")
+                    break
+                model.unmake()
+                # Cache the move in the same step that clears _pondering, so a
+                # request for this position either finds it or waits for it.
+                # Stop is only set when nobody waits for this search (a request
+                # for another position, or a new game), which may then have
+                # returned early with a best guess that is not worth keeping.
+                with self._lock:
+                    self._pondering = None
+                    if stop.is_set():
+                        break
+                    cache[key] = move
+                self._pondered.emit(cache, key, move)
+
+        self._executor.submit(think)
+
+    def clear(self):
+        """Stop pondering and forget its results, e.g. when a new game starts."""
+        self._ponder_stop.set()
+        self._ponder_halt.set()
+        self._ponder_position = None
+        self._cache = {}
+        self._waiting = None
+
+    def cancel(self):
+        """Stop the running search and discard results of earlier requests."""
+        self._stop.set()
+        self._request += 1
+        self._waiting = None
+
+    def shutdown(self):
+        """Cancel outstanding work and let the thread exit."""
+        self.cancel()
+        self.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_pondered(self, cache, position, move):
+        if cache is not self._cache:
+            return
+        if self._waiting is not None and self._waiting[1] == position:
+            request = self._waiting[0]
+            self._waiting = None
+            self._on_finished(request, move)
+
+    def _on_ponder_failed(self, cache, position, message):
+        if cache is not self._cache:
+            return
+        if self._waiting is not None and self._waiting[1] == position:
+            request = self._waiting[0]
+            self._waiting = None
+            self._on_failed(request, message)
+
+    def _on_failed(self, request, message):
+        if request == self._request:
+            self.move_failed.emit(request, message)
+
+    def _on_finished(self, request, move):
+        if request != self._request or move is None:
+            return
+
+        # Hold the move back only as long as the configured minimum delay
+        elapsed_ms = (time.monotonic() - self._started_at) * 1000
+        remaining_ms = int(self.min_delay - elapsed_ms)
+        if remaining_ms > 0:
+            QTimer.singleShot(remaining_ms, lambda: self._deliver(request, move))
+        else:
+            self._deliver(request, move)
+
+    def _deliver(self, request, move):
+        if request == self._request:
+            self.move_ready.emit(request, move[0], move[1])
+
+
+def _position(board, player):
+    """Key a position and the player to move for the pondering cache."""
+    return tuple(map(tuple, board)), player
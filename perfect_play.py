@@ -0,0 +1,158 @@
+# perfect_play.py - Precomputed perfect-play table for the 3x3 game
+#
+# Run this module as a script to (re)generate perfect_play.bin:
+#
+#     python perfect_play.py [output_path]
+#
+import mmap
+import os
+import struct
+import sys
+
+from game_model import GameModel
+from game_search import NegamaxSearch, TranspositionTable
+
+# File layout: an 8 byte header followed by one byte per position rank.
+MAGIC = b"TTBP"
+HEADER = struct.Struct("<4sBBH")  # magic, size, win_length, reserved
+
+# Each entry packs the best move in the low four bits and the game-theoretic
+# value for the player to move in the next two. Unreachable and finished
+# positions are marked with NO_ENTRY.
+MOVE_BITS = 0x0F
+VALUE_SHIFT = 4
+LOSS, DRAW, WIN = 0, 1, 2
+NO_ENTRY = 0xFF
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect_play.bin")
+
+
+def position_rank(board):
+    """
+    Rank a position as a base-3 number, one digit per cell.
+
+    Cell (row, col) is digit row * size + col, with 0 for empty, 1 for X and
+    2 for O.
+
+    Args:
+        board (list): 2D list representing the game board
+
+    Returns:
+        int: The position's index into the table
+    """
+    rank = 0
+    weight = 1
+    for row in board:
+        for mark in row:
+            if mark == "X":
+                rank += weight
+            elif mark == "O":
+                rank += 2 * weight
+            weight *= 3
+    return rank
+
+
+def build_table(size=3, win_length=3):
+    """
+    Solve every reachable position and pack the results.
+
+    Args:
+        size (int, optional): Board width and height
+        win_length (int, optional): Marks in a row needed to win
+
+    Returns:
+        bytes: The complete file contents, header included
+    """
+    cells = size * size
+    entries = bytearray([NO_ENTRY]) * (3 ** cells)
+    weights = [3 ** cell for cell in range(cells)]
+    table = TranspositionTable(max_entries=1 << 22)
+    model = GameModel(size, win_length)
+    seen = set()
+
+    def visit(rank):
+        if rank in seen or model.game_over:
+            return
+        seen.add(rank)
+
+        move, value = NegamaxSearch(model, table).best_move()
+        code = WIN if value > 0 else LOSS if value < 0 else DRAW
+        entries[rank] = move | (code << VALUE_SHIFT)
+
+        digit = 1 if model.current_player == "X" else 2
+        occupied = model.masks[0] | model.masks[1]
+        for cell in range(cells):
+            if not occupied >> cell & 1:
+                model.make(cell)
+                visit(rank + digit * weights[cell])
+                model.unmake()
+
+    visit(0)
+    return HEADER.pack(MAGIC, size, win_length, 0) + bytes(entries)
+
+
+class PerfectPlayTable:
+    """
+    Read-only view of a generated table, memory-mapped so that opening it
+    costs nothing and every lookup is a single byte read.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        Map a table file into memory.
+
+        Args:
+            path (str, optional): Location of the generated file
+
+        Raises:
+            ValueError: If the file is not a perfect-play table
+        """
+        with open(path, "rb") as handle:
+            self._data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, self.win_length, _ = HEADER.unpack_from(self._data)
+        if magic != MAGIC or len(self._data) != HEADER.size + 3 ** (self.size * self.size):
+            self._data.close()
+            raise ValueError(f"{path} is not a perfect-play table")
+
+    def lookup(self, board, player):
+        """
+        Look up the best move for a position.
+
+        Args:
+            board (list): 2D list representing the game board
+            player (str): The player to move ("X" or "O")
+
+        Returns:
+            tuple: (row, col, value) where value is WIN, DRAW or LOSS for
+                player, or None if the position is not in the table
+        """
+        entry = self._data[HEADER.size + position_rank(board)]
+        if entry == NO_ENTRY:
+            return None
+
+        # Positions are stored for the player whose turn it is in normal play
+        x_count = sum(row.count("X") for row in board)
+        o_count = sum(row.count("O") for row in board)
+        if player != ("X" if x_count == o_count else "O"):
+            return None
+
+        row, col = divmod(entry & MOVE_BITS, self.size)
+        return row, col, entry >> VALUE_SHIFT
+
+    def close(self):
+        """Unmap the file."""
+        self._data.close()
+
+
+def main(argv):
+    """Generate the table file."""
+    path = argv[1] if len(argv) > 1 else DEFAULT_PATH
+    data = build_table()
+    with open(path, "wb") as handle:
+        handle.write(data)
+    reachable = sum(1 for byte in data[HEADER.size:] if byte != NO_ENTRY)
+    print(f"Wrote {reachable} positions ({len(data)} bytes) to {path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
\ No newline at end of file
@@ -0,0 +1,145 @@
+# simulate.py - Headless AI-vs-AI simulation across worker processes
+#
+# Plays games between two GameAI difficulties without Qt, e.g.
+#
+#     python simulate.py 100000 --x hard --o medium --workers 8
+#
+import argparse
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from game_ai import GameAI
+from game_model import BOOM_CHANCE, GameModel
+from game_stats import GameStats
+
+# Games per task handed to a worker; small enough to balance the load,
+# large enough that pickling the results is negligible.
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def play_game(model, ai_x, ai_o, stats, rng):
+    """
+    Play one game to the end and record it.
+
+    Args:
+        model (GameModel): A model in its initial state
+        ai_x (GameAI): The AI playing X
+        ai_o (GameAI): The AI playing O
+        stats (GameStats): Where the moves and result are recorded
+        rng (random.Random): Source for the boom roll
+
+    Returns:
+        str: The winner ("X" or "O"), or None for a draw
+    """
+    move_count = 0
+    while not model.game_over:
+        player = model.current_player
+        ai = ai_x if player == "X" else ai_o
+        row, col = ai.get_move(None, player, model=model)
+        model.make_move(row, col)
+        move_count += 1
+        stats.record_move(player, row, col, move_count)
+
+    # Same boom roll as the game window applies to wins
+    had_boom = model.winner is not None and rng.random() < BOOM_CHANCE
+    stats.record_game_result(winner=model.winner, had_boom=had_boom)
+    return model.winner
+
+
+def run_shard(shard):
+    """
+    Play a batch of games with its own deterministic random stream.
+
+    Args:
+        shard (tuple): (games, x_difficulty, o_difficulty, seed, size,
+            win_length, record_moves)
+
+    Returns:
+        GameStats: Statistics for the batch
+    """
+    games, x_difficulty, o_difficulty, seed, size, win_length, record_moves = shard
+    rng = random.Random(seed)
+    model = GameModel(size, win_length)
+    ai_x = GameAI(difficulty=x_difficulty, win_length=model.win_length, rng=rng)
+    ai_o = GameAI(difficulty=o_difficulty, win_length=model.win_length, rng=rng)
+    stats = GameStats(size=size, max_history=None if record_moves else 0)
+    for _ in range(games):
+        model.reset_game()
+        play_game(model, ai_x, ai_o, stats, rng)
+    return stats
+
+
+def simulate(games, x_difficulty="medium", o_difficulty="medium", workers=None, seed=0,
+             size=3, win_length=None, record_moves=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Play many AI-vs-AI games, sharded across a process pool.
+
+    Each shard is seeded from the base seed and its index, so a run is
+    reproducible whatever the number of workers.
+
+    Args:
+        games (int): Number of games to play
+        x_difficulty (str, optional): Difficulty of the AI playing X
+        o_difficulty (str, optional): Difficulty of the AI playing O
+        workers (int, optional): Worker processes, defaults to the CPU count;
+            1 plays in the calling process
+        seed (int, optional): Base random seed
+        size (int, optional): Board width and height
+        win_length (int, optional): Marks in a row needed to win
+        record_moves (bool, optional): Whether to keep every move in the
+            stats history; move counts are kept either way
+        chunk_size (int, optional): Games per shard
+
+    Returns:
+        GameStats: The merged statistics of all games
+    """
+    shards = []
+    for index, start in enumerate(range(0, games, chunk_size)):
+        count = min(chunk_size, games - start)
+        shards.append((count, x_difficulty, o_difficulty, seed * 1000003 + index,
+                       size, win_length, record_moves))
+
+    stats = GameStats(size=size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(shards) == 1:
+        for shard in shards:
+            stats.merge(run_shard(shard))
+        return stats
+
+    with Pool(min(workers, len(shards))) as pool:
+        for shard_stats in pool.imap_unordered(run_shard, shards):
+            stats.merge(shard_stats)
+    return stats
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI Tic Tac Boom games headlessly.")
+    parser.add_argument("games", type=int, help="number of games to play")
+    parser.add_argument("--x", default="medium", help="difficulty of the AI playing X")
+    parser.add_argument("--o", default="medium", help="difficulty of the AI playing O")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    parser.add_argument("--size", type=int, default=3, help="board width and height")
+    parser.add_argument("--win-length", type=int, default=None, help="marks in a row needed to win")
+    parser.add_argument("--no-moves", action="store_true", help="keep move counts but no move history")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = simulate(args.games, args.x, args.o, args.workers, args.seed,
+                     args.size, args.win_length, not args.no_moves)
+    elapsed = time.perf_counter() - start
+
+    print(f"Games Played: {stats.games_played} in {elapsed:.2f}s "
+          f"({stats.games_played / elapsed:.0f} games/s)")
+    print(f"Player X Wins: {stats.x_wins} ({stats.get_win_percentage('X'):.1f}%)")
+    print(f"Player O Wins: {stats.o_wins} ({stats.get_win_percentage('O'):.1f}%)")
+    print(f"Draws: {stats.draws}")
+    print(f"Boom Occurrences: {stats.boom_occurrences} ({stats.get_boom_percentage():.1f}%)")
+    print(f"Average Moves Per Game: {stats.get_average_moves_per_game():.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,8 +1,44 @@
 # test_game.py
+import asyncio
+import contextlib
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
-from game_model import GameModel
+from game_events import BOOM, MOVE, RESET, WIN, EventStream, StatsRecorder
+from game_model import GameModel, ThreatIndex
+from game_openings import OpeningStats, OpeningTree
 from game_stats import GameStats
-from game_ai import GameAI
+import benchmark
+import game_client
+import game_mcts
+import game_trace
+from game_ai import Analysis, GameAI
+from game_pool import SessionPool
+from game_replay import Replay, ReplayArchive, ReplayWriter, encode_game
+from game_server import GameServer
+from game_session import GameSession
+from game_store import GameStore
+from game_tournament import run_match
+from perfect_play import DRAW
+from simulate import simulate
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+except ImportError:
+    QApplication = None
+
 
 class TestGameModel(unittest.TestCase):
     def setUp(self):
@@ -21,11 +57,160 @@ class TestGameModel(unittest.TestCase):
         self.model.make_move(0, 0)
         self.assertEqual(self.model.board[0][0], "X")
 
+    def test_out_of_board_move_is_rejected(self):
+        """Test that moves off the board are refused without playing another cell."""
+        for row, col in [(0, 3), (-1, 0), (3, 0), (0, -1)]:
+            self.assertFalse(self.model.make_move(row, col))
+        self.assertEqual(self.model.move_stack, [])
+        self.assertEqual(self.model.current_player, "X")
+
     def test_switch_player_after_move(self):
         """Test that the player switches after a valid move."""
         self.model.make_move(0, 0)
         self.assertEqual(self.model.current_player, "O")
 
+    def test_row_win(self):
+        """Test that three in a row wins for the current player."""
+        for row, col in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+            self.model.make_move(row, col)
+        self.assertTrue(self.model.game_over)
+        self.assertEqual(self.model.winner, "X")
+
+    def test_draw(self):
+        """Test that a full board without a line is a draw."""
+        for row, col in [(0, 0), (0, 1), (0, 2), (1, 1), (1, 0),
+                         (1, 2), (2, 1), (2, 0), (2, 2)]:
+            self.model.make_move(row, col)
+        self.assertTrue(self.model.game_over)
+        self.assertIsNone(self.model.winner)
+
+    def test_make_unmake_restores_state(self):
+        """Test that unmake takes back winning moves made with make."""
+        for cell in (0, 3, 1, 4):
+            self.model.make(cell)
+        self.model.make(2)
+        self.assertEqual(self.model.winner, "X")
+        self.assertEqual(self.model.unmake(), 2)
+        self.assertFalse(self.model.game_over)
+        self.assertEqual(self.model.current_player, "X")
+        self.assertEqual(self.model.board[0], ["X", "X", ""])
+
+
+class TestLargeBoard(unittest.TestCase):
+    def setUp(self):
+        self.model = GameModel(size=15, win_length=5)
+
+    def test_five_on_a_diagonal_wins(self):
+        """Test that five in a row on an anti-diagonal wins on a 15x15 board."""
+        for i in range(4):
+            self.model.make_move(2 + i, 12 - i)
+            self.model.make_move(0, i)
+        self.assertFalse(self.model.game_over)
+        self.model.make_move(6, 8)
+        self.assertEqual(self.model.winner, "X")
+        self.assertTrue(self.model.check_winner(4, 10))
+
+    def test_four_in_a_row_does_not_win(self):
+        """Test that four in a row is not enough when five are needed."""
+        for i in range(4):
+            self.model.make_move(7, i)
+            self.model.make_move(8, i + 5)
+        self.assertFalse(self.model.game_over)
+
+    def test_ai_completes_five(self):
+        """Test that the medium AI finds the winning fifth mark."""
+        for i in range(4):
+            self.model.make_move(3, 3 + i)
+            self.model.make_move(10, i)
+        ai = GameAI(difficulty="medium", win_length=5)
+        self.assertIn(ai.get_move(self.model.board, "X"), [(3, 2), (3, 7)])
+
+
+class TestThreatIndex(unittest.TestCase):
+    def test_index_follows_make_and_unmake(self):
+        """Test that the incremental index always matches one built from scratch."""
+        rng = random.Random(4)
+        model = GameModel(9, 4)
+        threats = model.track_threats()
+        for _ in range(400):
+            if model.game_over or (model.move_stack and rng.random() < 0.3):
+                model.unmake()
+            else:
+                model.make(threats.random_cell(rng))
+            fresh = ThreatIndex(model)
+            self.assertEqual(threats.open_lines, fresh.open_lines)
+            self.assertEqual(sorted(threats.candidates), sorted(fresh.candidates))
+            self.assertEqual(sorted(threats.empty), sorted(fresh.empty))
+        model.reset_game()
+        self.assertEqual(threats.candidates, [])
+        self.assertEqual(sorted(threats.empty), list(range(81)))
+
+    def test_win_block_and_fork_queries(self):
+        """Test the threat queries and the AI's use of them through a model."""
+        model = GameModel()
+        for row, col in [(0, 0), (1, 1), (2, 2)]:
+            model.make_move(row, col)
+        threats = model.track_threats()
+        self.assertEqual(threats.fork_cells(0), [2, 6])
+        model.make_move(0, 2)
+        self.assertEqual(threats.winning_cells(0), [])
+        self.assertEqual(threats.winning_cells(1), [6])
+        self.assertEqual(GameAI(difficulty="medium").get_move(None, "X", model=model), (2, 0))
+
+    def test_hard_makes_forks_and_easy_stays_uniform(self):
+        """Test that hard takes a fork before a corner and easy may play far from the marks."""
+        board = [["X", "O", ""], ["", "X", ""], ["", "", "O"]]
+        self.assertEqual(GameAI(difficulty="hard").get_move(board, "X"), (1, 0))
+
+        model = GameModel(15, 5)
+        model.make_move(7, 7)
+        ai = GameAI(difficulty="easy", rng=random.Random(0))
+        moves = {ai.get_move(None, "O", model=model) for _ in range(50)}
+        self.assertTrue(any(max(abs(row - 7), abs(col - 7)) > 2 for row, col in moves))
+
+
+class TestEventStream(unittest.TestCase):
+    def test_events_are_delivered_in_batches(self):
+        """Test delivery per N events and per scheduled tick."""
+        batches = []
+        stream = EventStream(batch_size=3)
+        stream.subscribe(batches.append)
+        model = GameModel(events=stream)
+        for row, col in [(0, 0), (1, 1), (0, 1), (2, 2)]:
+            model.make_move(row, col)
+        self.assertEqual([[event.kind for event in batch] for batch in batches], [[MOVE] * 3])
+        model.make_move(0, 2)
+        self.assertEqual([event.kind for event in batches[1]], [MOVE, MOVE, WIN])
+        self.assertEqual(batches[1][2].player, "X")
+
+        ticks = []
+        stream = EventStream(scheduler=ticks.append)
+        stream.subscribe(batches.append)
+        stream.emit(RESET)
+        stream.emit(RESET)
+        self.assertEqual(len(ticks), 1)
+        ticks.pop()()
+        self.assertEqual(len(batches[-1]), 2)
+
+    def test_stats_recorder_records_games_on_reset(self):
+        """Test that a subscribed recorder sees moves, the boom and the result."""
+        stats = GameStats()
+        stream = EventStream(batch_size=1000)
+        stream.subscribe(StatsRecorder(stats, o_difficulty="hard"))
+        session = GameSession(o_difficulty="hard", stats=GameStats(), rng=random.Random(1), events=stream)
+        session.play(1, 1)
+        while not session.model.game_over:
+            session.play(*next((r, c) for r in range(3) for c in range(3) if session.model.board[r][c] == ""))
+            session.play_ai_move()
+        stream.emit(BOOM, session.model.winner)
+        session.restart()
+        self.assertEqual(stats.games_played, 0)
+        stream.flush()
+        self.assertEqual(stats.games_played, 1)
+        self.assertEqual(stats.boom_occurrences, 1)
+        self.assertEqual(stats.total_moves, len(session.stats.move_history))
+
+
 class TestGameStats(unittest.TestCase):
     def setUp(self):
         self.stats = GameStats()
@@ -47,6 +232,399 @@ class TestGameStats(unittest.TestCase):
         self.stats.record_game_result(winner="X")
         self.assertEqual(self.stats.x_wins, 1)
 
+    def test_merge_adds_counts_and_moves(self):
+        """Test that merging folds another instance's results in."""
+        other = GameStats()
+        other.record_move("X", 1, 1, 1)
+        other.record_game_result(winner="O", had_boom=True)
+        self.stats.record_game_result(winner="X")
+        self.stats.merge(other)
+        self.assertEqual(self.stats.games_played, 2)
+        self.assertEqual(self.stats.o_wins, 1)
+        self.assertEqual(self.stats.boom_occurrences, 1)
+        self.assertEqual(self.stats.get_move_frequency_by_position()[(1, 1)], 1)
+
+    def test_history_limit_keeps_latest_moves_and_all_counts(self):
+        """Test that a bounded history drops old moves but not their counts."""
+        stats = GameStats(max_history=3)
+        for number, (row, col) in enumerate([(0, 0), (1, 1), (2, 2), (0, 1), (0, 0)], 1):
+            stats.record_move("X" if number % 2 else "O", row, col, number)
+        stats.record_game_result(winner="X")
+        self.assertEqual([move['move_number'] for move in stats.move_history], [3, 4, 5])
+        self.assertEqual(stats.get_move_frequency_by_position()[(0, 0)], 2)
+        self.assertEqual(stats.player_moves, {"X": 3, "O": 2})
+        self.assertEqual(stats.get_average_moves_per_game(), 5.0)
+
+
+class TestGameStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "stats.db")
+
+    def test_stats_survive_a_reload(self):
+        """Test that recorded games are reloaded from the aggregates."""
+        with GameStore(self.path, batch_size=2) as store:
+            stats = store.load_stats()
+            for winner, booms in [("X", True), ("O", False), (None, False)]:
+                stats.record_move("X", 1, 1, 1)
+                stats.record_move("O", 0, 0, 2)
+                stats.record_game_result(winner=winner, had_boom=booms, o_difficulty="hard")
+
+        with GameStore(self.path) as store:
+            stats = store.load_stats()
+            self.assertEqual(stats.games_played, 3)
+            self.assertEqual((stats.x_wins, stats.o_wins, stats.draws), (1, 1, 1))
+            self.assertEqual(stats.boom_occurrences, 1)
+            self.assertEqual(stats.get_move_frequency_by_position()[(1, 1)], 3)
+            self.assertEqual(stats.get_average_moves_per_game(), 2.0)
+            self.assertEqual(store.position_frequency(ply=2), {(0, 0): 3})
+            self.assertEqual(store.win_rate_by_difficulty()[("", "hard")]['games'], 3)
+            self.assertEqual(store.game_moves(2), [("X", 1, 1), ("O", 0, 0)])
+
+    def test_boom_percentage_over_a_window(self):
+        """Test that the boom rate only counts games inside the window."""
+        with GameStore(self.path) as store:
+            store.record_game("X", True, [], played_at=3600 * 10)
+            store.record_game("X", False, [], played_at=3600 * 20)
+            self.assertEqual(store.boom_percentage(since=3600 * 15), 0.0)
+            self.assertEqual(store.boom_percentage(until=3600 * 15), 100.0)
+            self.assertEqual(store.boom_percentage(), 50.0)
+
+            # Games from the hour in progress count, e.g. for until=time.time()
+            self.assertEqual(store.boom_percentage(since=3600 * 20 + 600, until=3600 * 20 + 1200), 0.0)
+            self.assertEqual(store.boom_percentage(until=3600 * 20 + 1), 50.0)
+            self.assertEqual(store.boom_percentage(until=3600 * 20), 100.0)
+
+
+class TestReplayArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.ttbr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_games_round_trip_with_random_access(self):
+        """Test that archived games come back by number and by range."""
+        games = [([(1, 1), (0, 0), (0, 2), (2, 0), (1, 0), (1, 2), (0, 1), (2, 1), (2, 2)], None, False),
+                 ([(0, 0), (1, 1), (0, 1), (2, 2), (0, 2)], "X", True),
+                 ([(1, 1), (0, 0), (2, 2), (0, 2), (2, 0), (0, 1)], "O", False)]
+        with ReplayWriter(self.path) as writer:
+            for moves, winner, had_boom in games:
+                writer.append(moves, winner, had_boom)
+        self.assertLessEqual(len(encode_game(*games[0], size=3)), 6)
+
+        with ReplayArchive(self.path) as archive:
+            self.assertEqual(len(archive), 3)
+            self.assertEqual(archive.get(1), Replay("X", True, tuple(games[1][0])))
+            self.assertEqual(archive[-1].winner, "O")
+            self.assertEqual([replay.moves for replay in archive.iter_range(1, 10)],
+                             [tuple(moves) for moves, _, _ in games[1:]])
+            with self.assertRaises(IndexError):
+                archive.get(3)
+
+    def test_ranges_clamp_like_slices_and_close_mid_iteration(self):
+        """Test out-of-range and negative bounds, and closing while a range is being read."""
+        with ReplayWriter(self.path) as writer:
+            for cell in range(5):
+                writer.append([divmod(cell, 3)])
+
+        archive = ReplayArchive(self.path)
+        first = lambda start, stop: [replay.moves[0] for replay in archive.iter_range(start, stop)]
+        self.assertEqual(first(10, 20), [])
+        self.assertEqual(first(-2, 10), [(1, 0), (1, 1)])
+        self.assertEqual(first(-10, 2), [(0, 0), (0, 1)])
+        self.assertEqual(first(3, 1), [])
+
+        games = archive.iter_range(0, 5)
+        next(games)
+        archive.refresh()
+        archive.close()
+
+    def test_stats_append_finished_games_and_recover_torn_writes(self):
+        """Test the GameStats attachment and that unindexed bytes are dropped."""
+        with ReplayWriter(self.path, 4, 3) as writer:
+            session = GameSession(4, 3, "medium", "hard", stats=GameStats(size=4, archive=writer),
+                                  rng=random.Random(2))
+            while not session.model.game_over:
+                session.play_ai_move()
+            played = [divmod(cell, 4) for cell in session.model.move_stack]
+            session.restart()
+        with open(self.path, "ab") as handle:
+            handle.write(b"\x99torn")
+
+        with ReplayWriter(self.path, 4, 3) as writer:
+            writer.append([(0, 0)])
+        with ReplayArchive(self.path) as archive:
+            self.assertEqual(len(archive), 2)
+            self.assertEqual(list(archive[0].moves), played)
+            self.assertEqual(archive[1].moves, ((0, 0),))
+
+
+class TestOpeningTree(unittest.TestCase):
+    def test_symmetric_openings_share_nodes(self):
+        """Test that games are merged over symmetries and queried in the caller's orientation."""
+        stats = GameStats(openings=OpeningTree())
+        for moves, winner in [([(0, 0), (1, 1), (0, 1), (2, 2), (0, 2)], "X"),
+                              ([(2, 2), (1, 1), (2, 1), (0, 0), (2, 0)], "X"),
+                              ([(0, 2), (1, 1), (2, 0), (0, 0), (2, 2), (0, 1)], "O")]:
+            for number, (row, col) in enumerate(moves):
+                stats.record_move("XO"[number % 2], row, col, number + 1)
+            stats.record_game_result(winner)
+
+        tree = stats.openings
+        self.assertEqual(tree.lookup([]), OpeningStats(3, 2, 1, 0))
+        self.assertEqual(tree.lookup([(2, 0), (1, 1)]), OpeningStats(3, 2, 1, 0))
+        self.assertEqual(tree.lookup([(1, 1)]), OpeningStats(0, 0, 0, 0))
+        # From X top-right, O center: X's reply along the top edge won twice,
+        # the opposite corner lost once
+        replies = dict(tree.continuations([(0, 2), (1, 1)]))
+        self.assertEqual(len(replies), 2)
+        self.assertEqual(replies.get((0, 1), replies.get((1, 2))), OpeningStats(2, 2, 0, 0))
+        self.assertEqual(replies[(2, 0)], OpeningStats(1, 0, 1, 0))
+
+    def test_tree_kept_next_to_archive_catches_up(self):
+        """Test that a saved tree reloads intact and only adds games archived since."""
+        from game_openings import OPENINGS_SUFFIX, build_from_archive, load_openings, save_openings
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.ttbr")
+            tree = load_openings(path)
+            with ReplayWriter(path) as writer:
+                stats = GameStats(archive=writer, openings=tree)
+                for moves, winner in [([(1, 1), (0, 0), (0, 1), (2, 1), (0, 2), (2, 0), (1, 0), (1, 2), (2, 2)], None),
+                                      ([(0, 0), (1, 1), (0, 1), (0, 2), (2, 2), (2, 0)], "O")]:
+                    for number, (row, col) in enumerate(moves):
+                        stats.record_move("XO"[number % 2], row, col, number + 1)
+                    stats.record_game_result(winner)
+            save_openings(tree, path)
+            with ReplayWriter(path) as writer:
+                writer.append([(2, 2), (1, 1), (2, 1)], None)
+
+            loaded = load_openings(path)
+            self.assertEqual(loaded.games, 3)
+            self.assertEqual(loaded.lookup([(0, 0)]), OpeningStats(2, 0, 1, 1))
+            with ReplayArchive(path) as archive:
+                rebuilt, _ = build_from_archive(archive)
+            self.assertEqual(loaded.continuations([(0, 0)]), rebuilt.continuations([(0, 0)]))
+            self.assertEqual(OpeningTree.load(path + OPENINGS_SUFFIX).games, 3)
+
+
+class TestGameSession(unittest.TestCase):
+    def test_ai_session_records_games(self):
+        """Test that a headless AI-vs-AI session records moves and results."""
+        session = GameSession(x_difficulty="expert", o_difficulty="hard", rng=random.Random(1))
+        while session.play_ai_move():
+            pass
+        self.assertTrue(session.model.game_over)
+        session.restart()
+        self.assertEqual(session.stats.games_played, 1)
+        self.assertEqual(session.stats.total_moves, session.stats.get_average_moves_per_game())
+        self.assertFalse(session.model.game_over)
+
+    def test_core_imports_without_qt(self):
+        """Test that the entry point and terminal game do not load Qt."""
+        code = "import sys, main, cli; sys.exit('PyQt5' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.returncode, 0)
+
+
+class TestSimulation(unittest.TestCase):
+    def test_simulation_is_reproducible(self):
+        """Test that the same seed gives the same results."""
+        first = simulate(50, "easy", "medium", workers=1, seed=7, chunk_size=20)
+        second = simulate(50, "easy", "medium", workers=1, seed=7, chunk_size=20)
+        self.assertEqual(first.games_played, 50)
+        self.assertEqual((first.x_wins, first.o_wins, first.boom_occurrences),
+                         (second.x_wins, second.o_wins, second.boom_occurrences))
+        self.assertEqual(first.move_history, second.move_history)
+
+
+class TestTournament(unittest.TestCase):
+    def test_sprt_stops_early_and_records_games(self):
+        """Test that a lopsided match stops early and a mirror match accepts H0."""
+        with tempfile.TemporaryDirectory() as directory, \
+                GameStore(os.path.join(directory, "stats.db")) as store:
+            result = run_match("hard", "easy", workers=1, stats=GameStats(store=store))
+            self.assertEqual(result.verdict, "H1")
+            self.assertLess(result.pairs, 100)
+            self.assertGreater(result.elo_low, 0)
+            self.assertEqual(result.wins + result.draws + result.losses, 2 * result.pairs)
+            self.assertEqual(store.win_rate_by_difficulty()[("hard", "easy")]["games"], result.pairs)
+            moves = result.stats.total_moves
+            self.assertGreaterEqual(moves, 5 * 2 * result.pairs)
+            self.assertEqual(store.count("moves"), moves)
+            self.assertEqual(sum(store.position_frequency().values()), moves)
+            first_game = store.game_moves(1)
+            self.assertEqual([player for player, _, _ in first_game[:2]], ["X", "O"])
+
+        mirror = run_match("medium", "medium", workers=1)
+        self.assertEqual(mirror.verdict, "H0")
+        self.assertEqual(mirror.wins, mirror.losses)
+
+    def test_empty_match_reports_neutral_estimates(self):
+        """Test that a match with no pairs played is inconclusive instead of dividing by zero."""
+        result = run_match("hard", "easy", max_pairs=0, workers=1)
+        self.assertEqual((result.verdict, result.pairs, result.llr), ("inconclusive", 0, 0.0))
+        self.assertEqual((result.elo, result.elo_low, result.elo_high), (0.0, -math.inf, math.inf))
+
+
+class TestSessionPool(unittest.TestCase):
+    def test_session_plays_like_game_session(self):
+        """Test that a compact session reaches the same result as GameSession."""
+        pool = SessionPool(rng=random.Random(1))
+        compact = pool.acquire(o_difficulty="hard")
+        session = GameSession(o_difficulty="hard", rng=random.Random(1))
+        for row, col in [(0, 0), (2, 2), (0, 1), (1, 1), (0, 2)]:
+            self.assertEqual(compact.play(row, col), session.play(row, col))
+        self.assertFalse(compact.play(1, 0))
+        self.assertEqual(compact.board, session.model.board)
+        self.assertEqual((compact.winner, compact.game_over, compact.move_count), ("X", True, 5))
+        self.assertEqual(compact.move_list[-2:], [("O", 1, 1), ("X", 0, 2)])
+        self.assertEqual(compact.to_model().move_stack, session.model.move_stack)
+
+        compact.restart()
+        self.assertEqual(pool.stats.x_wins, 1)
+        self.assertEqual(compact.move_count, 0)
+        self.assertEqual(compact.difficulties, {"X": None, "O": "hard"})
+
+    def test_interleaved_sessions_store_their_own_moves(self):
+        """Test that sessions sharing one GameStats each store only their own moves."""
+        with tempfile.TemporaryDirectory() as directory, \
+                GameStore(os.path.join(directory, "games.db")) as store:
+            pool = SessionPool(stats=GameStats(max_history=0, store=store))
+            first, second = pool.acquire(), pool.acquire()
+            for row, col in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+                first.play(row, col)
+                second.play(2 - row, col)
+            first.restart()
+            second.restart()
+            self.assertEqual(store.game_moves(1), [("X", 0, 0), ("O", 1, 0), ("X", 0, 1), ("O", 1, 1), ("X", 0, 2)])
+            self.assertEqual(store.game_moves(2), [("X", 2, 0), ("O", 1, 0), ("X", 2, 1), ("O", 1, 1), ("X", 2, 2)])
+
+    def test_release_recycles_and_snapshot_restores(self):
+        """Test that released sessions are reused and live ones survive a checkpoint."""
+        pool = SessionPool(4, 3)
+        first = pool.acquire(o_difficulty="medium")
+        first.play(1, 1)
+        pool.release(first)
+        second = pool.acquire(x_difficulty="easy")
+        self.assertIs(second, first)
+        self.assertEqual((second.move_count, second.difficulties["X"]), (0, "easy"))
+        second.play(3, 3)
+        third = pool.acquire()
+
+        restored = SessionPool(4, 3)
+        sessions = restored.restore(pool.snapshot())
+        self.assertEqual([session.session_id for session in sessions],
+                         [second.session_id, third.session_id])
+        self.assertEqual(sessions[0].board, second.board)
+        self.assertEqual(sessions[0].move_list, [("X", 3, 3)])
+        self.assertEqual(sessions[0].current_player, "O")
+        self.assertGreater(restored.acquire().session_id, third.session_id)
+        with self.assertRaises(ValueError):
+            SessionPool(3).restore(pool.snapshot())
+        old_version = pool.snapshot()[:4] + b"\x01" + pool.snapshot()[5:]
+        with self.assertRaisesRegex(ValueError, "unsupported snapshot version 1"):
+            SessionPool(4, 3).restore(old_version)
+
+
+class TestGameServer(unittest.TestCase):
+    def test_sessions_play_against_batched_ai(self):
+        """Test that concurrent clients play full games and feed the shared stats."""
+        async def scenario():
+            server = GameServer()
+            port = await server.start("127.0.0.1", 0)
+            try:
+                report = await game_client.run_load("127.0.0.1", port, sessions=20, connections=4,
+                                                    duration=0.3, difficulty="hard")
+                connection = await game_client._Connection.open("127.0.0.1", port)
+                error = await connection.request({"op": "move", "session": 999, "row": 0, "col": 0})
+                await connection.close()
+            finally:
+                await server.close()
+            return server, report, error
+
+        server, report, error = asyncio.run(scenario())
+        self.assertGreater(report["moves"], 0)
+        self.assertEqual(server.stats.games_played, report["games"])
+        self.assertEqual(server.ai_moves, server.stats.total_moves - report["moves"])
+        self.assertEqual(server.games, {})
+        self.assertEqual(error["op"], "error")
+
+    def test_failed_ai_batch_reports_error_and_can_resume(self):
+        """Test that an AI exception is reported per session and the game is not stuck."""
+        import game_server
+
+        def failing_think(requests):
+            raise RuntimeError("search crashed")
+
+        async def scenario():
+            server = GameServer()
+            port = await server.start("127.0.0.1", 0)
+            think = game_server._think
+            try:
+                connection = await game_client._Connection.open("127.0.0.1", port)
+                game_server._think = failing_think
+                error = await connection.request({"op": "new", "ai": "hard", "human": "O"})
+                # The load client surfaces the server's message; Random(0) plays O
+                with self.assertRaisesRegex(RuntimeError, "search crashed"):
+                    await game_client._play(connection, "hard", time.monotonic() + 1, 0,
+                                            random.Random(0), [], {"games": 0})
+                game_server._think = think
+                move = await connection.request({"op": "move", "session": error["session"], "row": 0, "col": 0})
+                state = await connection.request({"op": "resume", "session": error["session"]})
+                await connection.close()
+            finally:
+                game_server._think = think
+                await server.close()
+            return error, move, state
+
+        error, move, state = asyncio.run(scenario())
+        self.assertEqual(error["op"], "error")
+        self.assertIn("search crashed", error["error"])
+        self.assertEqual(move["op"], "error")
+        self.assertEqual(state["op"], "state")
+        self.assertEqual(state["to_move"], "O")
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_compare_flags_only_regressions_past_threshold(self):
+        """Test that the comparison gates on the slowdown threshold."""
+        baseline = {"fast": 1.0, "slow": 1.0, "better": 2.0}
+        results = {"fast": 1.1, "slow": 1.5, "better": 1.0, "new": 3.0}
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            self.assertEqual(benchmark.compare(results, baseline, 0.25), ["slow"])
+
+
+class TestTrace(unittest.TestCase):
+    def tearDown(self):
+        game_trace.disable()
+
+    def test_disabled_spans_are_shared_no_ops(self):
+        """Test that tracing records nothing until enabled."""
+        self.assertFalse(game_trace.is_enabled())
+        self.assertIs(game_trace.span("a"), game_trace.span("b"))
+        game_trace.count("moves")
+
+    def test_session_spans_and_counters_export(self):
+        """Test that a traced game produces spans, counters and a Chrome trace."""
+        game_trace.enable(memory_interval=None)
+        session = GameSession(x_difficulty="expert", o_difficulty="expert", rng=random.Random(0))
+        while not session.model.game_over:
+            session.play_ai_move()
+        tracer = game_trace.disable()
+
+        moves = len(session.model.move_stack)
+        self.assertEqual(tracer.counters["moves"], moves)
+        names = [span[0] for span in tracer.spans]
+        self.assertEqual(names.count("ai.get_move"), moves)
+        self.assertEqual(names.count("stats.record_move"), moves)
+        events = tracer.chrome_trace()["traceEvents"]
+        self.assertEqual(sum(event["ph"] == "X" for event in events), len(tracer.spans))
+        self.assertIn("model.make_move", tracer.summary())
+
+
 class TestGameAI(unittest.TestCase):
     def setUp(self):
         self.ai_easy = GameAI(difficulty="easy")
@@ -57,5 +635,492 @@ class TestGameAI(unittest.TestCase):
         move = self.ai_easy.get_move(self.empty_board, "O")
         self.assertIsNotNone(move)  # Check that it doesn't return None
 
+
+class TestExpertAI(unittest.TestCase):
+    def setUp(self):
+        self.ai = GameAI(difficulty="expert")
+
+    def test_expert_blocks_fork(self):
+        """Test that the expert answers opposite corners with a side."""
+        board = [["X", "", ""], ["", "O", ""], ["", "", "X"]]
+        self.assertIn(self.ai.get_move(board, "O"), [(0, 1), (1, 0), (1, 2), (2, 1)])
+
+    def test_expert_self_play_is_a_draw(self):
+        """Test that perfect play on both sides ends in a draw."""
+        model = GameModel()
+        while not model.game_over:
+            model.make_move(*self.ai.get_move(model.board, model.current_player))
+        self.assertIsNone(model.winner)
+
+    def test_repeated_position_is_a_table_hit(self):
+        """Test that asking again about a searched position hits the table."""
+        ai = GameAI(difficulty="expert", win_length=3, search_depth=3)
+        board = [["", "", "", ""], ["", "X", "", ""], ["", "", "", ""], ["", "", "", ""]]
+        first = ai.get_move(board, "O")
+        table = GameAI.transposition_table(4, 3)
+        hits = table.hits
+        self.assertEqual(ai.get_move(board, "O"), first)
+        self.assertEqual(table.hits, hits + 1)
+
+    def test_think_time_bounds_the_search(self):
+        """Test that a time-limited search answers with a legal move in time."""
+        ai = GameAI(difficulty="expert", win_length=4, search_depth=40, think_time=0.05)
+        model = GameModel(size=6, win_length=4)
+        model.make_move(2, 2)
+        start = time.monotonic()
+        row, col = ai.get_move(model.board, "O")
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(model.board[row][col], "")
+
+    def test_stopped_search_still_returns_a_move(self):
+        """Test that a search stopped from another thread returns a legal move."""
+        stop = threading.Event()
+        stop.set()
+        board = [["X"] + [""] * 4] + [[""] * 5 for _ in range(4)]
+        row, col = GameAI(difficulty="expert", win_length=4, search_depth=40).get_move(board, "O", stop)
+        self.assertEqual(board[row][col], "")
+
+    def test_perfect_play_table_matches_search(self):
+        """Test that sampled table entries agree with a fresh search."""
+        from game_search import NegamaxSearch, TranspositionTable
+        table = GameAI.perfect_play_table()
+        self.assertIsNotNone(table)
+        self.assertIsNone(table.lookup([["X", "", ""], ["", "", ""], ["", "", ""]], "X"))
+
+        def solve(model):
+            _, score = NegamaxSearch(model, search_table).best_move()
+            return (score > 0) - (score < 0)
+
+        rng = random.Random(4)
+        checked = 0
+        for _ in range(40):
+            search_table = TranspositionTable()
+            model = GameModel()
+            while not model.game_over:
+                player = model.current_player
+                row, col, value = table.lookup(model.board, player)
+                self.assertEqual(value - DRAW, solve(model))
+                # The stored move must keep that value, whichever of the tied moves it is
+                model.make(row * 3 + col)
+                self.assertEqual(1 if model.winner else 0 if model.game_over else -solve(model), value - DRAW)
+                model.unmake()
+                checked += 1
+                empty = [cell for cell in range(9) if not (model.masks[0] | model.masks[1]) >> cell & 1]
+                model.make(rng.choice(empty))
+        self.assertGreater(checked, 200)
+
+
+class TestAnalyze(unittest.TestCase):
+    def setUp(self):
+        GameAI.analysis_cache().clear()
+
+    def test_batch_reports_moves_values_and_threats(self):
+        """Test analyze() on a batch, with symmetric positions served from the cache."""
+        board = [["X", "X", ""], ["O", "O", ""], ["", "", ""]]
+        rotated = [list(row) for row in zip(*board[::-1])]
+        over = [["X", "X", "X"], ["O", "O", ""], ["", "", ""]]
+        first, second, finished = GameAI("easy").analyze([board, rotated, over])
+
+        self.assertEqual(first, Analysis((0, 2), 1, {"X": [(0, 2)], "O": [(1, 2)]}))
+        self.assertEqual(second, Analysis((2, 2), 1, {"X": [(2, 2)], "O": [(2, 1)]}))
+        self.assertEqual((finished.move, finished.value), (None, -1))
+        cache = GameAI.analysis_cache()
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_unresolved_large_board_value_is_none(self):
+        """Test that a depth-limited search does not claim a draw."""
+        (analysis,) = GameAI(search_depth=1).analyze([[[""] * 7 for _ in range(7)]])
+        self.assertIsNone(analysis.value)
+        self.assertIsNotNone(analysis.move)
+
+    def test_cache_is_keyed_by_search_depth(self):
+        """Test that a shallow analyzer's unresolved entry is not served to a deeper one."""
+        board = [[""] * 6 for _ in range(6)]
+        board[2][2] = board[2][3] = "X"
+        board[5][0] = board[5][5] = "O"
+        (shallow,) = GameAI(search_depth=1, win_length=4).analyze([board])
+        (deep,) = GameAI(search_depth=3, win_length=4).analyze([board])
+        self.assertIsNone(shallow.value)
+        self.assertEqual(deep.value, 1)
+
+
+class TestMCTS(unittest.TestCase):
+    def test_mcts_takes_the_win(self):
+        """Test that MCTS finds a winning move within its budget."""
+        ai = GameAI(difficulty="mcts", think_time=0.2, workers=1, rng=random.Random(3))
+        board = [["X", "X", ""], ["O", "O", ""], ["", "", ""]]
+        self.assertEqual(ai.get_move(board, "X"), (0, 2))
+
+    def test_finished_board_has_no_move(self):
+        """Test that a won or full board gets None, like the other difficulties."""
+        ai = GameAI(difficulty="mcts", think_time=0.2, workers=1, rng=random.Random(3))
+        won = [["X", "X", "X"], ["O", "O", ""], ["", "", ""]]
+        full = [["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]
+        self.assertIsNone(ai.get_move(won, "O"))
+        self.assertIsNone(ai.get_move(full, "O"))
+        self.assertIsNone(GameAI(difficulty="hard").get_move(full, "O"))
+
+    def test_stop_reaches_pool_workers(self):
+        """Test that setting stop ends the worker processes' searches too."""
+        stop = threading.Event()
+        timer = threading.Timer(0.2, stop.set)
+        board = [[""] * 7 for _ in range(7)]
+        game_mcts.best_move(board, "X", 4, think_time=0.5, workers=2, rng=random.Random(0))  # Start the pool
+        timer.start()
+        started = time.monotonic()
+        row, col = game_mcts.best_move(board, "X", 4, think_time=30, workers=2, rng=random.Random(0), stop=stop)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(board[row][col], "")
+        self.assertIsNotNone(game_mcts._pool)
+
+    def test_tree_is_reused_after_two_moves(self):
+        """Test that the next search starts from the matching subtree."""
+        model = GameModel(size=7, win_length=4)
+        model.make_move(3, 3)
+        visits = game_mcts.search(model, time.monotonic() + 0.1, random.Random(0))
+        reply = max(visits, key=visits.get)
+        answers = game_mcts._last_tree[0].children[reply].children
+        model.make(reply)
+        model.make(next(iter(answers)))
+        subtree = game_mcts._reuse_tree(model)
+        self.assertIsNotNone(subtree)
+        self.assertGreater(subtree.visits, 0)
+
+
+class StubAI:
+    """Stands in for GameAI in worker tests: plays the first empty cell, optionally after a gate opens, or raises error if set."""
+
+    win_length = None
+
+    def __init__(self, gate=None, error=None):
+        self.gate = gate
+        self.error = error
+        self.calls = []
+        self.stops = []
+
+    def get_move(self, board, player, stop=None, model=None):
+        self.calls.append([list(row) for row in board])
+        self.stops.append(stop)
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return next((r, c) for r, row in enumerate(board) for c, cell in enumerate(row) if not cell)
+
+
+@unittest.skipIf(QApplication is None, "PyQt5 is not installed")
+class QtTestCase(unittest.TestCase):
+    """Base for tests of Qt objects, run on the offscreen platform."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def pump(self, condition, timeout=5):
+        """Process Qt events until condition() holds, failing after timeout seconds."""
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out waiting for the event loop")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+
+class TestAIWorker(QtTestCase):
+    def setUp(self):
+        from game_worker import AIWorker
+        self.worker = AIWorker()
+        self.moves = []
+        self.worker.move_ready.connect(lambda request, row, col: self.moves.append((request, row, col)))
+
+    def tearDown(self):
+        self.worker.shutdown()
+
+    def test_pondered_reply_is_served_from_the_cache(self):
+        """Test that a pondered position is answered without another get_move."""
+        ai = StubAI()
+        board = [["", "", ""], ["", "", ""], ["", "", ""]]
+        self.worker.ponder(ai, board, "O", "X")
+        self.pump(lambda: len(ai.calls) == 9)
+        self.pump(lambda: self.worker._pondering is None)
+
+        board[1][1] = "X"
+        request = self.worker.request_move(ai, board, "O")
+        self.pump(lambda: self.moves)
+        self.assertEqual(self.moves, [(request, 0, 0)])
+        self.assertEqual(len(ai.calls), 9)
+
+    def test_cache_hit_halts_pondering(self):
+        """Test that a move served from the cache stops the search of other replies."""
+        class Turnstile(threading.Semaphore):
+            def wait(self, timeout):
+                self.acquire(timeout=timeout)
+
+        gate = Turnstile(1)
+        ai = StubAI(gate)
+        board = [["", "", ""], ["", "", ""], ["", "", ""]]
+        self.worker.ponder(ai, board, "O", "X")
+        self.pump(lambda: len(ai.calls) == 2)
+
+        board[0][0] = "X"
+        request = self.worker.request_move(ai, board, "O")
+        self.assertTrue(ai.stops[1].is_set())
+        gate.release()
+        self.pump(lambda: self.moves)
+        self.assertEqual(self.moves, [(request, 0, 1)])
+        self.worker._executor.submit(lambda: None).result(5)
+        self.assertEqual(len(ai.calls), 2)
+
+    def test_request_waits_for_the_reply_being_pondered(self):
+        """Test that a request for the position under search adopts that search."""
+        gate = threading.Event()
+        ai = StubAI(gate)
+        board = [["", "", ""], ["", "", ""], ["", "", ""]]
+        self.worker.ponder(ai, board, "O", "X")
+        self.pump(lambda: ai.calls)
+
+        board[0][0] = "X"
+        request = self.worker.request_move(ai, board, "O")
+        gate.set()
+        self.pump(lambda: self.moves)
+        self.assertEqual(self.moves, [(request, 0, 1)])
+        self.assertEqual(len(ai.calls), 1)
+
+    def test_stale_result_is_dropped_for_a_newer_request(self):
+        """Test that a move for a superseded request is never delivered."""
+        gate = threading.Event()
+        ai = StubAI(gate)
+        old_board = [["X", "", ""], ["", "", ""], ["", "", ""]]
+        stale = self.worker.request_move(ai, old_board, "O")
+        self.pump(lambda: ai.calls)
+
+        new_board = [["X", "O", "X"], ["", "", ""], ["", "", ""]]
+        request = self.worker.request_move(ai, new_board, "O")
+        gate.set()
+        self.pump(lambda: self.moves)
+        self.assertNotEqual(stale, request)
+        self.assertEqual(self.moves, [(request, 1, 0)])
+
+    def test_failed_search_is_reported_and_can_be_retried(self):
+        """Test that an AI error reaches move_failed, also for a request waiting on pondering, and a click retries."""
+        failures = []
+        self.worker.move_failed.connect(lambda request, message: failures.append((request, message)))
+        board = [["X", "", ""], ["", "", ""], ["", "", ""]]
+        request = self.worker.request_move(StubAI(error=RuntimeError("boom")), board, "O")
+        self.pump(lambda: failures)
+        self.assertEqual(failures, [(request, "AI move failed: boom")])
+
+        gate = threading.Event()
+        ai = StubAI(gate, RuntimeError("ponder"))
+        board = [["", "", ""], ["", "", ""], ["", "", ""]]
+        self.worker.ponder(ai, board, "O", "X")
+        self.pump(lambda: ai.calls)
+        board[0][0] = "X"
+        request = self.worker.request_move(ai, board, "O")
+        gate.set()
+        self.pump(lambda: len(failures) == 2)
+        self.assertEqual(failures[1], (request, "AI move failed: ponder"))
+        self.assertEqual(self.moves, [])
+
+        from game_window import EnhancedTicTacBoomGame
+        game = EnhancedTicTacBoomGame(ai_enabled=True, track_stats=False)
+        try:
+            game.ai = ai = StubAI(error=RuntimeError("boom"))
+            game.ai_worker.clear()
+            game.make_move(1, 1)
+            game.events.flush()
+            self.pump(lambda: not game._ai_thinking)
+            self.assertIn("AI move failed: boom", game.status_text.text())
+
+            ai.error = None
+            game.make_move(2, 2)
+            self.pump(lambda: game.game_model.board[0][0] == "O")
+            self.assertEqual(game.game_model.board[2][2], "")
+            self.assertFalse(game._ai_thinking)
+        finally:
+            game.close()
+
+    def test_new_game_cancels_the_ai_move_in_progress(self):
+        """Test that restarting while the AI thinks drops its move and stops the search."""
+        from game_window import EnhancedTicTacBoomGame
+        game = EnhancedTicTacBoomGame(ai_enabled=True, track_stats=False)
+        try:
+            gate = threading.Event()
+            game.ai = ai = StubAI(gate)
+            game.ai_worker.clear()
+
+            game.make_move(1, 1)
+            game.events.flush()
+            self.pump(lambda: ai.calls)
+            game.restart_game()
+            self.assertTrue(ai.stops[0].is_set())
+
+            gate.set()
+            game.ai_worker._executor.submit(lambda: None).result(5)
+            self.app.processEvents()
+            self.assertFalse(game._ai_thinking)
+            self.assertTrue(all(not cell for row in game.game_model.board for cell in row))
+        finally:
+            game.close()
+
+
+class TestBoardWidget(QtTestCase):
+    def setUp(self):
+        from board_widget import BoardWidget
+
+        class RecordingBoard(BoardWidget):
+            def paintEvent(self, event):
+                self.painted.append(event.rect())
+                super().paintEvent(event)
+
+        self.board = RecordingBoard(size=3)
+        self.board.painted = []
+        # 300x200 fits 66 pixel cells, centered 51 pixels from the left and 1 from the top
+        self.board.resize(300, 200)
+        self.board.show()
+        self.pump(lambda: self.board.painted)
+
+    def tearDown(self):
+        self.board.close()
+
+    def test_cell_at_hits_cells_inside_the_grid(self):
+        """Test that points map to the cell under them, edges included."""
+        self.assertEqual(self.board.cell_at(51, 1), (0, 0))
+        self.assertEqual(self.board.cell_at(116, 66), (0, 0))
+        self.assertEqual(self.board.cell_at(117, 67), (1, 1))
+        self.assertEqual(self.board.cell_at(248, 198), (2, 2))
+
+    def test_cell_at_ignores_margins_and_points_off_the_board(self):
+        """Test that the margins around the grid and points beyond it hit no cell."""
+        self.assertIsNone(self.board.cell_at(50, 100))
+        self.assertIsNone(self.board.cell_at(249, 100))
+        self.assertIsNone(self.board.cell_at(100, 0))
+        self.assertIsNone(self.board.cell_at(100, 199))
+        self.assertIsNone(self.board.cell_at(-5, -5))
+        self.assertIsNone(self.board.cell_at(1000, 1000))
+
+    def test_move_repaints_only_its_cell(self):
+        """Test that setting a mark schedules a repaint of that cell and draws the mark."""
+        before = self.board.grab().toImage()
+        self.board.painted.clear()
+        self.board.set_mark(1, 2, "X")
+        self.pump(lambda: self.board.painted)
+
+        cell = self.board._cell_rect(1, 2)
+        self.assertTrue(all(cell.contains(rect) for rect in self.board.painted))
+        after = self.board.grab().toImage()
+        self.assertNotEqual(before.copy(cell), after.copy(cell))
+        self.assertEqual(before.copy(self.board._cell_rect(0, 0)), after.copy(self.board._cell_rect(0, 0)))
+
+
+class TestBoomOverlay(QtTestCase):
+    def setUp(self):
+        from PyQt5.QtWidgets import QWidget
+        from boom_widget import BoomOverlay
+        self.parent = QWidget()
+        self.parent.resize(300, 200)
+        self.parent.show()
+        self.overlay = BoomOverlay(self.parent)
+
+    def tearDown(self):
+        self.parent.close()
+
+    def test_play_shows_and_animates_over_the_parent(self):
+        """Test that playing shows the overlay across the parent and starts scaling the glyph."""
+        self.assertFalse(self.overlay.isVisible())
+        self.overlay.play()
+        self.assertTrue(self.overlay.is_playing())
+        self.assertTrue(self.overlay.isVisible())
+        self.assertEqual(self.overlay.geometry(), self.parent.rect())
+        self.pump(lambda: self.overlay._scale > 0)
+
+        self.parent.resize(400, 300)
+        self.pump(lambda: self.overlay.geometry() == self.parent.rect())
+
+    def test_cancel_stops_and_hides(self):
+        """Test that cancelling mid-animation stops it and hides the overlay at once."""
+        self.overlay.play()
+        self.overlay.cancel()
+        self.assertFalse(self.overlay.is_playing())
+        self.assertFalse(self.overlay.isVisible())
+
+    def test_finished_animation_hides_and_can_replay(self):
+        """Test that the overlay hides itself when the animation ends and plays again afterwards."""
+        self.overlay.play()
+        self.overlay._animation.setCurrentTime(self.overlay._animation.duration())
+        self.pump(lambda: not self.overlay.is_playing())
+        self.assertFalse(self.overlay.isVisible())
+
+        self.overlay.play()
+        self.assertTrue(self.overlay.is_playing())
+        self.assertTrue(self.overlay.isVisible())
+        self.overlay.cancel()
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestBatchGameEngine(unittest.TestCase):
+    def test_batch_games_replay_on_game_model(self):
+        """Test that every batched game is a legal game with the same result."""
+        from game_batch import BatchGameEngine
+        # 3x3 plays from the lookup tables, 4x4 with the line arrays
+        for size, policies in [(3, ("hard", "easy")), (3, ("medium", "hard")), (4, ("hard", "medium"))]:
+            engine = BatchGameEngine(200, size=size, seed=1)
+            self.assertEqual(engine.tables is None, size == 4)
+            engine.play(*policies)
+            self.assertFalse(engine.active.any())
+            for moves, winner in zip(engine.moves, engine.winners):
+                model = GameModel(size)
+                for cell in moves[moves >= 0]:
+                    self.assertFalse(model.game_over)
+                    model.make(int(cell))
+                self.assertTrue(model.game_over)
+                self.assertEqual(model.winner, [None, "X", "O"][winner])
+
+    def test_batch_medium_takes_the_win(self):
+        """Test that the medium policy completes a line when it can."""
+        from game_batch import BatchGameEngine, X, O
+        engine = BatchGameEngine(3, seed=0)
+        engine.boards[:] = [X, X, 0, O, O, 0, 0, 0, 0]
+        engine.ply = 4
+        engine.step("medium")
+        self.assertEqual(list(engine.winners), [X, X, X])
+        self.assertEqual(engine.to_stats().x_wins, 3)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestGameAnalytics(unittest.TestCase):
+    GAMES = [([(1, 1), (0, 0), (0, 1), (2, 1), (0, 2), (2, 0), (1, 0), (1, 2), (2, 2)], None, False),
+             ([(1, 1), (0, 0), (0, 2), (2, 0), (1, 0), (1, 2), (0, 1), (2, 1)], None, False),
+             ([(1, 1), (0, 1), (0, 0), (2, 2), (0, 2), (1, 2), (2, 0)], "X", True),
+             ([(0, 0), (1, 1), (0, 1), (0, 2), (2, 2), (2, 0)], "O", False)]
+
+    def test_archive_and_store_load_the_same_arrays(self):
+        """Test that both loaders agree and the reports match the recorded games."""
+        from game_analytics import GameArrays
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.ttbr")
+            with GameStore(os.path.join(directory, "stats.db")) as store:
+                with ReplayWriter(path) as writer:
+                    stats = GameStats(store=store, archive=writer)
+                    for moves, winner, had_boom in self.GAMES:
+                        for number, (row, col) in enumerate(moves):
+                            stats.record_move("XO"[number % 2], row, col, number + 1)
+                        stats.record_game_result(winner, had_boom, x_difficulty="hard")
+                from_store = GameArrays.from_store(store)
+            with ReplayArchive(path) as archive:
+                from_archive = GameArrays.from_archive(archive)
+
+        for games in (from_store, from_archive):
+            self.assertEqual(list(games.lengths), [9, 8, 7, 6])
+            self.assertEqual(list(games.winners), [0, 0, 1, 2])
+            self.assertEqual(list(games.booms), [False, False, True, False])
+            self.assertEqual(games.heatmaps()[0].tolist(), [[1, 0, 0], [0, 3, 0], [0, 0, 0]])
+            self.assertEqual(games.heatmaps()[8].sum(), 1)
+            self.assertEqual(games.win_rate_after([(1, 1)])['games'], 3)
+            self.assertEqual(games.opening_win_rates(2)[((1, 1), (0, 0))]['draw'], 100.0)
+            self.assertEqual(games.boom_rates()["winner"]["X"], {'games': 1, 'boom': 100.0})
+        self.assertEqual(from_store.average_length_by_difficulty(), {("hard", ""): 7.5})
+        self.assertEqual(from_archive.average_length_by_difficulty(), {(None, None): 7.5})
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file